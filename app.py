@@ -1,12 +1,32 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify
+from flask import Flask, Response, render_template, stream_template, stream_with_context, send_file, request, redirect, url_for, flash, jsonify, abort
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
+from sqlalchemy import and_, case, column, delete, event, func, insert, inspect, literal, or_, select, true, tuple_, union, update, values
+from sqlalchemy.orm import Session, configure_mappers, contains_eager, joinedload, object_session, selectinload
+import json
 import os
-import requests
+import random
+import time
+import uuid
+import click
+from flask.cli import AppGroup
 from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
 
+import instrumentation
+import export_files
+from jobs import FINISHED_STATES, JobRunner, UnknownJobKind
+import rate_card_files
+import sqlite_tuning
+from geo_index import GridIndex
+from occupancy import OccupancyIndex, SlotCapacityError
+import pricing
+from pagination import InvalidCursor, keyset_page, parse_per_page
+from query_budget import QueryBudgetExceeded, max_queries
+from response_cache import BatchCache, TTLCache, VersionRegistry, VersionedResponseCache
+from upstream import UpstreamClient, UpstreamError
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -15,16 +35,81 @@ app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'your-secret-key-change-
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('SQLALCHEMY_DATABASE_URI', 'sqlite:///ekranu_crm.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['UPLOAD_FOLDER'] = 'static/uploads'
+# Seconds a worker trusts its cached plan versions before re-reading them (ETag checks)
+app.config['PLAN_VERSION_TTL'] = float(os.environ.get('PLAN_VERSION_TTL', '5'))
+# Seconds a worker trusts its cached screen rate cards; edits made by this process apply immediately
+app.config['RATE_CARD_TTL'] = float(os.environ.get('RATE_CARD_TTL', '300'))
+# Seconds the dashboard statistics are cached; any committed write drops them earlier
+app.config['DASHBOARD_STATS_TTL'] = float(os.environ.get('DASHBOARD_STATS_TTL', '60'))
+# Seconds before the in-memory screen location index is fully reloaded (picks up other workers' writes)
+app.config['SCREEN_INDEX_TTL'] = float(os.environ.get('SCREEN_INDEX_TTL', '300'))
+# Ad slots one screen hour can hold across all plans (plays of a 15 s clip in an hour)
+app.config['SCREEN_HOUR_CAPACITY'] = int(os.environ.get('SCREEN_HOUR_CAPACITY', '240'))
+# Seconds before the booked-slot occupancy index is fully reloaded (picks up other workers' writes)
+app.config['OCCUPANCY_TTL'] = float(os.environ.get('OCCUPANCY_TTL', '60'))
+# Records matched and written per statement batch by the brand/kampanija imports
+app.config['IMPORT_CHUNK_SIZE'] = int(os.environ.get('IMPORT_CHUNK_SIZE', '500'))
 
 # API Configuration - use server IP for server-to-server communication
 app.config['PROJECTS_CRM_URL'] = os.environ.get('PROJECTS_CRM_URL', 'http://91.99.165.20:5002')
 app.config['PROJECTS_CRM_API_KEY'] = os.environ.get('PROJECTS_CRM_API_KEY', 'projects-crm-api-key-change-in-production')
 app.config['AGENCY_CRM_URL'] = os.environ.get('AGENCY_CRM_URL', 'http://91.99.165.20:5001')
 app.config['AGENCY_CRM_API_KEY'] = os.environ.get('AGENCY_CRM_API_KEY', 'my-agency-crm-api-key-change-in-production')
+# Upstream responses are fresh for UPSTREAM_CACHE_TTL seconds and served stale while refreshing up to UPSTREAM_STALE_TTL
+app.config['UPSTREAM_TIMEOUT'] = float(os.environ.get('UPSTREAM_TIMEOUT', '5'))
+app.config['UPSTREAM_CACHE_TTL'] = float(os.environ.get('UPSTREAM_CACHE_TTL', '60'))
+app.config['UPSTREAM_STALE_TTL'] = float(os.environ.get('UPSTREAM_STALE_TTL', '600'))
+# Request instrumentation: Server-Timing headers and a JSON-lines log of requests slower than the threshold
+app.config['SERVER_TIMING'] = os.environ.get('SERVER_TIMING', '1') == '1'
+app.config['SLOW_REQUEST_THRESHOLD_MS'] = float(os.environ.get('SLOW_REQUEST_THRESHOLD_MS', '500'))
+app.config['SLOW_REQUEST_LOG'] = os.environ.get('SLOW_REQUEST_LOG')
+# SQLite file databases: WAL journal and per-connection pragmas (0 keeps SQLite's defaults)
+app.config['SQLITE_TUNING'] = os.environ.get('SQLITE_TUNING', '1') == '1'
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+app.config['SQLITE_SYNCHRONOUS'] = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+app.config['SQLITE_CACHE_SIZE_KIB'] = int(os.environ.get('SQLITE_CACHE_SIZE_KIB', '32768'))
+app.config['SQLITE_MMAP_SIZE'] = int(os.environ.get('SQLITE_MMAP_SIZE', '268435456'))
+# Seconds a save waits for the process-wide write queue before giving up with 503
+app.config['WRITE_QUEUE_TIMEOUT'] = float(os.environ.get('WRITE_QUEUE_TIMEOUT', '30'))
+# Threads running background jobs in each worker process (0 runs jobs inline, for tests and the CLI)
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', '2'))
+# Uploaded files waiting for their import job and finished job exports
+app.config['JOB_FOLDER'] = os.environ.get('JOB_FOLDER') or os.path.join(app.instance_path, 'jobs')
+# Seconds a finished export stays downloadable before its file is deleted
+app.config['JOB_FILE_MAX_AGE'] = int(os.environ.get('JOB_FILE_MAX_AGE', '86400'))
 
 db = SQLAlchemy(app)
 migrate = Migrate(app, db)
 
+with app.app_context():
+    instrumentation.init_app(app, db.engine)
+    # Read-only JSON endpoints query through their own connections, which refuse writes
+    read_engine = db.engine
+    if app.config['SQLITE_TUNING'] and sqlite_tuning.is_sqlite_file(db.engine):
+        sqlite_settings = {
+            'busy_timeout_ms': app.config['SQLITE_BUSY_TIMEOUT_MS'],
+            'synchronous': app.config['SQLITE_SYNCHRONOUS'],
+            'cache_size_kib': app.config['SQLITE_CACHE_SIZE_KIB'],
+            'mmap_size': app.config['SQLITE_MMAP_SIZE'],
+        }
+        sqlite_tuning.configure_engine(db.engine, **sqlite_settings)
+        read_engine = sqlite_tuning.read_only_engine(db.engine, **sqlite_settings)
+        instrumentation.instrument_engine(read_engine)
+    query_engines = list(dict.fromkeys([db.engine, read_engine]))
+
+# Heavy save paths write one short transaction at a time (plain commits with SQLITE_TUNING=0)
+write_queue = sqlite_tuning.WriteQueue(timeout=app.config['WRITE_QUEUE_TIMEOUT'], enabled=app.config['SQLITE_TUNING'])
+
+# Pooled, cached clients for the other CRMs
+projects_crm = UpstreamClient(
+    app.config['PROJECTS_CRM_URL'], app.config['PROJECTS_CRM_API_KEY'],
+    timeout=app.config['UPSTREAM_TIMEOUT'], ttl=app.config['UPSTREAM_CACHE_TTL'], stale_ttl=app.config['UPSTREAM_STALE_TTL']
+)
+agency_crm = UpstreamClient(
+    app.config['AGENCY_CRM_URL'], app.config['AGENCY_CRM_API_KEY'],
+    timeout=app.config['UPSTREAM_TIMEOUT'], ttl=app.config['UPSTREAM_CACHE_TTL'], stale_ttl=app.config['UPSTREAM_STALE_TTL']
+)
+
 # Ensure upload directory exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
@@ -39,6 +124,11 @@ class Client(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     campaigns = db.relationship('Campaign', backref='client', lazy=True, cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        db.Index('ix_client_company_name', 'company', 'name'),
+        db.Index('ix_client_name', 'name'),
+    )
 
 class Kampanija(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -48,6 +138,8 @@ class Kampanija(db.Model):
     external_id = db.Column(db.String(100))  # To track source (projects_campaign_X)
     source_system = db.Column(db.String(50), default='projects-crm')  # Track which system it came from
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (db.Index('ix_kampanija_external_id', 'external_id', unique=True),)
 
 class Campaign(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -60,6 +152,11 @@ class Campaign(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     dooh_plans = db.relationship('DOOHPlan', backref='campaign', lazy=True, cascade='all, delete-orphan')
+    
+    __table_args__ = (
+        db.Index('ix_campaign_client_id_name', 'client_id', 'name'),
+        db.Index('ix_campaign_name', 'name'),
+    )
 
 class DOOHPlan(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -68,8 +165,16 @@ class DOOHPlan(db.Model):
     start_date = db.Column(db.Date, nullable=False)
     end_date = db.Column(db.Date, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # Bumped on every booking/pricing write
     
     screen_bookings = db.relationship('ScreenBooking', backref='dooh_plan', lazy=True, cascade='all, delete-orphan')
+    
+    # Sort keys of the plan list
+    __table_args__ = (
+        db.Index('ix_dooh_plan_name', 'name'),
+        db.Index('ix_dooh_plan_start_date', 'start_date'),
+        db.Index('ix_dooh_plan_campaign_id', 'campaign_id'),
+    )
 
 class ScreenBooking(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -77,6 +182,18 @@ class ScreenBooking(db.Model):
     screen_id = db.Column(db.Integer, db.ForeignKey('screen.id'), nullable=False)
     
     screen_slots = db.relationship('ScreenSlot', backref='booking', lazy=True, cascade='all, delete-orphan')
+    
+    __table_args__ = (db.Index('ix_screen_booking_plan_screen', 'dooh_plan_id', 'screen_id', unique=True),)
+    
+    def slot_grid(self, start_date, end_date):
+        """Dense grid of purchased slots: one list of 24 hourly counts per day from start_date to end_date"""
+        num_days = (end_date - start_date).days + 1
+        grid = [[0] * 24 for _ in range(num_days)]
+        for slot in self.screen_slots:
+            offset = (slot.date - start_date).days
+            if 0 <= offset < num_days and 0 <= slot.hour < 24:
+                grid[offset][slot.hour] = slot.slots_purchased or 0
+        return grid
 
 class ScreenSlot(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -84,6 +201,8 @@ class ScreenSlot(db.Model):
     date = db.Column(db.Date, nullable=False)
     hour = db.Column(db.Integer, nullable=False)  # 0-23
     slots_purchased = db.Column(db.Integer, default=0)  # Number of ad slots purchased for this hour
+    
+    __table_args__ = (db.Index('ix_screen_slot_booking_date_hour', 'booking_id', 'date', 'hour', unique=True),)
 
 class MediaPlanPricing(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -98,6 +217,84 @@ class MediaPlanPricing(db.Model):
     contacts = db.Column(db.Float, default=0.0)  # Contact count used in calculation
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index('ix_media_plan_pricing_plan_screen_week', 'dooh_plan_id', 'screen_id', 'week_number'),
+        db.Index('ix_media_plan_pricing_plan_screen_date_hour', 'dooh_plan_id', 'screen_id', 'date', 'hour', unique=True),
+    )
+
+class MediaPlanDailyTotal(db.Model):
+    """Per plan/screen/day rollup of MediaPlanPricing, maintained on every pricing save"""
+    id = db.Column(db.Integer, primary_key=True)
+    dooh_plan_id = db.Column(db.Integer, db.ForeignKey('dooh_plan.id'), nullable=False)
+    screen_id = db.Column(db.Integer, db.ForeignKey('screen.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    total_price = db.Column(db.Float, default=0.0)  # Sum of calculated_price
+    total_contacts = db.Column(db.Float, default=0.0)  # Sum of contacts (thousands)
+    slot_count = db.Column(db.Integer, default=0)  # Number of purchased hour cells
+    
+    __table_args__ = (
+        db.Index('ix_media_plan_daily_total_plan_screen_date', 'dooh_plan_id', 'screen_id', 'date', unique=True),
+    )
+
+class ReportDailyFact(db.Model):
+    """Reporting cube: MediaPlanDailyTotal with its campaign, client, provider, city and periods copied in"""
+    id = db.Column(db.Integer, primary_key=True)
+    dooh_plan_id = db.Column(db.Integer, db.ForeignKey('dooh_plan.id'), nullable=False)
+    screen_id = db.Column(db.Integer, db.ForeignKey('screen.id'), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    campaign_id = db.Column(db.Integer, db.ForeignKey('campaign.id'), nullable=False)
+    client_id = db.Column(db.Integer, db.ForeignKey('client.id'), nullable=False)
+    provider_id = db.Column(db.Integer, db.ForeignKey('screen_provider.id'), nullable=False)
+    city = db.Column(db.String(100))
+    week_start = db.Column(db.Date, nullable=False)  # Monday of the week
+    month = db.Column(db.Date, nullable=False)  # First day of the month
+    revenue = db.Column(db.Float, default=0.0)  # Sum of calculated_price
+    contacts = db.Column(db.Float, default=0.0)  # Sum of contacts (thousands)
+    slot_count = db.Column(db.Integer, default=0)  # Number of purchased hour cells
+    
+    __table_args__ = (
+        db.Index('ix_report_daily_fact_plan_screen_date', 'dooh_plan_id', 'screen_id', 'date', unique=True),
+        db.Index('ix_report_daily_fact_date', 'date'),
+    )
+
+class ReportMonthlyFact(db.Model):
+    """ReportDailyFact summed per plan, screen and month, for reports over whole months"""
+    id = db.Column(db.Integer, primary_key=True)
+    dooh_plan_id = db.Column(db.Integer, db.ForeignKey('dooh_plan.id'), nullable=False)
+    screen_id = db.Column(db.Integer, db.ForeignKey('screen.id'), nullable=False)
+    month = db.Column(db.Date, nullable=False)
+    campaign_id = db.Column(db.Integer, db.ForeignKey('campaign.id'), nullable=False)
+    client_id = db.Column(db.Integer, db.ForeignKey('client.id'), nullable=False)
+    provider_id = db.Column(db.Integer, db.ForeignKey('screen_provider.id'), nullable=False)
+    city = db.Column(db.String(100))
+    revenue = db.Column(db.Float, default=0.0)
+    contacts = db.Column(db.Float, default=0.0)
+    slot_count = db.Column(db.Integer, default=0)
+    
+    __table_args__ = (
+        db.Index('ix_report_monthly_fact_plan_screen_month', 'dooh_plan_id', 'screen_id', 'month', unique=True),
+        db.Index('ix_report_monthly_fact_month', 'month'),
+    )
+
+class BackgroundJob(db.Model):
+    """A heavy operation run outside the request by the job runner"""
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)  # rebuild_rollups, reprice_plan, export, import_*
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, failed, cancelled
+    params = db.Column(db.Text)  # JSON
+    result = db.Column(db.Text)  # JSON
+    error = db.Column(db.Text)
+    progress_done = db.Column(db.Integer, default=0)
+    progress_total = db.Column(db.Integer)
+    progress_message = db.Column(db.String(200))
+    cancel_requested = db.Column(db.Boolean, default=False)
+    worker = db.Column(db.String(100))  # host:pid of the process running the job
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    
+    __table_args__ = (db.Index('ix_background_job_status', 'status'),)
 
 class ScreenProvider(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -108,6 +305,8 @@ class ScreenProvider(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     screens = db.relationship('Screen', backref='provider', lazy=True, cascade='all, delete-orphan')
+    
+    __table_args__ = (db.Index('ix_screen_provider_name', 'name'),)
 
 class Screen(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -140,6 +339,13 @@ class Screen(db.Model):
     # Relationships
     pricing_hours = db.relationship('ScreenPricing', backref='screen', lazy=True, cascade='all, delete-orphan')
     bookings = db.relationship('ScreenBooking', backref='screen', lazy=True)
+    
+    # Sort and filter keys of the screen list
+    __table_args__ = (
+        db.Index('ix_screen_name', 'name'),
+        db.Index('ix_screen_city', 'city'),
+        db.Index('ix_screen_provider_id', 'provider_id'),
+    )
 
 class ScreenPricing(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -158,18 +364,461 @@ class ScreenPricing(db.Model):
     
     __table_args__ = (db.UniqueConstraint('screen_id', 'hour'),)
 
+# Process-wide cache of screen rate cards (ScreenPricing packed into pricing.RateCard)
+def _load_rate_cards(screen_ids):
+    columns = [ScreenPricing.screen_id, ScreenPricing.hour, ScreenPricing.price] + [
+        getattr(ScreenPricing, f'contacts_{day}') for day in pricing.DAY_NAMES
+    ]
+    rows = []
+    for chunk in chunked(screen_ids, 500):
+        rows.extend(db.session.query(*columns).filter(ScreenPricing.screen_id.in_(chunk)))
+    return pricing.build_rate_cards(rows)
+
+rate_cards = BatchCache(_load_rate_cards, ttl=app.config['RATE_CARD_TTL'], default=pricing.EMPTY_RATE_CARD)
+
+@event.listens_for(ScreenPricing, 'after_insert')
+@event.listens_for(ScreenPricing, 'after_update')
+@event.listens_for(ScreenPricing, 'after_delete')
+def _note_rate_card_change(mapper, connection, row):
+    object_session(row).info.setdefault('rate_card_screens', set()).add(row.screen_id)
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _note_bulk_rate_card_change(orm_execute_state):
+    """Bulk ScreenPricing statements drop the cards of the screens named in their
+    rate_card_screens execution option, or every card without one"""
+    is_write = orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete
+    if is_write and orm_execute_state.bind_mapper is ScreenPricing.__mapper__:
+        screen_ids = orm_execute_state.execution_options.get('rate_card_screens')
+        if screen_ids is None:
+            orm_execute_state.session.info['rate_cards_stale'] = True
+        else:
+            orm_execute_state.session.info.setdefault('rate_card_screens', set()).update(screen_ids)
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_rate_cards(session):
+    screen_ids = session.info.pop('rate_card_screens', None)
+    if session.info.pop('rate_cards_stale', False):
+        rate_cards.invalidate()
+    elif screen_ids:
+        rate_cards.invalidate(*screen_ids)
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_rate_card_changes(session):
+    session.info.pop('rate_card_screens', None)
+    session.info.pop('rate_cards_stale', None)
+
+# Plan versions and version-keyed API response cache
+def _load_plan_version(plan_id):
+    return db.session.query(DOOHPlan.version).filter_by(id=plan_id).scalar()
+
+plan_versions = VersionRegistry(_load_plan_version, ttl=app.config['PLAN_VERSION_TTL'])
+api_response_cache = VersionedResponseCache()
+
+def bump_plan_version(plan_id):
+    """Mark a plan's bookings or pricing as changed; cached versions are dropped once the session commits"""
+    db.session.execute(
+        update(DOOHPlan).where(DOOHPlan.id == plan_id).values(version=DOOHPlan.version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.info.setdefault('bumped_plans', set()).add(plan_id)
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_bumped_plans(session):
+    plan_versions.invalidate(*session.info.pop('bumped_plans', ()))
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_bumped_plans(session):
+    session.info.pop('bumped_plans', None)
+
+# Dashboard statistics, cached for DASHBOARD_STATS_TTL seconds or until the next committed write
+dashboard_cache = TTLCache(ttl=app.config['DASHBOARD_STATS_TTL'])
+
+@event.listens_for(db.session, 'after_flush')
+def _note_flushed_write(session, flush_context):
+    session.info['has_writes'] = True
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _note_bulk_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info['has_writes'] = True
+
+@event.listens_for(db.session, 'after_commit')
+def _invalidate_dashboard_stats(session):
+    if session.info.pop('has_writes', False):
+        dashboard_cache.invalidate()
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_writes(session):
+    session.info.pop('has_writes', None)
+
+# Spatial index of screen coordinates behind /api/screens/near and /api/screens/bbox.
+# ORM writes to screens are applied to it when their session commits; bulk statements
+# against the screen table mark it stale so the next search reloads it.
+screen_index = GridIndex(cell_size=0.05)
+
+def screen_index_fields(screen):
+    return {
+        'name': screen.name,
+        'city': screen.city,
+        'address': screen.address,
+        'screen_type': screen.screen_type,
+        'content_type': screen.content_type,
+        'provider_id': screen.provider_id,
+    }
+
+def get_screen_index():
+    """The screen location index, reloaded from the database when stale"""
+    if not screen_index.is_fresh(app.config['SCREEN_INDEX_TTL']):
+        rows = db.session.query(
+            Screen.id, Screen.gps_latitude, Screen.gps_longitude, Screen.name, Screen.city, Screen.address,
+            Screen.screen_type, Screen.content_type, Screen.provider_id
+        ).filter(Screen.gps_latitude.isnot(None), Screen.gps_longitude.isnot(None))
+        screen_index.replace_all((row.id, row.gps_latitude, row.gps_longitude, screen_index_fields(row)) for row in rows)
+    return screen_index
+
+@event.listens_for(Screen, 'after_insert')
+@event.listens_for(Screen, 'after_update')
+def _queue_screen_location(mapper, connection, screen):
+    object_session(screen).info.setdefault('screen_locations', {})[screen.id] = (
+        screen.gps_latitude, screen.gps_longitude, screen_index_fields(screen)
+    )
+
+@event.listens_for(Screen, 'after_delete')
+def _queue_screen_removal(mapper, connection, screen):
+    object_session(screen).info.setdefault('screen_locations', {})[screen.id] = None
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _note_bulk_screen_write(orm_execute_state):
+    is_write = orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete
+    if is_write and orm_execute_state.bind_mapper is Screen.__mapper__:
+        orm_execute_state.session.info['screen_index_stale'] = True
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_screen_locations(session):
+    if session.info.pop('screen_index_stale', False):
+        screen_index.mark_stale()
+    for screen_id, location in session.info.pop('screen_locations', {}).items():
+        if location is None:
+            screen_index.remove(screen_id)
+        else:
+            lat, lng, fields = location
+            screen_index.upsert(screen_id, lat, lng, **fields)
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_screen_locations(session):
+    session.info.pop('screen_locations', None)
+    session.info.pop('screen_index_stale', None)
+
+# Booked slots per screen, day and hour across all plans, behind /api/screens/availability
+# and the capacity check on schedule saves. apply_slot_changes() queues its changes, which
+# are applied when the session commits; any other write to screen_slot marks the index stale.
+slot_occupancy = OccupancyIndex()
+
+def get_slot_occupancy():
+    """The occupancy index, reloaded from the database when stale"""
+    if not slot_occupancy.is_fresh(app.config['OCCUPANCY_TTL']):
+        rows = db.session.query(
+            ScreenBooking.screen_id, ScreenSlot.date, ScreenSlot.hour, func.sum(ScreenSlot.slots_purchased)
+        ).join(ScreenSlot.booking).filter(ScreenSlot.slots_purchased > 0).group_by(
+            ScreenBooking.screen_id, ScreenSlot.date, ScreenSlot.hour
+        )
+        slot_occupancy.replace_all(rows)
+    return slot_occupancy
+
+@event.listens_for(ScreenSlot, 'after_insert')
+@event.listens_for(ScreenSlot, 'after_update')
+@event.listens_for(ScreenSlot, 'after_delete')
+def _note_slot_write(mapper, connection, slot):
+    object_session(slot).info['occupancy_stale'] = True
+
+@event.listens_for(db.session, 'do_orm_execute')
+def _note_bulk_slot_write(orm_execute_state):
+    is_write = orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete
+    if (is_write and orm_execute_state.bind_mapper is ScreenSlot.__mapper__
+            and not orm_execute_state.execution_options.get('occupancy_queued')):
+        orm_execute_state.session.info['occupancy_stale'] = True
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_slot_occupancy(session):
+    changes = session.info.pop('occupancy_changes', {})
+    if session.info.pop('occupancy_stale', False):
+        slot_occupancy.mark_stale()
+        return
+    for (screen_id, day, hour), delta in changes.items():
+        slot_occupancy.add(screen_id, day, hour, delta)
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_slot_occupancy(session):
+    session.info.pop('occupancy_changes', None)
+    session.info.pop('occupancy_stale', None)
+
+def dashboard_stats():
+    """Counts and booking totals shown on the index page"""
+    today = date.today()
+    week_monday = pricing.week_start(today)
+    week_sunday = week_monday + timedelta(days=6)
+    month_start = today.replace(day=1)
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+
+    provider_count = db.session.query(func.count(ScreenProvider.id)).scalar()
+    screen_count = db.session.query(func.count(Screen.id)).scalar()
+    plan_count = db.session.query(func.count(DOOHPlan.id)).scalar()
+    active_plan_count = db.session.query(func.count(DOOHPlan.id)).filter(
+        DOOHPlan.start_date <= week_sunday, DOOHPlan.end_date >= week_monday
+    ).scalar()
+    # Screen hours with at least one purchased slot this week
+    booked_slot_hours = db.session.query(func.count(ScreenSlot.id)).filter(
+        ScreenSlot.date.between(week_monday, week_sunday), ScreenSlot.slots_purchased > 0
+    ).scalar()
+    month_revenue = db.session.query(func.coalesce(func.sum(MediaPlanDailyTotal.total_price), 0.0)).filter(
+        MediaPlanDailyTotal.date >= month_start, MediaPlanDailyTotal.date < next_month
+    ).scalar()
+
+    return {
+        'provider_count': provider_count,
+        'screen_count': screen_count,
+        'plan_count': plan_count,
+        'active_plan_count': active_plan_count,
+        'booked_slot_hours': booked_slot_hours,
+        'month_revenue': month_revenue,
+    }
+
+def conditional_json(cache_key, version, build):
+    """JSON response tagged with an ETag for version.
+
+    Answers 304 Not Modified when the client already has this version and
+    reuses the cached payload when another client requested it before.
+    """
+    etag = f'{cache_key}-v{version}'
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        payload = api_response_cache.get(cache_key, version)
+        if payload is None:
+            payload = build()
+            api_response_cache.set(cache_key, version, payload)
+        response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+# Eager-loading profiles: the relationships each view's template walks, loaded up front
+# so rendering a page costs a fixed number of statements however many rows it shows.
+# Backref attributes such as DOOHPlan.campaign only exist once the mappers are configured.
+configure_mappers()
+
+PLAN_LIST_LOADING = (
+    joinedload(DOOHPlan.campaign).joinedload(Campaign.client),
+    selectinload(DOOHPlan.screen_bookings),
+)
+PLAN_DETAIL_LOADING = (
+    joinedload(DOOHPlan.campaign).joinedload(Campaign.client),
+    selectinload(DOOHPlan.screen_bookings).joinedload(ScreenBooking.screen).joinedload(Screen.provider),
+)
+PLAN_SCREENS_LOADING = (
+    selectinload(DOOHPlan.screen_bookings).joinedload(ScreenBooking.screen).joinedload(Screen.provider),
+    selectinload(DOOHPlan.screen_bookings).selectinload(ScreenBooking.screen_slots),
+)
+PLAN_MEDIA_LOADING = (
+    selectinload(DOOHPlan.screen_bookings).joinedload(ScreenBooking.screen).joinedload(Screen.provider),
+)
+CAMPAIGN_LIST_LOADING = (
+    selectinload(Campaign.dooh_plans),
+)
+SCREEN_DETAIL_LOADING = (
+    joinedload(Screen.provider),
+)
+
+def get_or_404(model, id, loading=()):
+    """Like Model.query.get_or_404(), but with an eager-loading profile"""
+    obj = model.query.options(*loading).filter_by(id=id).first()
+    if obj is None:
+        abort(404)
+    return obj
+
+STREAM_CHUNK_SIZE = 16 * 1024
+
+def stream_page(template_name, **context):
+    """Stream a rendered template in chunks of about STREAM_CHUNK_SIZE bytes.
+
+    The browser receives the page head while the body is still being rendered.
+    The template runs after the view has returned, so the view must load
+    everything the template uses up front; a lazy load during streaming would
+    only show up as a slow or broken page after the status was already sent.
+    """
+    pieces = stream_template(template_name, **context)  # binds the request context
+
+    def chunks():
+        buffer = []
+        size = 0
+        for piece in pieces:
+            buffer.append(piece)
+            size += len(piece)
+            if size >= STREAM_CHUNK_SIZE:
+                yield ''.join(buffer)
+                buffer = []
+                size = 0
+        if buffer:
+            yield ''.join(buffer)
+
+    return Response(chunks(), mimetype='text/html')
+
+# Keyset-paginated list queries shared by the list pages and their JSON endpoints
+# Sort options: request value -> (sort columns ending with the primary key, descending)
+SCREEN_SORTS = {
+    '': ((Screen.id,), False),
+    'name-asc': ((Screen.name, Screen.id), False),
+    'name-desc': ((Screen.name, Screen.id), True),
+    'city-asc': ((Screen.city, Screen.id), False),
+    'provider-asc': ((ScreenProvider.name, Screen.id), False),
+}
+PROVIDER_SORTS = {
+    '': ((ScreenProvider.id,), False),
+    'name-asc': ((ScreenProvider.name, ScreenProvider.id), False),
+    'name-desc': ((ScreenProvider.name, ScreenProvider.id), True),
+}
+PLAN_SORTS = {
+    '': ((DOOHPlan.id,), False),
+    'name-asc': ((DOOHPlan.name, DOOHPlan.id), False),
+    'name-desc': ((DOOHPlan.name, DOOHPlan.id), True),
+    'date-desc': ((DOOHPlan.start_date, DOOHPlan.id), True),
+    'date-asc': ((DOOHPlan.start_date, DOOHPlan.id), False),
+}
+CAMPAIGN_SORTS = {
+    '': ((Campaign.id,), False),
+    'name-asc': ((Campaign.name, Campaign.id), False),
+    'name-desc': ((Campaign.name, Campaign.id), True),
+    'client-asc': ((Client.name, Campaign.id), False),
+    'budget-desc': ((func.coalesce(Campaign.budget, 0.0), Campaign.id), True),
+}
+CLIENT_SORTS = {
+    '': ((Client.id,), False),
+    'name-asc': ((Client.name, Client.id), False),
+}
+
+def list_page(query, sorts):
+    """One page of query for the sort, cursor and per_page request arguments"""
+    columns, descending = sorts.get(request.args.get('sort', ''), sorts[''])
+    try:
+        return keyset_page(query, columns, request.args.get('cursor'),
+                           parse_per_page(request.args.get('per_page')), descending)
+    except InvalidCursor as e:
+        abort(400, description=str(e))
+
+def paginated_json(page, serialize):
+    """JSON list of one page; the next page is advertised in the Link and X-Next-Cursor headers"""
+    response = jsonify([serialize(item) for item in page.items])
+    if page.has_next:
+        args = request.args.to_dict()
+        args['cursor'] = page.next_cursor
+        response.headers['X-Next-Cursor'] = page.next_cursor
+        response.headers['Link'] = f'<{url_for(request.endpoint, **request.view_args, **args)}>; rel="next"'
+    return response
+
+def full_or_paginated_json(query, sorts, serialize):
+    """Every row as one JSON list, as before pagination existed, or one page when cursor or per_page is passed"""
+    if 'cursor' in request.args or 'per_page' in request.args:
+        return paginated_json(list_page(query, sorts), serialize)
+    columns, descending = sorts.get(request.args.get('sort', ''), sorts[''])
+    return jsonify([serialize(item) for item in query.order_by(*[c.desc() if descending else c.asc() for c in columns])])
+
+def like(value):
+    return f'%{value}%'
+
+def screen_list_query():
+    """Screens matching the q, type, content_type, city and provider request arguments"""
+    args = request.args
+    query = Screen.query.join(Screen.provider).options(contains_eager(Screen.provider))
+    if args.get('q'):
+        query = query.filter(or_(Screen.name.ilike(like(args['q'])), Screen.city.ilike(like(args['q'])),
+                                 ScreenProvider.name.ilike(like(args['q']))))
+    if args.get('type'):
+        query = query.filter(Screen.screen_type == args['type'])
+    if args.get('content_type'):
+        query = query.filter(Screen.content_type == args['content_type'])
+    if args.get('city'):
+        query = query.filter(Screen.city == args['city'])
+    if args.get('provider', type=int):
+        query = query.filter(Screen.provider_id == args.get('provider', type=int))
+    return query
+
+def provider_list_query():
+    query = ScreenProvider.query
+    if request.args.get('q'):
+        query = query.filter(ScreenProvider.name.ilike(like(request.args['q'])))
+    return query
+
+def plan_list_query():
+    query = DOOHPlan.query.options(*PLAN_LIST_LOADING)
+    if request.args.get('q'):
+        query = query.filter(DOOHPlan.name.ilike(like(request.args['q'])))
+    if request.args.get('campaign', type=int):
+        query = query.filter(DOOHPlan.campaign_id == request.args.get('campaign', type=int))
+    return query
+
+def campaign_list_query():
+    query = Campaign.query.join(Campaign.client).options(contains_eager(Campaign.client), *CAMPAIGN_LIST_LOADING)
+    if request.args.get('q'):
+        query = query.filter(or_(Campaign.name.ilike(like(request.args['q'])), Client.name.ilike(like(request.args['q']))))
+    if request.args.get('client', type=int):
+        query = query.filter(Campaign.client_id == request.args.get('client', type=int))
+    return query
+
+def client_list_query():
+    query = Client.query
+    if request.args.get('q'):
+        query = query.filter(or_(Client.name.ilike(like(request.args['q'])), Client.company.ilike(like(request.args['q']))))
+    return query
+
+def screen_json(screen):
+    return {
+        'id': screen.id,
+        'name': screen.name,
+        'provider_id': screen.provider_id,
+        'provider': screen.provider.name,
+        'screen_type': screen.screen_type,
+        'content_type': screen.content_type,
+        'city': screen.city,
+        'address': screen.address,
+        'gps_latitude': screen.gps_latitude,
+        'gps_longitude': screen.gps_longitude
+    }
+
+def client_json(client):
+    return {
+        'id': client.id,
+        'name': client.name,
+        'company': client.company,
+        'email': client.email,
+        'phone': client.phone,
+        'contact_person': client.contact_person
+    }
+
 # Routes
 @app.route('/')
 def index():
-    providers = ScreenProvider.query.all()
-    dooh_plans = DOOHPlan.query.all()
-    screens = Screen.query.all()
-    return render_template('index.html', providers=providers, dooh_plans=dooh_plans, screens=screens)
+    stats = dashboard_cache.get('index', dashboard_stats)
+    return render_template('index.html', stats=stats)
 
 @app.route('/providers')
 def providers():
-    providers = ScreenProvider.query.all()
-    return render_template('providers.html', providers=providers)
+    page = list_page(provider_list_query(), PROVIDER_SORTS)
+    # Screen counts of the listed providers in one grouped query
+    screen_counts = dict(db.session.query(Screen.provider_id, func.count(Screen.id)).filter(
+        Screen.provider_id.in_([provider.id for provider in page.items])
+    ).group_by(Screen.provider_id).all())
+    return render_template('providers.html', providers=page.items, page=page, screen_counts=screen_counts)
+
+@app.route('/api/providers')
+def api_providers():
+    page = list_page(provider_list_query(), PROVIDER_SORTS)
+    return paginated_json(page, lambda p: {
+        'id': p.id,
+        'name': p.name,
+        'email': p.email,
+        'phone': p.phone,
+        'contact_person': p.contact_person
+    })
 
 @app.route('/provider/new', methods=['GET', 'POST'])
 def new_provider():
@@ -193,8 +842,121 @@ def provider_detail(id):
 
 @app.route('/screens')
 def screens():
-    screens = Screen.query.all()
-    return render_template('screens.html', screens=screens)
+    page = list_page(screen_list_query(), SCREEN_SORTS)
+    cities = [city for city, in db.session.query(Screen.city).distinct().order_by(Screen.city)]
+    providers = db.session.query(ScreenProvider.id, ScreenProvider.name).order_by(ScreenProvider.name).all()
+    return render_template('screens.html', screens=page.items, page=page, cities=cities, providers=providers)
+
+@app.route('/api/screens')
+def api_screens():
+    page = list_page(screen_list_query(), SCREEN_SORTS)
+    return paginated_json(page, screen_json)
+
+def screen_index_json(entry):
+    return {
+        'id': entry['id'],
+        'name': entry['name'],
+        'provider_id': entry['provider_id'],
+        'screen_type': entry['screen_type'],
+        'content_type': entry['content_type'],
+        'city': entry['city'],
+        'address': entry['address'],
+        'gps_latitude': entry['lat'],
+        'gps_longitude': entry['lng']
+    }
+
+def geo_search_args(*names):
+    """Float coordinates plus the shared filters of the geo search endpoints; None on bad input"""
+    try:
+        coords = [float(request.args[name]) for name in names]
+        limit = max(1, min(int(request.args.get('limit', 100)), 1000))
+        provider_id = int(request.args['provider']) if request.args.get('provider') else None
+    except (KeyError, ValueError):
+        return None
+    filters = {
+        'screen_type': request.args.get('type') or None,
+        'content_type': request.args.get('content_type') or None,
+        'provider_id': provider_id,
+    }
+    return coords, limit, filters
+
+@app.route('/api/screens/near')
+def api_screens_near():
+    """Screens within radius_km of lat/lng, nearest first"""
+    parsed = geo_search_args('lat', 'lng')
+    if parsed is None:
+        return jsonify({'error': 'lat and lng are required numbers; limit and provider must be integers'}), 400
+    (lat, lng), limit, filters = parsed
+    try:
+        radius_km = float(request.args.get('radius_km', 5))
+    except ValueError:
+        return jsonify({'error': 'radius_km must be a number'}), 400
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180) or not 0 < radius_km <= 200:
+        return jsonify({'error': 'Coordinates out of range or radius_km not in (0, 200]'}), 400
+
+    found = get_screen_index().near(lat, lng, radius_km, limit=limit, **filters)
+    return jsonify([dict(screen_index_json(entry), distance_km=round(distance, 3)) for distance, entry in found])
+
+@app.route('/api/screens/bbox')
+def api_screens_bbox():
+    """Screens inside a latitude/longitude bounding box, ordered by id"""
+    parsed = geo_search_args('min_lat', 'min_lng', 'max_lat', 'max_lng')
+    if parsed is None:
+        return jsonify({'error': 'min_lat, min_lng, max_lat and max_lng are required numbers; limit and provider must be integers'}), 400
+    (min_lat, min_lng, max_lat, max_lng), limit, filters = parsed
+    if min_lat > max_lat or min_lng > max_lng:
+        return jsonify({'error': 'min_lat/min_lng must not exceed max_lat/max_lng'}), 400
+
+    found = get_screen_index().bbox(min_lat, min_lng, max_lat, max_lng, limit=limit, **filters)
+    return jsonify([screen_index_json(entry) for entry in found])
+
+def parse_hours(value):
+    """Hours from '6-23', '8,9,12-14' or '' (all 24); raises ValueError"""
+    if not value:
+        return list(range(24))
+    hours = set()
+    for part in value.split(','):
+        first, _, last = part.partition('-')
+        hours.update(range(int(first), int(last or first) + 1))
+    if not hours or min(hours) < 0 or max(hours) > 23:
+        raise ValueError(value)
+    return sorted(hours)
+
+@app.route('/api/screens/availability')
+def api_screen_availability():
+    """Screens with at least `slots` free slots in every requested hour of every day from start to end"""
+    try:
+        start = datetime.strptime(request.args['start'], '%Y-%m-%d').date()
+        end = datetime.strptime(request.args.get('end') or request.args['start'], '%Y-%m-%d').date()
+        hours = parse_hours(request.args.get('hours', ''))
+        slots = int(request.args.get('slots', 1))
+        limit = max(1, min(int(request.args.get('limit', 100)), 1000))
+        provider_id = int(request.args['provider']) if request.args.get('provider') else None
+    except (KeyError, ValueError):
+        return jsonify({'error': 'start (and end) must be YYYY-MM-DD dates, hours like 6-23 or 8,9,12-14; '
+                                 'slots, limit and provider must be integers'}), 400
+    if end < start or (end - start).days > 366 or slots < 1:
+        return jsonify({'error': 'end must not be before start, the range is limited to a year and slots must be positive'}), 400
+
+    query = db.session.query(Screen.id, Screen.name, Screen.city, Screen.provider_id).order_by(Screen.id)
+    if provider_id is not None:
+        query = query.filter(Screen.provider_id == provider_id)
+    if request.args.get('city'):
+        query = query.filter(Screen.city == request.args['city'])
+    if request.args.get('type'):
+        query = query.filter(Screen.screen_type == request.args['type'])
+
+    occupancy = get_slot_occupancy()
+    capacity = app.config['SCREEN_HOUR_CAPACITY']
+    found = []
+    for screen_id, name, city, screen_provider_id in query:
+        free = capacity - occupancy.peak(screen_id, start, end, hours)
+        if free >= slots:
+            found.append({'id': screen_id, 'name': name, 'city': city, 'provider_id': screen_provider_id, 'free_slots': free})
+            if len(found) == limit:
+                break
+    return jsonify({'capacity': capacity, 'start': start.isoformat(), 'end': end.isoformat(), 'hours': hours,
+                    'screens': found})
 
 @app.route('/screen/new', methods=['GET', 'POST'])
 def new_screen():
@@ -254,8 +1016,8 @@ def new_screen():
 
 @app.route('/screen/<int:id>')
 def screen_detail(id):
-    screen = Screen.query.get_or_404(id)
-    return render_template('screen_detail.html', screen=screen)
+    screen = get_or_404(Screen, id, SCREEN_DETAIL_LOADING)
+    return render_template('screen_detail.html', screen=screen, pricing_rows=rate_cards.get(id).rows())
 
 @app.route('/screen/<int:id>/pricing', methods=['GET', 'POST'])
 def screen_pricing(id):
@@ -263,7 +1025,7 @@ def screen_pricing(id):
     
     if request.method == 'POST':
         # Clear existing pricing
-        ScreenPricing.query.filter_by(screen_id=id).delete()
+        ScreenPricing.query.filter_by(screen_id=id).execution_options(rate_card_screens=[id]).delete()
         
         # Add new pricing for each hour (6-23 as per template)
         for hour in range(6, 24):
@@ -302,18 +1064,7 @@ def screen_pricing(id):
         return redirect(url_for('screen_detail', id=id))
     
     # Get existing pricing
-    pricing_data = {}
-    for pricing in screen.pricing_hours:
-        pricing_data[pricing.hour] = {
-            'price': pricing.price,
-            'contacts_mon': pricing.contacts_mon,
-            'contacts_tue': pricing.contacts_tue,
-            'contacts_wed': pricing.contacts_wed,
-            'contacts_thu': pricing.contacts_thu,
-            'contacts_fri': pricing.contacts_fri,
-            'contacts_sat': pricing.contacts_sat,
-            'contacts_sun': pricing.contacts_sun
-        }
+    pricing_data = {row['hour']: row for row in rate_cards.get(id).rows()}
     
     return render_template('screen_pricing.html', screen=screen, pricing_data=pricing_data)
 
@@ -322,23 +1073,11 @@ def screen_pricing(id):
 def proxy_campaigns_from_projects():
     """Proxy endpoint to fetch campaigns from projects-crm"""
     try:
-        # Make request to projects-crm using localhost
-        headers = {
-            'X-API-Key': app.config['PROJECTS_CRM_API_KEY']
-        }
-        response = requests.get(
-            f"{app.config['PROJECTS_CRM_URL']}/api/campaigns/for-ekranu",
-            headers=headers,
-            timeout=10
-        )
-
-        if response.status_code == 200:
-            return jsonify(response.json())
-        else:
-            return jsonify({'error': 'Failed to fetch campaigns from Projects CRM'}), response.status_code
-
-    except requests.exceptions.RequestException as e:
+        return jsonify(projects_crm.get_json('/api/campaigns/for-ekranu'))
+    except UpstreamError as e:
         print(f"Error fetching campaigns from projects-crm: {str(e)}")
+        if e.status_code:
+            return jsonify({'error': 'Failed to fetch campaigns from Projects CRM'}), e.status_code
         return jsonify({'error': 'Connection error to Projects CRM'}), 503
     except Exception as e:
         print(f"Unexpected error: {str(e)}")
@@ -348,32 +1087,20 @@ def proxy_campaigns_from_projects():
 def proxy_clients_from_agency():
     """Proxy endpoint to fetch clients from agency-crm"""
     try:
-        # Make request to agency-crm using localhost
-        headers = {
-            'X-API-Key': app.config['AGENCY_CRM_API_KEY']
-        }
-        response = requests.get(
-            f"{app.config['AGENCY_CRM_URL']}/api/brands",
-            headers=headers,
-            timeout=10
-        )
-
-        if response.status_code == 200:
-            data = response.json()
-            # Transform brands to clients format
-            clients = []
-            for brand in data.get('brands', []):
-                clients.append({
-                    'id': brand['id'],
-                    'name': brand['full_name'],
-                    'company': brand['company_name']
-                })
-            return jsonify(clients)
-        else:
-            return jsonify({'error': 'Failed to fetch clients from Agency CRM'}), response.status_code
-
-    except requests.exceptions.RequestException as e:
+        data = agency_crm.get_json('/api/brands')
+        # Transform brands to clients format
+        clients = []
+        for brand in data.get('brands', []):
+            clients.append({
+                'id': brand['id'],
+                'name': brand['full_name'],
+                'company': brand['company_name']
+            })
+        return jsonify(clients)
+    except UpstreamError as e:
         print(f"Error fetching clients from agency-crm: {str(e)}")
+        if e.status_code:
+            return jsonify({'error': 'Failed to fetch clients from Agency CRM'}), e.status_code
         return jsonify({'error': 'Connection error to Agency CRM'}), 503
     except Exception as e:
         print(f"Unexpected error: {str(e)}")
@@ -381,8 +1108,7 @@ def proxy_clients_from_agency():
 
 @app.route('/api/clients')
 def api_clients():
-    clients = Client.query.all()
-    return jsonify([{'id': c.id, 'name': c.name} for c in clients])
+    return full_or_paginated_json(client_list_query(), CLIENT_SORTS, lambda c: {'id': c.id, 'name': c.name})
 
 @app.route('/api/campaigns/<int:client_id>')
 def api_campaigns_by_client(client_id):
@@ -392,16 +1118,25 @@ def api_campaigns_by_client(client_id):
 # API endpoints for screen management in media plans
 @app.route('/api/screens/available/<int:plan_id>')
 def api_available_screens(plan_id):
-    plan = DOOHPlan.query.get_or_404(plan_id)
-    # Get screens that are not already in this plan
-    existing_screen_ids = [booking.screen_id for booking in plan.screen_bookings]
-    available_screens = Screen.query.filter(~Screen.id.in_(existing_screen_ids)).all()
+    plan_version = plan_versions.get(plan_id)
+    if plan_version is None:
+        abort(404)
+    # Screens are only ever added, so their count and highest id identify the screen list
+    screen_count, max_screen_id = db.session.query(func.count(Screen.id), func.max(Screen.id)).one()
     
-    return jsonify([{
-        'id': screen.id,
-        'name': screen.name,
-        'provider_name': screen.provider.name
-    } for screen in available_screens])
+    def build():
+        # Get screens that are not already in this plan
+        existing_screen_ids = select(ScreenBooking.screen_id).where(ScreenBooking.dooh_plan_id == plan_id)
+        available_screens = db.session.query(Screen.id, Screen.name, ScreenProvider.name).join(Screen.provider).filter(
+            Screen.id.not_in(existing_screen_ids)
+        ).order_by(Screen.id)
+        return [{
+            'id': screen_id,
+            'name': name,
+            'provider_name': provider_name
+        } for screen_id, name, provider_name in available_screens]
+    
+    return conditional_json(f'available-screens-{plan_id}', f'{plan_version}.{screen_count}.{max_screen_id}', build)
 
 @app.route('/api/dooh-plan/<int:plan_id>/add-screen', methods=['POST'])
 def api_add_screen_to_plan(plan_id):
@@ -433,16 +1168,237 @@ def api_add_screen_to_plan(plan_id):
     )
     
     db.session.add(new_booking)
+    bump_plan_version(plan_id)
     db.session.commit()
     
     return jsonify({'success': True, 'message': 'Screen added successfully'})
 
+def plan_booking_screens(plan_id):
+    """Map booking_id -> screen_id for every booking of a plan"""
+    return dict(db.session.query(ScreenBooking.id, ScreenBooking.screen_id).filter_by(dooh_plan_id=plan_id).all())
+
+def price_plan_selections(plan, selections, bookings=None):
+    """Price editor selections for a plan with the server-side pricing engine"""
+    if bookings is None:
+        bookings = plan_booking_screens(plan.id)
+    return pricing.price_plan(plan, bookings, rate_cards.get_many(bookings.values()), selections)
+
+def refresh_daily_totals(plan_id=None, screen_dates=None):
+    """Recompute MediaPlanDailyTotal rows from MediaPlanPricing with one DELETE and one INSERT ... SELECT.
+
+    Limited to one plan and, within it, to the given (screen_id, date) pairs
+    when provided; with no arguments every rollup is rebuilt. The reporting
+    cube rows of the same scope are refreshed too. The caller commits.
+    """
+    rollup_filters = []
+    pricing_filters = []
+    if plan_id is not None:
+        rollup_filters.append(MediaPlanDailyTotal.dooh_plan_id == plan_id)
+        pricing_filters.append(MediaPlanPricing.dooh_plan_id == plan_id)
+    if screen_dates is not None:
+        if not screen_dates:
+            return
+        rollup_filters.append(tuple_(MediaPlanDailyTotal.screen_id, MediaPlanDailyTotal.date).in_(screen_dates))
+        pricing_filters.append(tuple_(MediaPlanPricing.screen_id, MediaPlanPricing.date).in_(screen_dates))
+    
+    db.session.execute(
+        delete(MediaPlanDailyTotal).where(*rollup_filters).execution_options(synchronize_session=False)
+    )
+    totals = select(
+        MediaPlanPricing.dooh_plan_id,
+        MediaPlanPricing.screen_id,
+        MediaPlanPricing.date,
+        func.coalesce(func.sum(MediaPlanPricing.calculated_price), 0.0),
+        func.coalesce(func.sum(MediaPlanPricing.contacts), 0.0),
+        func.count(MediaPlanPricing.id),
+    ).where(*pricing_filters).group_by(
+        MediaPlanPricing.dooh_plan_id, MediaPlanPricing.screen_id, MediaPlanPricing.date
+    )
+    db.session.execute(
+        insert(MediaPlanDailyTotal).from_select(
+            ['dooh_plan_id', 'screen_id', 'date', 'total_price', 'total_contacts', 'slot_count'], totals
+        )
+    )
+    refresh_report_cube(plan_id, screen_dates)
+
+def refresh_report_cube(plan_id=None, screen_dates=None):
+    """Recompute ReportDailyFact rows from MediaPlanDailyTotal and the ReportMonthlyFact months they fall in.
+
+    Takes the same scope as refresh_daily_totals(). The caller commits.
+    """
+    fact_filters = []
+    rollup_filters = []
+    month_filters = []
+    if plan_id is not None:
+        fact_filters.append(ReportDailyFact.dooh_plan_id == plan_id)
+        rollup_filters.append(MediaPlanDailyTotal.dooh_plan_id == plan_id)
+        month_filters.append(ReportMonthlyFact.dooh_plan_id == plan_id)
+    months = None
+    if screen_dates is not None:
+        if not screen_dates:
+            return
+        months = {(screen_id, day.replace(day=1)) for screen_id, day in screen_dates}
+        fact_filters.append(tuple_(ReportDailyFact.screen_id, ReportDailyFact.date).in_(screen_dates))
+        rollup_filters.append(tuple_(MediaPlanDailyTotal.screen_id, MediaPlanDailyTotal.date).in_(screen_dates))
+        month_filters.append(tuple_(ReportMonthlyFact.screen_id, ReportMonthlyFact.month).in_(months))
+    
+    db.session.execute(delete(ReportDailyFact).where(*fact_filters).execution_options(synchronize_session=False))
+    rollups = db.session.execute(select(
+        MediaPlanDailyTotal.dooh_plan_id, MediaPlanDailyTotal.screen_id, MediaPlanDailyTotal.date,
+        DOOHPlan.campaign_id, Campaign.client_id, Screen.provider_id, Screen.city,
+        MediaPlanDailyTotal.total_price, MediaPlanDailyTotal.total_contacts, MediaPlanDailyTotal.slot_count
+    ).join(DOOHPlan, DOOHPlan.id == MediaPlanDailyTotal.dooh_plan_id).join(
+        Campaign, Campaign.id == DOOHPlan.campaign_id
+    ).join(Screen, Screen.id == MediaPlanDailyTotal.screen_id).where(*rollup_filters).execution_options(yield_per=1000))
+    facts = ({
+        'dooh_plan_id': row.dooh_plan_id, 'screen_id': row.screen_id, 'date': row.date,
+        'campaign_id': row.campaign_id, 'client_id': row.client_id, 'provider_id': row.provider_id, 'city': row.city,
+        'week_start': pricing.week_start(row.date), 'month': row.date.replace(day=1),
+        'revenue': row.total_price or 0.0, 'contacts': row.total_contacts or 0.0, 'slot_count': row.slot_count or 0,
+    } for row in rollups)
+    for chunk in chunked(facts, 1000):
+        db.session.execute(insert(ReportDailyFact), chunk)
+    
+    # Months are summed from the daily facts again, so they always match them
+    db.session.execute(delete(ReportMonthlyFact).where(*month_filters).execution_options(synchronize_session=False))
+    daily_filters = [ReportDailyFact.dooh_plan_id == plan_id] if plan_id is not None else []
+    if months is not None:
+        daily_filters.append(tuple_(ReportDailyFact.screen_id, ReportDailyFact.month).in_(months))
+    monthly = select(
+        ReportDailyFact.dooh_plan_id, ReportDailyFact.screen_id, ReportDailyFact.month,
+        ReportDailyFact.campaign_id, ReportDailyFact.client_id, ReportDailyFact.provider_id, ReportDailyFact.city,
+        func.sum(ReportDailyFact.revenue), func.sum(ReportDailyFact.contacts), func.sum(ReportDailyFact.slot_count),
+    ).where(*daily_filters).group_by(
+        ReportDailyFact.dooh_plan_id, ReportDailyFact.screen_id, ReportDailyFact.month,
+        ReportDailyFact.campaign_id, ReportDailyFact.client_id, ReportDailyFact.provider_id, ReportDailyFact.city,
+    )
+    db.session.execute(insert(ReportMonthlyFact).from_select(
+        ['dooh_plan_id', 'screen_id', 'month', 'campaign_id', 'client_id', 'provider_id', 'city',
+         'revenue', 'contacts', 'slot_count'], monthly
+    ))
+
+# The cube copies dimension keys from screens, plans and campaigns; keep them in step on edits
+def _changed(obj, *attributes):
+    state = inspect(obj)
+    return any(state.attrs[attribute].history.has_changes() for attribute in attributes)
+
+@event.listens_for(Screen, 'after_update')
+def _rekey_screen_facts(mapper, connection, screen):
+    if _changed(screen, 'provider_id', 'city'):
+        for fact in (ReportDailyFact, ReportMonthlyFact):
+            connection.execute(update(fact).where(fact.screen_id == screen.id).values(
+                provider_id=screen.provider_id, city=screen.city
+            ))
+
+@event.listens_for(DOOHPlan, 'after_update')
+def _rekey_plan_facts(mapper, connection, plan):
+    if _changed(plan, 'campaign_id'):
+        client_id = select(Campaign.client_id).where(Campaign.id == plan.campaign_id).scalar_subquery()
+        for fact in (ReportDailyFact, ReportMonthlyFact):
+            connection.execute(update(fact).where(fact.dooh_plan_id == plan.id).values(
+                campaign_id=plan.campaign_id, client_id=client_id
+            ))
+
+@event.listens_for(Campaign, 'after_update')
+def _rekey_campaign_facts(mapper, connection, campaign):
+    if _changed(campaign, 'client_id'):
+        for fact in (ReportDailyFact, ReportMonthlyFact):
+            connection.execute(update(fact).where(fact.campaign_id == campaign.id).values(client_id=campaign.client_id))
+
+def plan_daily_totals(plan_id, session=None):
+    """Calendar and plan-level totals of a plan, read from the daily rollups"""
+    rows = (session or db.session).query(
+        MediaPlanDailyTotal.screen_id, MediaPlanDailyTotal.date, MediaPlanDailyTotal.total_price,
+        MediaPlanDailyTotal.total_contacts, MediaPlanDailyTotal.slot_count
+    ).filter_by(dooh_plan_id=plan_id).all()
+    
+    daily_totals = {}
+    daily_screen_totals = {}
+    total_price = total_contacts = 0.0
+    total_slots = 0
+    for row in rows:
+        date_str = row.date.strftime('%Y-%m-%d')
+        daily_totals[date_str] = daily_totals.get(date_str, 0.0) + row.total_price
+        daily_screen_totals.setdefault(row.screen_id, {})[date_str] = row.total_price
+        total_price += row.total_price
+        total_contacts += row.total_contacts
+        total_slots += row.slot_count
+    
+    return {
+        'daily_totals': daily_totals,
+        'daily_screen_totals': daily_screen_totals,
+        'total_price': total_price,
+        'total_contacts': total_contacts,
+        'total_slots': total_slots,
+        'cpt': total_price / total_slots if total_slots else 0.0,
+    }
+
+def write_media_plan_pricing(plan, bookings, selections, result):
+    """Replace saved pricing of every booking week in selections with set-based statements.
+
+    Returns the number of saved rows per booking week key. The caller commits.
+    """
+    targets = set()
+    for key in selections:
+        booking_id, week_number = pricing.parse_booking_key(key)
+        targets.add((bookings[booking_id], week_number))
+    if not targets:
+        return {}
+    
+    # One DELETE for all replaced (screen, week) pairs, one executemany INSERT for the new rows
+    db.session.execute(
+        delete(MediaPlanPricing)
+        .where(MediaPlanPricing.dooh_plan_id == plan.id)
+        .where(tuple_(MediaPlanPricing.screen_id, MediaPlanPricing.week_number).in_(targets))
+        .execution_options(synchronize_session=False)
+    )
+    
+    rows = []
+    saved_counts = dict.fromkeys(selections, 0)
+    for key, week in result['weeks'].items():
+        booking_id, week_number = pricing.parse_booking_key(key)
+        for hour_day, cell in week['cells'].items():
+            hour, day_name = hour_day.split('_')
+            rows.append({
+                'dooh_plan_id': plan.id,
+                'screen_id': bookings[booking_id],
+                'week_number': week_number,
+                'hour': int(hour),
+                'date': datetime.strptime(cell['date'], '%Y-%m-%d').date(),
+                'day_name': day_name,
+                'selected_value': cell['selected_value'],
+                'calculated_price': cell['calculated_price'],
+                'contacts': cell['contacts'],
+            })
+        saved_counts[key] = len(week['cells'])
+    if rows:
+        db.session.execute(insert(MediaPlanPricing), rows)
+    
+    # Keep the daily rollups of every day in the replaced weeks in step
+    week_dates = {}
+    for _, week_number in targets:
+        monday = pricing.week_start(plan.start_date) + timedelta(weeks=week_number - 1)
+        week_dates[week_number] = [monday + timedelta(days=i) for i in range(7)]
+    refresh_daily_totals(plan.id, {
+        (screen_id, day) for screen_id, week_number in targets for day in week_dates[week_number]
+    })
+    bump_plan_version(plan.id)
+    return saved_counts
+
+@app.route('/api/media-plan-pricing/<int:plan_id>/calculate', methods=['POST'])
+def calculate_media_plan_pricing(plan_id):
+    """Price selected values for any number of bookings and weeks without saving"""
+    plan = DOOHPlan.query.get_or_404(plan_id)
+    data = request.get_json() or {}
+    try:
+        result = price_plan_selections(plan, data.get('selections', {}))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return jsonify({'success': True, **result})
+
 @app.route('/api/media-plan-pricing/save', methods=['POST'])
 def save_media_plan_pricing():
-    """Save calculated prices from media plan"""
-    print("=== MEDIA PLAN PRICING SAVE API CALLED ===")
-    print(f"Request method: {request.method}")
-    print(f"Request URL: {request.url}")
+    """Save media plan selections, pricing them on the server"""
     try:
         data = request.get_json()
         dooh_plan_id = data.get('dooh_plan_id')
@@ -450,7 +1406,7 @@ def save_media_plan_pricing():
         week_number = data.get('week_number')
         pricing_data = data.get('pricing_data', [])  # List of pricing records
         
-        print(f"Saving pricing - Plan: {dooh_plan_id}, Screen: {screen_id}, Week: {week_number}, Records: {len(pricing_data)}")
+        app.logger.debug(f"Saving pricing - Plan: {dooh_plan_id}, Screen: {screen_id}, Week: {week_number}, Records: {len(pricing_data)}")
         
         if not all([dooh_plan_id, screen_id, week_number]):
             return jsonify({'success': False, 'message': 'Missing required parameters'}), 400
@@ -461,115 +1417,485 @@ def save_media_plan_pricing():
         if not plan or not screen:
             return jsonify({'success': False, 'message': 'Plan or screen not found'}), 404
         
-        # Delete existing pricing data for this plan/screen/week combination
-        MediaPlanPricing.query.filter_by(
-            dooh_plan_id=dooh_plan_id,
-            screen_id=screen_id,
-            week_number=week_number
-        ).delete()
+        bookings = plan_booking_screens(dooh_plan_id)
+        booking_id = next((b for b, s_id in bookings.items() if s_id == screen.id), None)
+        if booking_id is None:
+            return jsonify({'success': False, 'message': 'Screen is not part of this plan'}), 404
         
-        # Insert new pricing data
-        saved_count = 0
-        for pricing_item in pricing_data:
-            if pricing_item.get('selected_value', 0) > 0:  # Only save non-zero values
-                pricing = MediaPlanPricing(
-                    dooh_plan_id=dooh_plan_id,
-                    screen_id=screen_id,
-                    week_number=week_number,
-                    hour=pricing_item['hour'],
-                    date=datetime.strptime(pricing_item['date'], '%Y-%m-%d').date(),
-                    day_name=pricing_item['day_name'],
-                    selected_value=pricing_item['selected_value'],
-                    calculated_price=pricing_item['calculated_price'],
-                    contacts=pricing_item['contacts']
-                )
-                db.session.add(pricing)
-                saved_count += 1
+        # Prices, contacts and dates come from the rate card, not from the client
+        booking_key = f"{booking_id}_w{week_number}"
+        selections = {booking_key: {
+            f"{item['hour']}_{item['day_name']}": item.get('selected_value', 0) for item in pricing_data
+        }}
+        try:
+            result = price_plan_selections(plan, selections, bookings)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
+        week = result['weeks'].get(booking_key) or pricing.empty_week()
+        
+        # Replace existing pricing data for this plan/screen/week combination
+        with write_queue.transaction(db.session):
+            saved_count = write_media_plan_pricing(plan, bookings, selections, result)[booking_key]
         
-        db.session.commit()
         return jsonify({
             'success': True, 
             'message': f'Saved {saved_count} pricing records',
-            'saved_count': saved_count
+            'saved_count': saved_count,
+            'pricing': week
         })
         
+    except sqlite_tuning.WriteQueueTimeout as e:
+        return jsonify({'success': False, 'message': str(e)}), 503
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/media-plan-pricing/<int:plan_id>/save', methods=['POST'])
+def save_media_plan_pricing_batch(plan_id):
+    """Save selections for any number of bookings and weeks of a plan in one transaction"""
+    plan = DOOHPlan.query.get_or_404(plan_id)
+    data = request.get_json() or {}
+    if not isinstance(data, dict):
+        return jsonify({'success': False, 'message': 'Expected a JSON object with selections'}), 400
+    selections = data.get('selections', {})
+    
+    try:
+        bookings = plan_booking_screens(plan_id)
+        result = price_plan_selections(plan, selections, bookings)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    try:
+        with write_queue.transaction(db.session):
+            saved_counts = write_media_plan_pricing(plan, bookings, selections, result)
+    except sqlite_tuning.WriteQueueTimeout as e:
+        return jsonify({'success': False, 'message': str(e)}), 503
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 500
+    
+    booking_counts = {}
+    for key, count in saved_counts.items():
+        booking_id = pricing.parse_booking_key(key)[0]
+        booking_counts[booking_id] = booking_counts.get(booking_id, 0) + count
+    
+    saved_count = sum(saved_counts.values())
+    return jsonify({
+        'success': True,
+        'message': f'Saved {saved_count} pricing records for {len(booking_counts)} bookings',
+        'saved_count': saved_count,
+        'saved_counts': saved_counts,
+        'booking_counts': booking_counts,
+        'weeks': {key: result['weeks'].get(key) or pricing.empty_week() for key in selections},
+        'total_price': result['total_price'],
+        'total_slots': result['total_slots'],
+        'cpt': result['cpt']
+    })
+
+# Bulk edits of a plan's pricing grid or broadcast schedule. Each operation deletes the
+# target cells and rebuilds them with one INSERT ... SELECT, either from existing cells
+# (copies) or from target days x hours x bookings (fills), so replicating a pattern over
+# a whole plan is one request instead of an editor save per booking week.
+BULK_OPERATIONS = ('copy_week', 'copy_booking', 'fill', 'clear')
+BULK_REFRESH_PAIRS = 1000  # Above this many (screen, date) pairs the whole plan's rollups are rebuilt
+
+def parse_bulk_edit(plan, data, booking_ids, default_hours):
+    """Validate a bulk edit request; raises ValueError with a message for the client.
+    
+    Returns the operation, target booking_ids, (source_date, date) pairs of
+    the target days, hours (None for whole days), value and source booking.
+    first_week and last_week limit the target days to those plan weeks.
+    """
+    operation = data.get('operation')
+    if operation not in BULK_OPERATIONS:
+        raise ValueError(f"operation must be one of {', '.join(BULK_OPERATIONS)}")
+    try:
+        targets = {int(b) for b in data['booking_ids']} if data.get('booking_ids') is not None else set(booking_ids)
+        start = datetime.strptime(data['start'], '%Y-%m-%d').date() if data.get('start') else plan.start_date
+        end = datetime.strptime(data['end'], '%Y-%m-%d').date() if data.get('end') else plan.end_date
+        hours = parse_hours(data['hours']) if data.get('hours') else list(default_hours)
+        source_booking_id = int(data['source_booking_id']) if operation == 'copy_booking' else None
+        source_week = int(data['source_week']) if operation == 'copy_week' else None
+        first_week = int(data.get('first_week') or 1)
+        last_week = int(data.get('last_week') or pricing.count_weeks(plan.start_date, plan.end_date))
+        value = int(data['value']) if operation == 'fill' else None
+    except (KeyError, TypeError, ValueError):
+        raise ValueError('booking_ids must be a list of ids, start and end YYYY-MM-DD dates, hours like 6-23; '
+                         'copy_week needs source_week, copy_booking source_booking_id and fill a value')
+    
+    unknown = (targets | {source_booking_id} - {None}) - set(booking_ids)
+    if unknown:
+        raise ValueError(f'Booking {min(unknown)} is not part of this plan')
+    day_names = data.get('days') or pricing.DAY_NAMES
+    if any(day_name not in pricing.DAY_NAMES for day_name in day_names):
+        raise ValueError(f"days must be among {', '.join(pricing.DAY_NAMES)}")
+    if value is not None and value <= 0:
+        raise ValueError('fill needs a positive value; use clear to remove cells')
+    
+    num_weeks = pricing.count_weeks(plan.start_date, plan.end_date)
+    if not 1 <= first_week <= last_week <= num_weeks or (source_week is not None and not 1 <= source_week <= num_weeks):
+        raise ValueError(f'Weeks must be between 1 and {num_weeks}')
+    start_monday = pricing.week_start(plan.start_date)
+    start = max(start, plan.start_date, start_monday + timedelta(days=(first_week - 1) * 7))
+    end = min(end, plan.end_date, start_monday + timedelta(days=last_week * 7 - 1))
+    if operation == 'copy_week':
+        # Same weekday of the source week, for every target day that has one inside the plan
+        days = []
+        for week_number in range(first_week, last_week + 1):
+            if week_number == source_week:
+                continue
+            for i in range(7):
+                source_day = start_monday + timedelta(days=(source_week - 1) * 7 + i)
+                day = start_monday + timedelta(days=(week_number - 1) * 7 + i)
+                if plan.start_date <= source_day <= plan.end_date and plan.start_date <= day <= plan.end_date:
+                    days.append((source_day, day))
+        hours = None
+    else:
+        days = [(start + timedelta(days=i),) * 2 for i in range((end - start).days + 1)]
+        if operation == 'copy_booking':
+            targets.discard(source_booking_id)
+            hours = None
+        else:
+            days = [pair for pair in days if pricing.DAY_NAMES[pair[1].weekday()] in day_names]
+    
+    return {'operation': operation, 'booking_ids': sorted(targets), 'days': days, 'hours': hours,
+            'value': value, 'source_booking_id': source_booking_id}
+
+def bulk_days_table(plan, days):
+    """VALUES CTE of (source_date, date) pairs with the plan week and day name of each date"""
+    start_monday = pricing.week_start(plan.start_date)
+    return values(
+        column('source_date', db.Date), column('date', db.Date), column('week_number', db.Integer),
+        column('day_name', db.String), name='bulk_days'
+    ).data([
+        (source_day, day, (day - start_monday).days // 7 + 1, pricing.DAY_NAMES[day.weekday()])
+        for source_day, day in days
+    ]).cte('bulk_days')
+
+def bulk_hours_table(hours):
+    return values(column('hour', db.Integer), name='bulk_hours').data([(hour,) for hour in hours]).cte('bulk_hours')
+
+def rate_card_contacts(day_name):
+    """Contacts of a ScreenPricing row on the weekday in day_name; 0 when missing, like RateCard.contacts_at()"""
+    return func.coalesce(case(*[
+        (day_name == name, getattr(ScreenPricing, f'contacts_{name}')) for name in pricing.DAY_NAMES
+    ]), 0.0)
+
+def rate_card_price(contacts, selected_value):
+    """pricing.compute_prices() as a SQL expression"""
+    return case(
+        (and_(contacts > 0, selected_value > 0), contacts * 1 * (contacts * selected_value / 30 * 2)),
+        else_=0.0,
+    )
+
+def bulk_pricing_cells(plan, bookings, edit):
+    """Select of the new (screen_id, week_number, hour, date, day_name, selected_value) cells, None for clear"""
+    days = bulk_days_table(plan, edit['days'])
+    targets = ScreenBooking.id.in_(edit['booking_ids'])
+    if edit['operation'] == 'copy_week':
+        return select(
+            MediaPlanPricing.screen_id, days.c.week_number, MediaPlanPricing.hour, days.c.date, days.c.day_name,
+            MediaPlanPricing.selected_value
+        ).join(days, days.c.source_date == MediaPlanPricing.date).where(
+            MediaPlanPricing.dooh_plan_id == plan.id,
+            MediaPlanPricing.screen_id.in_([bookings[b] for b in edit['booking_ids']]),
+            MediaPlanPricing.selected_value > 0,
+        )
+    if edit['operation'] == 'copy_booking':
+        return select(
+            ScreenBooking.screen_id, days.c.week_number, MediaPlanPricing.hour, days.c.date, days.c.day_name,
+            MediaPlanPricing.selected_value
+        ).select_from(MediaPlanPricing).join(days, days.c.source_date == MediaPlanPricing.date).join(
+            ScreenBooking, targets
+        ).where(
+            MediaPlanPricing.dooh_plan_id == plan.id,
+            MediaPlanPricing.screen_id == bookings[edit['source_booking_id']],
+            MediaPlanPricing.selected_value > 0,
+        )
+    if edit['operation'] == 'fill':
+        hours = bulk_hours_table(edit['hours'])
+        return select(
+            ScreenBooking.screen_id, days.c.week_number, hours.c.hour, days.c.date, days.c.day_name,
+            literal(edit['value']).label('selected_value')
+        ).select_from(days.join(hours, true()).join(ScreenBooking, targets))
+    return None
+
+def bulk_edit_media_plan_pricing(plan, bookings, edit):
+    """Apply a parse_bulk_edit() result to MediaPlanPricing, pricing new cells from the rate cards in SQL.
+    
+    Returns (deleted, inserted) row counts. The caller commits.
+    """
+    screens = {bookings[booking_id] for booking_id in edit['booking_ids']}
+    dates = sorted({day for _, day in edit['days']})
+    if not screens or not dates:
+        return 0, 0
+    
+    filters = [MediaPlanPricing.dooh_plan_id == plan.id, MediaPlanPricing.screen_id.in_(screens),
+               MediaPlanPricing.date.in_(dates)]
+    if edit['hours'] is not None:
+        filters.append(MediaPlanPricing.hour.in_(edit['hours']))
+    deleted = db.session.execute(
+        delete(MediaPlanPricing).where(*filters).execution_options(synchronize_session=False)
+    ).rowcount
+    
+    inserted = 0
+    cells = bulk_pricing_cells(plan, bookings, edit)
+    if cells is not None:
+        # Priced with the contacts of each cell's weekday on the screen's rate card
+        cells = cells.subquery('cells')
+        contacts = rate_card_contacts(cells.c.day_name)
+        price = rate_card_price(contacts, cells.c.selected_value)
+        now = datetime.utcnow()
+        priced = select(
+            literal(plan.id), cells.c.screen_id, cells.c.week_number, cells.c.hour, cells.c.date, cells.c.day_name,
+            cells.c.selected_value, price, contacts, literal(now), literal(now)
+        ).select_from(cells).outerjoin(
+            ScreenPricing, and_(ScreenPricing.screen_id == cells.c.screen_id, ScreenPricing.hour == cells.c.hour)
+        )
+        db.session.execute(insert(MediaPlanPricing).from_select(
+            ['dooh_plan_id', 'screen_id', 'week_number', 'hour', 'date', 'day_name', 'selected_value',
+             'calculated_price', 'contacts', 'created_at', 'updated_at'], priced
+        ))
+        # sqlite3 reports no rowcount for statements starting with WITH
+        inserted = db.session.query(func.count(MediaPlanPricing.id)).filter(*filters).scalar()
+    
+    screen_dates = {(screen_id, day) for screen_id in screens for day in dates}
+    refresh_daily_totals(plan.id, screen_dates if len(screen_dates) <= BULK_REFRESH_PAIRS else None)
+    bump_plan_version(plan.id)
+    return deleted, inserted
+
+@app.route('/api/media-plan-pricing/<int:plan_id>/bulk', methods=['POST'])
+def bulk_edit_media_plan_pricing_api(plan_id):
+    """Copy a week or a booking's pattern, or fill or clear a range of the pricing grid, on the server"""
+    plan = DOOHPlan.query.get_or_404(plan_id)
+    bookings = plan_booking_screens(plan_id)
+    try:
+        edit = parse_bulk_edit(plan, request.get_json() or {}, bookings, pricing.PLAN_HOURS)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    try:
+        with write_queue.transaction(db.session):
+            deleted, inserted = bulk_edit_media_plan_pricing(plan, bookings, edit)
+    except sqlite_tuning.WriteQueueTimeout as e:
+        return jsonify({'success': False, 'message': str(e)}), 503
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 500
+    
+    return jsonify({'success': True, 'message': f'Replaced {deleted} pricing records with {inserted}',
+                    'operation': edit['operation'], 'deleted': deleted, 'inserted': inserted})
 
 @app.route('/api/media-plan-pricing/<int:plan_id>')
 def get_media_plan_pricing(plan_id):
     """Get saved pricing data and calculate daily totals for calendar display"""
+    version = plan_versions.get(plan_id)
+    if version is None:
+        abort(404)
     try:
-        plan = DOOHPlan.query.get_or_404(plan_id)
-        
-        # Get all saved pricing data for this plan
-        pricing_data = MediaPlanPricing.query.filter_by(dooh_plan_id=plan_id).all()
-        
-        # Calculate daily totals (total for all screens)
-        daily_totals = {}
-        # Calculate daily totals per screen
-        daily_screen_totals = {}
-        for pricing in pricing_data:
-            date_str = pricing.date.strftime('%Y-%m-%d')
-            screen_id = pricing.screen_id
-
-            # Overall daily total
-            if date_str not in daily_totals:
-                daily_totals[date_str] = 0
-            daily_totals[date_str] += pricing.calculated_price
-
-            # Per-screen daily total
-            if screen_id not in daily_screen_totals:
-                daily_screen_totals[screen_id] = {}
-            if date_str not in daily_screen_totals[screen_id]:
-                daily_screen_totals[screen_id][date_str] = 0
-            daily_screen_totals[screen_id][date_str] += pricing.calculated_price
-        
-        # Get saved pricing by booking/week for form population
-        # First, we need to map screen_ids to booking_ids
-        bookings = ScreenBooking.query.filter_by(dooh_plan_id=plan_id).all()
-        screen_to_booking_map = {}
-        for booking in bookings:
-            screen_to_booking_map[booking.screen_id] = booking.id
-        
-        saved_pricing = {}
-        for pricing in pricing_data:
-            # Use booking_id instead of screen_id for the key
-            booking_id = screen_to_booking_map.get(pricing.screen_id)
-            if booking_id:
-                key = f"{booking_id}_w{pricing.week_number}"
-                if key not in saved_pricing:
-                    saved_pricing[key] = {}
-                
-                hour_key = f"{pricing.hour}_{pricing.day_name}"
-                saved_pricing[key][hour_key] = {
-                    'selected_value': pricing.selected_value,
-                    'calculated_price': pricing.calculated_price,
-                    'contacts': pricing.contacts,
-                    'date': pricing.date.strftime('%Y-%m-%d')
-                }
-        
-        return jsonify({
-            'success': True,
-            'daily_totals': daily_totals,
-            'daily_screen_totals': daily_screen_totals,
-            'saved_pricing': saved_pricing
-        })
-        
+        return conditional_json(f'media-plan-pricing-{plan_id}', version, lambda: build_media_plan_pricing(plan_id))
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
+def build_media_plan_pricing(plan_id):
+    """Saved pricing by booking week plus daily totals of a plan"""
+    with Session(read_engine) as session:
+        return media_plan_pricing_json(session, plan_id)
+
+def media_plan_pricing_json(session, plan_id):
+    """build_media_plan_pricing() on an open session"""
+    # Get all saved pricing data for this plan
+    pricing_data = session.query(MediaPlanPricing).filter_by(dooh_plan_id=plan_id).all()
+    
+    # Daily totals (all screens and per screen) come from the rollup table
+    totals = plan_daily_totals(plan_id, session)
+    
+    # Get saved pricing by booking/week for form population
+    # First, we need to map screen_ids to booking_ids
+    bookings = session.query(ScreenBooking).filter_by(dooh_plan_id=plan_id).all()
+    screen_to_booking_map = {}
+    for booking in bookings:
+        screen_to_booking_map[booking.screen_id] = booking.id
+    
+    saved_pricing = {}
+    for pricing_row in pricing_data:
+        # Use booking_id instead of screen_id for the key
+        booking_id = screen_to_booking_map.get(pricing_row.screen_id)
+        if booking_id:
+            key = f"{booking_id}_w{pricing_row.week_number}"
+            if key not in saved_pricing:
+                saved_pricing[key] = {}
+            
+            hour_key = f"{pricing_row.hour}_{pricing_row.day_name}"
+            saved_pricing[key][hour_key] = {
+                'selected_value': pricing_row.selected_value,
+                'calculated_price': pricing_row.calculated_price,
+                'contacts': pricing_row.contacts,
+                'date': pricing_row.date.strftime('%Y-%m-%d')
+            }
+    
+    return {
+        'success': True,
+        'daily_totals': totals['daily_totals'],
+        'daily_screen_totals': totals['daily_screen_totals'],
+        'saved_pricing': saved_pricing
+    }
+
+@app.route('/api/media-plan-pricing/<int:plan_id>/totals')
+def get_media_plan_totals(plan_id):
+    """Calendar and plan-level totals without the per-cell pricing data"""
+    version = plan_versions.get(plan_id)
+    if version is None:
+        abort(404)
+    
+    def build():
+        with Session(read_engine) as session:
+            return {'success': True, **plan_daily_totals(plan_id, session)}
+    
+    return conditional_json(f'media-plan-totals-{plan_id}', version, build)
+
+# Reports from the cube: group_by name -> (fact column, model whose name labels the key)
+REPORT_DIMENSIONS = {
+    'client': ('client_id', Client),
+    'campaign': ('campaign_id', Campaign),
+    'plan': ('dooh_plan_id', DOOHPlan),
+    'provider': ('provider_id', ScreenProvider),
+    'screen': ('screen_id', Screen),
+    'city': ('city', None),
+    'week': ('week_start', None),
+    'month': ('month', None),
+}
+
+def report_json(group_by, row):
+    result = {}
+    for name, value in zip(group_by, row):
+        if name == 'month':
+            result[name] = value.strftime('%Y-%m')
+        elif name == 'week':
+            result[name] = value.isoformat()
+        elif REPORT_DIMENSIONS[name][1] is not None:
+            result[f'{name}_id'] = value
+        else:
+            result[name] = value
+    revenue, contacts, slot_count = row[len(group_by):]
+    result.update({
+        'revenue': round(revenue or 0.0, 2),
+        'contacts': round(contacts or 0.0, 3),
+        'slot_count': slot_count or 0,
+        'cpt': round(revenue / slot_count, 2) if slot_count else 0.0,
+    })
+    return result
+
+@app.route('/api/reports')
+def api_report():
+    """Revenue, contacts and purchased hours from the reporting cube, grouped by ?group_by=provider,month etc.
+
+    Filters: start/end dates (YYYY-MM-DD) and comma-separated client, campaign,
+    plan, provider and screen ids, plus city. Ranges of whole months without
+    week grouping are read from the monthly facts.
+    """
+    group_by = [name for name in request.args.get('group_by', '').split(',') if name]
+    if any(name not in REPORT_DIMENSIONS for name in group_by) or len(set(group_by)) != len(group_by):
+        return jsonify({'error': f"group_by must be a comma-separated list of {', '.join(REPORT_DIMENSIONS)}"}), 400
+    try:
+        start = datetime.strptime(request.args['start'], '%Y-%m-%d').date() if request.args.get('start') else None
+        end = datetime.strptime(request.args['end'], '%Y-%m-%d').date() if request.args.get('end') else None
+        id_filters = {
+            name: [int(value) for value in request.args[name].split(',')]
+            for name in ('client', 'campaign', 'plan', 'provider', 'screen') if request.args.get(name)
+        }
+    except ValueError:
+        return jsonify({'error': 'start and end must be YYYY-MM-DD dates and id filters comma-separated integers'}), 400
+    
+    monthly = ('week' not in group_by and (start is None or start.day == 1)
+               and (end is None or (end + timedelta(days=1)).day == 1))
+    fact = ReportMonthlyFact if monthly else ReportDailyFact
+    period = fact.month if monthly else fact.date
+    columns = [getattr(fact, REPORT_DIMENSIONS[name][0]) for name in group_by]
+    query = select(*columns, func.sum(fact.revenue), func.sum(fact.contacts), func.sum(fact.slot_count))
+    if start:
+        query = query.where(period >= start)
+    if end:
+        query = query.where(period <= end)
+    for name, ids in id_filters.items():
+        query = query.where(getattr(fact, REPORT_DIMENSIONS[name][0]).in_(ids))
+    if request.args.get('city'):
+        query = query.where(fact.city == request.args['city'])
+    if columns:
+        query = query.group_by(*columns).order_by(*columns)
+    
+    with Session(read_engine) as session:
+        rows = session.execute(query).all()
+        if not columns and rows and rows[0][-1] is None:
+            rows = []
+        report = [report_json(group_by, row) for row in rows]
+        # Names of the id dimensions, one query per dimension
+        for position, name in enumerate(group_by):
+            model = REPORT_DIMENSIONS[name][1]
+            ids = {row[position] for row in rows}
+            if model is None or not ids:
+                continue
+            names = dict(session.query(model.id, model.name).filter(model.id.in_(ids)))
+            for entry in report:
+                entry[name] = names.get(entry[f'{name}_id'])
+    
+    revenue = sum(entry['revenue'] for entry in report)
+    slot_count = sum(entry['slot_count'] for entry in report)
+    return jsonify({
+        'group_by': group_by,
+        'source': 'monthly' if monthly else 'daily',
+        'rows': report,
+        'totals': {
+            'revenue': round(revenue, 2),
+            'contacts': round(sum(entry['contacts'] for entry in report), 3),
+            'slot_count': slot_count,
+            'cpt': round(revenue / slot_count, 2) if slot_count else 0.0,
+        },
+    })
+
 # DOOH Plan routes
 @app.route('/dooh-plans')
 def dooh_plans():
-    plans = DOOHPlan.query.all()
-    return render_template('dooh_plans.html', plans=plans)
+    page = list_page(plan_list_query(), PLAN_SORTS)
+    return render_template('dooh_plans.html', plans=page.items, page=page)
+
+@app.route('/api/dooh-plans')
+def api_dooh_plans():
+    page = list_page(plan_list_query(), PLAN_SORTS)
+    return paginated_json(page, lambda plan: {
+        'id': plan.id,
+        'name': plan.name,
+        'campaign_id': plan.campaign_id,
+        'start_date': plan.start_date.isoformat(),
+        'end_date': plan.end_date.isoformat()
+    })
 
 @app.route('/campaigns')
 def campaigns():
-    campaigns = Campaign.query.all()
-    return render_template('campaigns.html', campaigns=campaigns)
+    page = list_page(campaign_list_query(), CAMPAIGN_SORTS)
+    clients = db.session.query(Client.id, Client.name).order_by(Client.name).all()
+    # Summary statistics over all campaigns, not just the current page
+    total_count, active_count, total_budget = db.session.query(
+        func.count(Campaign.id),
+        func.count(case((Campaign.start_date.isnot(None) & Campaign.end_date.isnot(None), 1))),
+        func.coalesce(func.sum(Campaign.budget), 0.0)
+    ).one()
+    return render_template('campaigns.html', campaigns=page.items, page=page, clients=clients,
+                           total_count=total_count, active_count=active_count, total_budget=total_budget)
+
+@app.route('/api/campaigns')
+def api_campaigns_list():
+    page = list_page(campaign_list_query(), CAMPAIGN_SORTS)
+    return paginated_json(page, lambda campaign: {
+        'id': campaign.id,
+        'name': campaign.name,
+        'client_id': campaign.client_id,
+        'client': campaign.client.name,
+        'description': campaign.description,
+        'start_date': campaign.start_date.isoformat() if campaign.start_date else None,
+        'end_date': campaign.end_date.isoformat() if campaign.end_date else None,
+        'budget': campaign.budget
+    })
 
 @app.route('/api/campaigns/<int:client_id>')
 def api_campaigns(client_id):
@@ -674,15 +2000,28 @@ def new_dooh_plan():
 
 @app.route('/dooh-plan/<int:id>')
 def dooh_plan_detail(id):
-    plan = DOOHPlan.query.get_or_404(id)
+    plan = get_or_404(DOOHPlan, id, PLAN_DETAIL_LOADING)
     return render_template('dooh_plan_detail.html', plan=plan)
 
 @app.route('/dooh-plan/<int:id>/screens')
 def dooh_plan_screens(id):
     from datetime import timedelta
-    plan = DOOHPlan.query.get_or_404(id)
-    screens = Screen.query.all()
-    return render_template('dooh_plan_screens.html', plan=plan, screens=screens, timedelta=timedelta)
+    plan = get_or_404(DOOHPlan, id, PLAN_SCREENS_LOADING)
+    screens = Screen.query.options(joinedload(Screen.provider)).all()
+    bookings = plan.screen_bookings
+    
+    # Build each booking's day x hour grid once so the template only indexes into it
+    slot_grids = {}
+    for booking in bookings:
+        grid = booking.slot_grid(plan.start_date, plan.end_date)
+        slot_grids[booking.id] = {
+            'days': grid,
+            'hour_totals': [sum(hour_counts) for hour_counts in zip(*grid)],
+        }
+    selected_screen_ids = {booking.screen_id for booking in bookings}
+    
+    return stream_page('dooh_plan_screens.html', plan=plan, screens=screens, timedelta=timedelta,
+                       slot_grids=slot_grids, selected_screen_ids=selected_screen_ids)
 
 @app.route('/dooh-plan/<int:plan_id>/add-screen/<int:screen_id>', methods=['POST'])
 def add_screen_to_plan(plan_id, screen_id):
@@ -697,54 +2036,111 @@ def add_screen_to_plan(plan_id, screen_id):
     
     booking = ScreenBooking(dooh_plan_id=plan_id, screen_id=screen_id)
     db.session.add(booking)
+    bump_plan_version(plan_id)
     db.session.commit()
     flash(f'Ekranas "{screen.name}" pridėtas į planą!')
     return redirect(url_for('dooh_plan_detail', id=plan_id))
 
+def load_slot_index(booking_ids):
+    """Load existing ScreenSlot rows of the bookings as {(booking_id, date, hour): (id, slots_purchased)}"""
+    if not booking_ids:
+        return {}
+    rows = db.session.query(
+        ScreenSlot.id, ScreenSlot.booking_id, ScreenSlot.date, ScreenSlot.hour, ScreenSlot.slots_purchased
+    ).filter(ScreenSlot.booking_id.in_(booking_ids)).all()
+    return {(r.booking_id, r.date, r.hour): (r.id, r.slots_purchased or 0) for r in rows}
+
+def slot_capacity_conflicts(occupancy_changes, capacity):
+    """Like OccupancyIndex.conflicts(), but read from ScreenSlot after the changes were written"""
+    increases = {cell: delta for cell, delta in occupancy_changes.items() if delta > 0}
+    if not increases:
+        return []
+    days = [day for _, day, _ in increases]
+    totals = db.session.execute(select(
+        ScreenBooking.screen_id, ScreenSlot.date, ScreenSlot.hour, func.sum(ScreenSlot.slots_purchased)
+    ).join(ScreenSlot.booking).where(
+        ScreenBooking.screen_id.in_({screen_id for screen_id, _, _ in increases}),
+        ScreenSlot.date.between(min(days), max(days))
+    ).group_by(ScreenBooking.screen_id, ScreenSlot.date, ScreenSlot.hour).having(
+        func.sum(ScreenSlot.slots_purchased) > capacity
+    ))
+    return sorted((screen_id, day, hour, total - increases[(screen_id, day, hour)], increases[(screen_id, day, hour)])
+                  for screen_id, day, hour, total in totals if (screen_id, day, hour) in increases)
+
+def apply_slot_changes(desired):
+    """Diff desired {(booking_id, date, hour): slots_purchased} against the database and write only changes.
+
+    New non-zero cells are inserted and changed cells updated, each with one
+    bulk statement; a saved cell set to 0 keeps its row with 0 slots. Raises
+    SlotCapacityError when an increase would overbook a screen hour across
+    all plans: first from the occupancy index, before writing anything, and
+    again in SQL after the writes, since the index of this process may miss
+    other workers' saves. The caller's transaction must roll back on it. The
+    caller commits.
+    """
+    booking_ids = {booking_id for booking_id, _, _ in desired}
+    existing = load_slot_index(booking_ids)
+    booking_screens = dict(
+        db.session.query(ScreenBooking.id, ScreenBooking.screen_id).filter(ScreenBooking.id.in_(booking_ids))
+    ) if booking_ids else {}
+    
+    to_insert = []
+    to_update = []
+    occupancy_changes = {}  # (screen_id, date, hour) -> change in booked slots
+    for (booking_id, slot_date, hour), slots_purchased in desired.items():
+        current = existing.get((booking_id, slot_date, hour))
+        if current is None:
+            if slots_purchased > 0:
+                to_insert.append({'booking_id': booking_id, 'date': slot_date, 'hour': hour, 'slots_purchased': slots_purchased})
+        elif slots_purchased != current[1]:
+            to_update.append({'id': current[0], 'slots_purchased': slots_purchased})
+        delta = slots_purchased - (current[1] if current else 0)
+        if delta:
+            cell = (booking_screens[booking_id], slot_date, hour)
+            occupancy_changes[cell] = occupancy_changes.get(cell, 0) + delta
+    
+    capacity = app.config['SCREEN_HOUR_CAPACITY']
+    conflicts = get_slot_occupancy().conflicts(occupancy_changes, capacity)
+    if conflicts:
+        raise SlotCapacityError(conflicts, capacity)
+    
+    if to_insert:
+        db.session.execute(insert(ScreenSlot).execution_options(occupancy_queued=True), to_insert)
+    if to_update:
+        db.session.execute(update(ScreenSlot).execution_options(occupancy_queued=True), to_update)
+    conflicts = slot_capacity_conflicts(occupancy_changes, capacity)
+    if conflicts:
+        raise SlotCapacityError(conflicts, capacity)
+    queued = db.session.info.setdefault('occupancy_changes', {})
+    for cell, delta in occupancy_changes.items():
+        queued[cell] = queued.get(cell, 0) + delta
+    return {'inserted': len(to_insert), 'updated': len(to_update)}
+
 @app.route('/dooh-plan/<int:plan_id>/update-broadcast-schedule', methods=['POST'])
 def update_broadcast_schedule(plan_id):
-    from datetime import datetime, timedelta
+    from datetime import timedelta
     plan = DOOHPlan.query.get_or_404(plan_id)
+    booking_ids = [booking_id for booking_id, in db.session.query(ScreenBooking.id).filter_by(dooh_plan_id=plan_id)]
     
-    # Process form data for each booking
-    for booking in plan.screen_bookings:
-        current_date = plan.start_date
-        
-        while current_date <= plan.end_date:
+    # Collect the submitted state of every booking/day/hour cell
+    desired = {}
+    current_date = plan.start_date
+    while current_date <= plan.end_date:
+        date_str = current_date.strftime('%Y-%m-%d')
+        for booking_id in booking_ids:
             for hour in range(24):
-                # Get the form field name
-                field_name = f"slot_{booking.id}_{current_date.strftime('%Y-%m-%d')}_{hour}"
-                slots_purchased = request.form.get(field_name, '0')
-                
+                slots_purchased = request.form.get(f"slot_{booking_id}_{date_str}_{hour}", '0')
                 try:
                     slots_purchased = int(slots_purchased) if slots_purchased else 0
                 except ValueError:
                     slots_purchased = 0
-                
-                # Find existing slot or create new one
-                existing_slot = ScreenSlot.query.filter_by(
-                    booking_id=booking.id,
-                    date=current_date,
-                    hour=hour
-                ).first()
-                
-                if existing_slot:
-                    existing_slot.slots_purchased = slots_purchased
-                else:
-                    # Only create slot if slots_purchased > 0
-                    if slots_purchased > 0:
-                        slot = ScreenSlot(
-                            booking_id=booking.id,
-                            date=current_date,
-                            hour=hour,
-                            slots_purchased=slots_purchased
-                        )
-                        db.session.add(slot)
-                
-            current_date += timedelta(days=1)
+                desired[(booking_id, current_date, hour)] = slots_purchased
+        current_date += timedelta(days=1)
     
     try:
-        db.session.commit()
+        with write_queue.transaction(db.session):
+            apply_slot_changes(desired)
+            bump_plan_version(plan_id)
         flash('Transliacijų planas sėkmingai išsaugotas!', 'success')
     except Exception as e:
         db.session.rollback()
@@ -752,53 +2148,525 @@ def update_broadcast_schedule(plan_id):
 
     return redirect(url_for('dooh_plan_detail', id=plan_id))
 
-@app.route('/dooh-plan/<int:id>/media-plan')
-def dooh_plan_media(id):
-    from datetime import timedelta
-    import math
+@app.route('/api/dooh-plan/<int:plan_id>/broadcast-schedule', methods=['POST'])
+def api_update_broadcast_schedule(plan_id):
+    """Save only the changed broadcast schedule cells of a plan"""
+    plan = DOOHPlan.query.get_or_404(plan_id)
+    data = request.get_json() or {}
+    booking_ids = {booking_id for booking_id, in db.session.query(ScreenBooking.id).filter_by(dooh_plan_id=plan_id)}
     
-    plan = DOOHPlan.query.get_or_404(id)
+    desired = {}
+    for change in data.get('changes', []):
+        try:
+            booking_id = int(change['booking_id'])
+            slot_date = datetime.strptime(change['date'], '%Y-%m-%d').date()
+            hour = int(change['hour'])
+            slots_purchased = int(change.get('slots_purchased') or 0)
+        except (KeyError, TypeError, ValueError):
+            return jsonify({'success': False, 'message': f'Invalid change: {change}'}), 400
+        if booking_id not in booking_ids:
+            return jsonify({'success': False, 'message': f'Booking {booking_id} is not part of this plan'}), 400
+        if not plan.start_date <= slot_date <= plan.end_date or not 0 <= hour < 24 or slots_purchased < 0:
+            return jsonify({'success': False, 'message': f'Invalid change: {change}'}), 400
+        desired[(booking_id, slot_date, hour)] = slots_purchased
     
-    # Get all bookings for this plan
-    from sqlalchemy.orm import joinedload
-    bookings = ScreenBooking.query.filter_by(dooh_plan_id=id).options(joinedload(ScreenBooking.screen)).all()
+    try:
+        with write_queue.transaction(db.session):
+            counts = apply_slot_changes(desired)
+            bump_plan_version(plan_id)
+    except SlotCapacityError as e:
+        return jsonify({'success': False, 'message': str(e), 'conflicts': e.to_json()}), 409
+    except sqlite_tuning.WriteQueueTimeout as e:
+        return jsonify({'success': False, 'message': str(e)}), 503
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 500
     
-    # Calculate number of weeks based on actual calendar weeks spanned
-    def get_week_number(date):
-        # Get the Monday of the week containing this date
-        days_since_monday = date.weekday()  # Monday = 0, Sunday = 6
-        monday = date - timedelta(days=days_since_monday)
-        return monday
+    return jsonify({'success': True, **counts})
+
+def bulk_slot_cells(plan, edit):
+    """Select of the new (booking_id, date, hour, slots_purchased) cells, None for clear"""
+    days = bulk_days_table(plan, edit['days'])
+    targets = ScreenBooking.id.in_(edit['booking_ids'])
+    if edit['operation'] == 'copy_week':
+        return select(ScreenSlot.booking_id, days.c.date, ScreenSlot.hour, ScreenSlot.slots_purchased).join(
+            days, days.c.source_date == ScreenSlot.date
+        ).where(ScreenSlot.booking_id.in_(edit['booking_ids']), ScreenSlot.slots_purchased > 0)
+    if edit['operation'] == 'copy_booking':
+        return select(ScreenBooking.id, days.c.date, ScreenSlot.hour, ScreenSlot.slots_purchased).select_from(
+            ScreenSlot
+        ).join(days, days.c.source_date == ScreenSlot.date).join(ScreenBooking, targets).where(
+            ScreenSlot.booking_id == edit['source_booking_id'], ScreenSlot.slots_purchased > 0
+        )
+    if edit['operation'] == 'fill':
+        hours = bulk_hours_table(edit['hours'])
+        return select(ScreenBooking.id, days.c.date, hours.c.hour, literal(edit['value'])).select_from(
+            days.join(hours, true()).join(ScreenBooking, targets)
+        )
+    return None
+
+def bulk_edit_screen_slots(plan, bookings, edit):
+    """Apply a parse_bulk_edit() result to ScreenSlot.
     
-    start_monday = get_week_number(plan.start_date)
-    end_monday = get_week_number(plan.end_date)
+    Raises SlotCapacityError when the new cells overbook a screen hour
+    across all plans; the check runs in SQL after the writes, so the caller's
+    transaction must roll back on it. Returns (deleted, inserted) row counts.
+    """
+    dates = sorted({day for _, day in edit['days']})
+    if not edit['booking_ids'] or not dates:
+        return 0, 0
     
-    # Calculate number of weeks by counting Mondays between start and end
-    weeks_diff = (end_monday - start_monday).days // 7
-    num_weeks = weeks_diff + 1  # +1 because we include both start and end weeks
+    # Bulk writes without occupancy_queued mark the occupancy index stale; it reloads after commit
+    filters = [ScreenSlot.booking_id.in_(edit['booking_ids']), ScreenSlot.date.in_(dates)]
+    if edit['hours'] is not None:
+        filters.append(ScreenSlot.hour.in_(edit['hours']))
+    deleted = db.session.execute(delete(ScreenSlot).where(*filters).execution_options(synchronize_session=False)).rowcount
     
-    # Calculate total days for template
-    total_days = (plan.end_date - plan.start_date).days + 1
+    inserted = 0
+    cells = bulk_slot_cells(plan, edit)
+    if cells is not None:
+        db.session.execute(insert(ScreenSlot).from_select(['booking_id', 'date', 'hour', 'slots_purchased'], cells))
+        inserted = db.session.query(func.count(ScreenSlot.id)).filter(*filters).scalar()
+        capacity = app.config['SCREEN_HOUR_CAPACITY']
+        other_plans = case((ScreenBooking.dooh_plan_id != plan.id, ScreenSlot.slots_purchased), else_=0)
+        conflicts = db.session.execute(select(
+            ScreenBooking.screen_id, ScreenSlot.date, ScreenSlot.hour,
+            func.sum(other_plans), func.sum(ScreenSlot.slots_purchased) - func.sum(other_plans)
+        ).join(ScreenSlot.booking).where(
+            ScreenBooking.screen_id.in_({bookings[booking_id] for booking_id in edit['booking_ids']}),
+            ScreenSlot.date.in_(dates), *filters[2:]
+        ).group_by(ScreenBooking.screen_id, ScreenSlot.date, ScreenSlot.hour).having(
+            func.sum(ScreenSlot.slots_purchased) > capacity
+        ).order_by(ScreenBooking.screen_id, ScreenSlot.date, ScreenSlot.hour)).all()
+        if conflicts:
+            raise SlotCapacityError([tuple(row) for row in conflicts], capacity)
     
-    # Calculate which days are active for each week
+    bump_plan_version(plan.id)
+    return deleted, inserted
+
+@app.route('/api/dooh-plan/<int:plan_id>/broadcast-schedule/bulk', methods=['POST'])
+def api_bulk_edit_broadcast_schedule(plan_id):
+    """Copy a week or a booking's schedule, or fill or clear a range of it, on the server"""
+    plan = DOOHPlan.query.get_or_404(plan_id)
+    bookings = plan_booking_screens(plan_id)
+    try:
+        edit = parse_bulk_edit(plan, request.get_json() or {}, bookings, range(24))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    try:
+        with write_queue.transaction(db.session):
+            deleted, inserted = bulk_edit_screen_slots(plan, bookings, edit)
+    except SlotCapacityError as e:
+        return jsonify({'success': False, 'message': str(e), 'conflicts': e.to_json()}), 409
+    except sqlite_tuning.WriteQueueTimeout as e:
+        return jsonify({'success': False, 'message': str(e)}), 503
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'message': str(e)}), 500
+    
+    return jsonify({'success': True, 'operation': edit['operation'], 'deleted': deleted, 'inserted': inserted})
+
+def media_plan_week_days(plan):
+    """Per calendar week of a plan, which weekdays fall inside the plan and their dates"""
+    start_monday = pricing.week_start(plan.start_date)
     week_days = []
-    for week_num in range(1, num_weeks + 1):
+    for week_num in range(1, pricing.count_weeks(plan.start_date, plan.end_date) + 1):
         week_monday = start_monday + timedelta(days=(week_num - 1) * 7)
-        week_sunday = week_monday + timedelta(days=6)
         
         # Check which days of this week fall within the plan date range
         active_days = {}
-        day_names = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
-        
-        for i, day_name in enumerate(day_names):
+        for i, day_name in enumerate(pricing.DAY_NAMES):
             current_day = week_monday + timedelta(days=i)
             active_days[day_name] = (plan.start_date <= current_day <= plan.end_date)
             active_days[f'{day_name}_date'] = current_day
-        
         week_days.append(active_days)
+    return week_days
+
+def media_plan_week_pricing(plan, bookings, week_num):
+    """Saved selections of one plan week, priced per booking for the editor grids"""
+    booking_by_screen = {booking.screen_id: booking.id for booking in bookings}
+    selections = {f'{booking.id}_w{week_num}': {} for booking in bookings}
+    rows = db.session.query(
+        MediaPlanPricing.screen_id, MediaPlanPricing.hour, MediaPlanPricing.day_name, MediaPlanPricing.selected_value
+    ).filter_by(dooh_plan_id=plan.id, week_number=week_num)
+    for row in rows:
+        booking_id = booking_by_screen.get(row.screen_id)
+        if booking_id is not None:
+            selections[f'{booking_id}_w{week_num}'][f'{row.hour}_{row.day_name}'] = row.selected_value
+    
+    weeks = price_plan_selections(plan, selections, {booking.id: booking.screen_id for booking in bookings})['weeks']
+    return {booking.id: weeks.get(f'{booking.id}_w{week_num}') or pricing.empty_week() for booking in bookings}
+
+def media_plan_week_context(plan, week_days, week_num):
+    """Template variables of the editor grids of one week"""
+    bookings = plan.screen_bookings
+    return {
+        'week_num': week_num,
+        'week_data': week_days[week_num - 1],
+        'week_pricing': media_plan_week_pricing(plan, bookings, week_num),
+        'rate_cards': rate_cards.get_many(booking.screen_id for booking in bookings),
+    }
+
+@app.route('/dooh-plan/<int:id>/media-plan')
+def dooh_plan_media(id):
+    plan = get_or_404(DOOHPlan, id, PLAN_MEDIA_LOADING)
+    
+    # Only the selected week's grids are rendered; the page fetches other weeks on demand
+    week_days = media_plan_week_days(plan)
+    num_weeks = len(week_days)
+    week_num = max(1, min(request.args.get('week', 1, type=int), num_weeks))
+    
+    # Calculate total days for template
+    total_days = (plan.end_date - plan.start_date).days + 1
+    
+    return stream_page('dooh_media_plan.html', plan=plan, timedelta=timedelta,
+                       total_days=total_days, num_weeks=num_weeks, week_days=week_days,
+                       bookings=plan.screen_bookings, **media_plan_week_context(plan, week_days, week_num))
+
+@app.route('/dooh-plan/<int:id>/media-plan/week/<int:week_num>')
+def dooh_plan_media_week(id, week_num):
+    """HTML fragment with one week's editor grids for every booking of the plan"""
+    plan = get_or_404(DOOHPlan, id, PLAN_MEDIA_LOADING)
+    week_days = media_plan_week_days(plan)
+    if not 1 <= week_num <= len(week_days):
+        abort(404)
+    return render_template('_media_plan_week_cards.html', bookings=plan.screen_bookings,
+                           **media_plan_week_context(plan, week_days, week_num))
+
+# Plan exports: each builder returns (header, statement) with the rows in download order
+EXPORT_BATCH_SIZE = 1000
+
+def plan_schedule_export(plan_id):
+    """One row per booked broadcast schedule cell"""
+    header = ['screen_id', 'screen', 'city', 'date', 'hour', 'slots']
+    statement = select(
+        Screen.id, Screen.name, Screen.city, ScreenSlot.date, ScreenSlot.hour, ScreenSlot.slots_purchased
+    ).join_from(ScreenSlot, ScreenBooking, ScreenSlot.booking_id == ScreenBooking.id).join(
+        Screen, Screen.id == ScreenBooking.screen_id
+    ).where(
+        ScreenBooking.dooh_plan_id == plan_id, ScreenSlot.slots_purchased > 0
+    ).order_by(ScreenBooking.id, ScreenSlot.date, ScreenSlot.hour)
+    return header, statement
+
+def plan_media_export(plan_id):
+    """One row per saved media plan pricing cell"""
+    header = ['screen_id', 'screen', 'city', 'week', 'date', 'day', 'hour', 'selected_value', 'price', 'contacts']
+    statement = select(
+        Screen.id, Screen.name, Screen.city, MediaPlanPricing.week_number, MediaPlanPricing.date,
+        MediaPlanPricing.day_name, MediaPlanPricing.hour, MediaPlanPricing.selected_value,
+        MediaPlanPricing.calculated_price, MediaPlanPricing.contacts
+    ).join(Screen, Screen.id == MediaPlanPricing.screen_id).where(
+        MediaPlanPricing.dooh_plan_id == plan_id
+    ).order_by(MediaPlanPricing.screen_id, MediaPlanPricing.date, MediaPlanPricing.hour)
+    return header, statement
+
+def plan_daily_export(plan_id):
+    """Per screen and day: broadcast slots and media plan totals"""
+    header = ['screen_id', 'screen', 'city', 'date', 'slots', 'slot_hours', 'priced_hours', 'price', 'contacts']
+    slot_days = select(
+        ScreenBooking.screen_id.label('screen_id'), ScreenSlot.date.label('date'),
+        func.sum(ScreenSlot.slots_purchased).label('slots'), func.count(ScreenSlot.id).label('hours')
+    ).join_from(ScreenSlot, ScreenBooking, ScreenSlot.booking_id == ScreenBooking.id).where(
+        ScreenBooking.dooh_plan_id == plan_id, ScreenSlot.slots_purchased > 0
+    ).group_by(ScreenBooking.screen_id, ScreenSlot.date).cte('slot_days')
+    days = union(
+        select(slot_days.c.screen_id, slot_days.c.date),
+        select(MediaPlanDailyTotal.screen_id, MediaPlanDailyTotal.date).where(MediaPlanDailyTotal.dooh_plan_id == plan_id),
+    ).subquery('days')
+    statement = select(
+        days.c.screen_id, Screen.name, Screen.city, days.c.date,
+        func.coalesce(slot_days.c.slots, 0), func.coalesce(slot_days.c.hours, 0),
+        func.coalesce(MediaPlanDailyTotal.slot_count, 0), func.coalesce(MediaPlanDailyTotal.total_price, 0.0),
+        func.coalesce(MediaPlanDailyTotal.total_contacts, 0.0)
+    ).select_from(days).join(Screen, Screen.id == days.c.screen_id).outerjoin(
+        slot_days, and_(slot_days.c.screen_id == days.c.screen_id, slot_days.c.date == days.c.date)
+    ).outerjoin(MediaPlanDailyTotal, and_(
+        MediaPlanDailyTotal.dooh_plan_id == plan_id, MediaPlanDailyTotal.screen_id == days.c.screen_id,
+        MediaPlanDailyTotal.date == days.c.date
+    )).order_by(days.c.screen_id, days.c.date)
+    return header, statement
+
+def plan_screens_export(plan_id):
+    """One summary row per booked screen"""
+    header = ['screen_id', 'screen', 'city', 'address', 'provider', 'slots', 'slot_hours', 'priced_hours',
+              'price', 'contacts', 'cpt']
+    slot_totals = select(
+        ScreenSlot.booking_id, func.sum(ScreenSlot.slots_purchased).label('slots'), func.count(ScreenSlot.id).label('hours')
+    ).join_from(ScreenSlot, ScreenBooking, ScreenSlot.booking_id == ScreenBooking.id).where(
+        ScreenBooking.dooh_plan_id == plan_id, ScreenSlot.slots_purchased > 0
+    ).group_by(ScreenSlot.booking_id).subquery()
+    priced = select(
+        MediaPlanDailyTotal.screen_id, func.sum(MediaPlanDailyTotal.slot_count).label('hours'),
+        func.sum(MediaPlanDailyTotal.total_price).label('price'), func.sum(MediaPlanDailyTotal.total_contacts).label('contacts')
+    ).where(MediaPlanDailyTotal.dooh_plan_id == plan_id).group_by(MediaPlanDailyTotal.screen_id).subquery()
+    statement = select(
+        Screen.id, Screen.name, Screen.city, Screen.address, ScreenProvider.name,
+        func.coalesce(slot_totals.c.slots, 0), func.coalesce(slot_totals.c.hours, 0), func.coalesce(priced.c.hours, 0),
+        func.coalesce(priced.c.price, 0.0), func.coalesce(priced.c.contacts, 0.0),
+        case((priced.c.hours > 0, priced.c.price / priced.c.hours), else_=0.0)
+    ).select_from(ScreenBooking).join(Screen, Screen.id == ScreenBooking.screen_id).join(
+        ScreenProvider, ScreenProvider.id == Screen.provider_id
+    ).outerjoin(slot_totals, slot_totals.c.booking_id == ScreenBooking.id).outerjoin(
+        priced, priced.c.screen_id == ScreenBooking.screen_id
+    ).where(ScreenBooking.dooh_plan_id == plan_id).order_by(Screen.id)
+    return header, statement
+
+PLAN_EXPORTS = {
+    'schedule': plan_schedule_export,
+    'media-plan': plan_media_export,
+    'daily': plan_daily_export,
+    'screens': plan_screens_export,
+}
+
+def export_rows(statement):
+    """Rows of statement fetched EXPORT_BATCH_SIZE at a time on a read-only connection"""
+    with Session(read_engine) as session:
+        yield from session.execute(statement.execution_options(yield_per=EXPORT_BATCH_SIZE))
+
+def plan_export_filename(plan, kind, fmt):
+    return f"{secure_filename(plan.name) or f'plan-{plan.id}'}-{kind}.{fmt}"
+
+@app.route('/dooh-plan/<int:id>/export/<kind>.<fmt>')
+def export_dooh_plan(id, kind, fmt):
+    """Download a plan's schedule, media plan, daily totals or screen summary as CSV or XLSX"""
+    plan = DOOHPlan.query.get_or_404(id)
+    build = PLAN_EXPORTS.get(kind)
+    if build is None:
+        abort(404)
+    try:
+        export_files.check_format(fmt)
+    except export_files.ExportFormatError as e:
+        return jsonify({'error': str(e)}), 400
     
-    return render_template('dooh_media_plan.html', plan=plan, timedelta=timedelta, 
-                         total_days=total_days, num_weeks=num_weeks, week_days=week_days, bookings=bookings)
+    header, statement = build(plan.id)
+    chunks = export_files.spreadsheet_chunks(fmt, header, export_rows(statement), title=kind)
+    filename = plan_export_filename(plan, kind, fmt)
+    return Response(stream_with_context(chunks), content_type=export_files.EXPORT_FORMATS[fmt],
+                    headers={'Content-Disposition': f'attachment; filename="{filename}"'})
+
+# Set-based import helpers
+def chunked(items, size):
+    """Yield lists of up to size items from an iterable"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def bulk_upsert(model, key_columns, records, chunk_size=None):
+    """Insert or update records chunk by chunk, matching rows on key_columns.
+
+    ``records`` yields (key, insert_values, update_values) tuples where key is a
+    tuple of key_columns values, or None to always insert. Each chunk looks up
+    its keys with one IN query, inserts the new rows in bulk and updates the
+    matched ones by primary key. A key repeated in the payload updates the row
+    created by its first occurrence. Returns (imported_count, updated_count);
+    the caller commits.
+    """
+    chunk_size = chunk_size or app.config['IMPORT_CHUNK_SIZE']
+    columns = [getattr(model, name) for name in key_columns]
+    imported_count = 0
+    updated_count = 0
+
+    for chunk in chunked(records, chunk_size):
+        keys = {key for key, _, _ in chunk if key is not None}
+        existing = {}
+        if keys:
+            if len(columns) == 1:
+                condition = columns[0].in_([key[0] for key in keys])
+            else:
+                condition = tuple_(*columns).in_(keys)
+            # Descending ids so the oldest row wins when a key matches several
+            for row in db.session.execute(select(model.id, *columns).where(condition).order_by(model.id.desc())):
+                existing[tuple(row[1:])] = row[0]
+
+        new_rows = []
+        new_by_key = {}
+        updates = {}
+        for key, insert_values, update_values in chunk:
+            if key is not None and key in existing:
+                updates.setdefault(existing[key], {'id': existing[key]}).update(update_values)
+                updated_count += 1
+            elif key is not None and key in new_by_key:
+                new_by_key[key].update(update_values)
+                updated_count += 1
+            else:
+                row = dict(insert_values)
+                if key is not None:
+                    new_by_key[key] = row
+                new_rows.append(row)
+                imported_count += 1
+
+        if new_rows:
+            db.session.execute(insert(model), new_rows)
+        update_rows = [values for values in updates.values() if len(values) > 1]
+        if update_rows:
+            db.session.execute(update(model), update_rows)
+
+    return imported_count, updated_count
+
+def import_rate_cards(rows, replace=False, chunk_size=None):
+    """Apply rate-card rows from rate_card_files.read_rate_card_rows() to ScreenPricing.
+
+    Each chunk checks its screen ids with one query, loads the existing
+    (screen_id, hour) rows with another, then inserts new hours and updates
+    changed ones in bulk and commits, so a large file never holds one long
+    write transaction. Unchanged hours are not written. With ``replace`` the
+    hours of the imported screens that are missing from the file are deleted
+    at the end. Returns {'screens': {screen_id: counts and errors}, 'errors':
+    rows without a readable screen_id}; an unknown screen is reported once.
+    """
+    chunk_size = chunk_size or app.config['IMPORT_CHUNK_SIZE']
+    value_columns = rate_card_files.VALUE_COLUMNS
+    screens = {}
+    errors = []
+    known_screens = {}  # screen_id -> exists
+    file_hours = {}  # screen_id -> hours present in the file
+
+    def screen_result(screen_id):
+        result = screens.get(screen_id)
+        if result is None:
+            result = screens[screen_id] = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0, 'rejected': 0,
+                                           'errors': []}
+        return result
+
+    for chunk in chunked(rows, chunk_size):
+        unchecked = {screen_id for _, screen_id, record, _ in chunk if record} - known_screens.keys()
+        if unchecked:
+            found = set(db.session.scalars(select(Screen.id).where(Screen.id.in_(unchecked))))
+            known_screens.update((screen_id, screen_id in found) for screen_id in unchecked)
+
+        records = {}
+        for line, screen_id, record, error in chunk:
+            if screen_id is None:
+                errors.append({'line': line, 'message': error})
+                continue
+            if error is None and not known_screens[screen_id]:
+                result = screen_result(screen_id)
+                if not result['rejected']:
+                    result['errors'].append({'line': line, 'message': f'Screen {screen_id} does not exist'})
+                result['rejected'] += 1
+                continue
+            if error is not None:
+                result = screen_result(screen_id)
+                result['errors'].append({'line': line, 'message': error})
+                result['rejected'] += 1
+                continue
+            # A (screen, hour) repeated in the file keeps its last row
+            records[(screen_id, record['hour'])] = record
+            file_hours.setdefault(screen_id, set()).add(record['hour'])
+        if not records:
+            continue
+
+        existing = {}
+        for row in db.session.execute(
+            select(ScreenPricing.id, ScreenPricing.screen_id, ScreenPricing.hour, *[getattr(ScreenPricing, c) for c in value_columns])
+            .where(tuple_(ScreenPricing.screen_id, ScreenPricing.hour).in_(records.keys()))
+        ):
+            existing[(row.screen_id, row.hour)] = row
+
+        new_rows = []
+        changed_rows = []
+        for key, record in records.items():
+            result = screen_result(key[0])
+            row = existing.get(key)
+            if row is None:
+                new_rows.append(record)
+                result['inserted'] += 1
+            elif any(getattr(row, column) != record[column] for column in value_columns):
+                changed_rows.append(dict(record, id=row.id))
+                result['updated'] += 1
+            else:
+                result['unchanged'] += 1
+
+        changed_screens = {row['screen_id'] for row in new_rows + changed_rows}
+        if new_rows:
+            db.session.execute(insert(ScreenPricing).execution_options(rate_card_screens=changed_screens), new_rows)
+        if changed_rows:
+            db.session.execute(update(ScreenPricing).execution_options(rate_card_screens=changed_screens), changed_rows)
+        db.session.commit()
+
+    if replace:
+        for chunk in chunked(file_hours.items(), chunk_size):
+            hours_by_screen = dict(chunk)
+            stale = [
+                (row_id, screen_id) for row_id, screen_id, hour in db.session.execute(
+                    select(ScreenPricing.id, ScreenPricing.screen_id, ScreenPricing.hour)
+                    .where(ScreenPricing.screen_id.in_(hours_by_screen.keys()))
+                )
+                if hour not in hours_by_screen[screen_id]
+            ]
+            if not stale:
+                continue
+            for _, screen_id in stale:
+                screens[screen_id]['deleted'] += 1
+            db.session.execute(
+                delete(ScreenPricing).where(ScreenPricing.id.in_([row_id for row_id, _ in stale]))
+                .execution_options(rate_card_screens={screen_id for _, screen_id in stale})
+            )
+            db.session.commit()
+
+    return {'screens': screens, 'errors': errors}
+
+def rate_card_import_summary(report):
+    totals = dict.fromkeys(('inserted', 'updated', 'unchanged', 'deleted', 'rejected'), 0)
+    for result in report['screens'].values():
+        for name in totals:
+            totals[name] += result[name]
+    totals['rejected'] += len(report['errors'])
+    return totals
+
+def brand_records(brands):
+    """bulk_upsert() records of the active brands of an agency-crm payload"""
+    for brand_data in brands:
+        # Only process active brands
+        if brand_data.get('status') != 'active':
+            continue
+
+        # Brands sent with an external_id are matched to existing clients by company + name
+        key = None
+        if 'external_id' in brand_data:
+            key = (brand_data.get('company', ''), brand_data['name'])
+
+        new_client = {
+            'name': brand_data['name'],
+            'email': brand_data.get('email', ''),
+            'phone': brand_data.get('phone', ''),
+            'contact_person': brand_data.get('contact_person', ''),
+            'company': brand_data.get('company', '')
+        }
+        # Fields missing from the payload keep their current value
+        changes = {field: brand_data[field] for field in ('email', 'phone', 'contact_person') if field in brand_data}
+        yield key, new_client, changes
+
+def kampanija_records(kampanijos):
+    """bulk_upsert() records of a projects-crm kampanijos payload"""
+    for kampanija_data in kampanijos:
+        # Match existing kampanijos by external_id
+        key = None
+        if kampanija_data.get('external_id') is not None:
+            key = (kampanija_data['external_id'],)
+
+        changes = {
+            'name': kampanija_data['name'],
+            'client_brand_name': kampanija_data.get('client_brand_name'),
+            'campaign_name': kampanija_data.get('campaign_name')
+        }
+        new_kampanija = dict(
+            changes,
+            external_id=kampanija_data.get('external_id'),
+            source_system=kampanija_data.get('source_system', 'projects-crm')
+        )
+        yield key, new_kampanija, changes
+
+def wants_async():
+    """The client asked for a background job with ?async=1 or a Prefer: respond-async header"""
+    return (request.args.get('async', '').lower() in ('1', 'true', 'yes')
+            or 'respond-async' in request.headers.get('Prefer', ''))
 
 # API Routes
 @app.route('/api/import-brands', methods=['POST'])
@@ -813,44 +2681,10 @@ def import_brands():
         data = request.get_json()
         if not data or 'brands' not in data:
             return jsonify({'error': 'No brands data provided'}), 400
-        
-        imported_count = 0
-        updated_count = 0
-
-        for brand_data in data['brands']:
-            # Only process active brands
-            if brand_data.get('status') != 'active':
-                continue
+        if wants_async():
+            return job_accepted(job_runner.submit('import_brands', brands=data['brands']))
 
-            # Check if client already exists (by external_id or name+company)
-            existing_client = None
-
-            # First try to find by external_id if provided
-            if 'external_id' in brand_data:
-                # We'll store external_id in the company field with a special prefix
-                existing_client = Client.query.filter_by(
-                    company=brand_data.get('company', ''),
-                    name=brand_data['name']
-                ).first()
-
-            if existing_client:
-                # Update existing client
-                existing_client.email = brand_data.get('email', existing_client.email)
-                existing_client.phone = brand_data.get('phone', existing_client.phone)
-                existing_client.contact_person = brand_data.get('contact_person', existing_client.contact_person)
-                updated_count += 1
-            else:
-                # Create new client
-                new_client = Client(
-                    name=brand_data['name'],
-                    email=brand_data.get('email', ''),
-                    phone=brand_data.get('phone', ''),
-                    contact_person=brand_data.get('contact_person', ''),
-                    company=brand_data.get('company', '')
-                )
-                db.session.add(new_client)
-                imported_count += 1
-        
+        imported_count, updated_count = bulk_upsert(Client, ('company', 'name'), brand_records(data['brands']))
         db.session.commit()
         
         return jsonify({
@@ -872,15 +2706,8 @@ def get_api_clients():
     if not api_key or api_key != 'ekranu-crm-api-key':
         return jsonify({'error': 'Invalid API key'}), 401
     
-    clients = Client.query.all()
-    return jsonify([{
-        'id': client.id,
-        'name': client.name,
-        'company': client.company,
-        'email': client.email,
-        'phone': client.phone,
-        'contact_person': client.contact_person
-    } for client in clients])
+    # Integrations read the whole list; paging is opt-in with per_page/cursor
+    return full_or_paginated_json(client_list_query(), CLIENT_SORTS, client_json)
 
 @app.route('/api/kampanijos', methods=['GET'])
 def get_api_kampanijos():
@@ -912,36 +2739,10 @@ def import_kampanijos():
         data = request.get_json()
         if not data or 'kampanijos' not in data:
             return jsonify({'error': 'No kampanijos data provided'}), 400
-        
-        imported_count = 0
-        updated_count = 0
-        
-        for kampanija_data in data['kampanijos']:
-            # Check if kampanija already exists (by external_id)
-            existing_kampanija = None
-            if 'external_id' in kampanija_data:
-                existing_kampanija = Kampanija.query.filter_by(
-                    external_id=kampanija_data['external_id']
-                ).first()
-            
-            if existing_kampanija:
-                # Update existing kampanija
-                existing_kampanija.name = kampanija_data['name']
-                existing_kampanija.client_brand_name = kampanija_data.get('client_brand_name')
-                existing_kampanija.campaign_name = kampanija_data.get('campaign_name')
-                updated_count += 1
-            else:
-                # Create new kampanija
-                new_kampanija = Kampanija(
-                    name=kampanija_data['name'],
-                    client_brand_name=kampanija_data.get('client_brand_name'),
-                    campaign_name=kampanija_data.get('campaign_name'),
-                    external_id=kampanija_data.get('external_id'),
-                    source_system=kampanija_data.get('source_system', 'projects-crm')
-                )
-                db.session.add(new_kampanija)
-                imported_count += 1
-        
+        if wants_async():
+            return job_accepted(job_runner.submit('import_kampanijos', kampanijos=data['kampanijos']))
+
+        imported_count, updated_count = bulk_upsert(Kampanija, ('external_id',), kampanija_records(data['kampanijos']))
         db.session.commit()
         
         return jsonify({
@@ -955,6 +2756,488 @@ def import_kampanijos():
         db.session.rollback()
         return jsonify({'error': f'Failed to import kampanijos: {str(e)}'}), 500
 
+@app.route('/api/import-rate-cards', methods=['POST'])
+def import_rate_cards_api():
+    """Import ScreenPricing rate cards for many screens from an uploaded CSV/XLSX file"""
+    api_key = request.headers.get('X-API-Key')
+    if not api_key or api_key != 'ekranu-crm-api-key':
+        return jsonify({'error': 'Invalid API key'}), 401
+
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        return jsonify({'error': 'No rate card file provided'}), 400
+    replace = request.form.get('replace', '').lower() in ('1', 'true', 'yes', 'on')
+    if wants_async():
+        # The job reads the file after this request has ended, so keep a copy until it is done
+        os.makedirs(app.config['JOB_FOLDER'], exist_ok=True)
+        path = os.path.join(app.config['JOB_FOLDER'], f'upload-{uuid.uuid4().hex}-{secure_filename(upload.filename)}')
+        upload.save(path)
+        return job_accepted(job_runner.submit('import_rate_cards', path=path, filename=upload.filename, replace=replace))
+
+    try:
+        report = import_rate_cards(rate_card_files.read_rate_card_rows(upload.stream, upload.filename), replace=replace)
+    except rate_card_files.RateCardFileError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': f'Failed to import rate cards: {str(e)}'}), 500
+
+    return jsonify(dict(rate_card_import_summary(report), success=True, **report))
+
+# Background jobs: heavy operations answer 202 Accepted at once and run on the job runner's
+# threads; clients poll /api/jobs/<id> for progress and the result
+job_runner = JobRunner(app, db, BackgroundJob)
+
+@job_runner.task('import_brands')
+def import_brands_job(job, brands):
+    imported_count, updated_count = bulk_upsert(
+        Client, ('company', 'name'), brand_records(job.iterate(brands, len(brands), message='brands'))
+    )
+    db.session.commit()
+    return {'imported_count': imported_count, 'updated_count': updated_count}
+
+@job_runner.task('import_kampanijos')
+def import_kampanijos_job(job, kampanijos):
+    imported_count, updated_count = bulk_upsert(
+        Kampanija, ('external_id',), kampanija_records(job.iterate(kampanijos, len(kampanijos), message='kampanijos'))
+    )
+    db.session.commit()
+    return {'imported_count': imported_count, 'updated_count': updated_count}
+
+def remove_uploaded_file(path, **params):
+    if os.path.exists(path):
+        os.remove(path)
+
+@job_runner.task('import_rate_cards', cleanup=remove_uploaded_file)
+def import_rate_cards_job(job, path, filename, replace=False):
+    """Import an uploaded rate card file; each chunk commits, so a cancelled import keeps the chunks done"""
+    with open(path, 'rb') as f:
+        rows = rate_card_files.read_rate_card_rows(f, filename)
+        report = import_rate_cards(job.iterate(rows, message='rows'), replace=replace)
+    return dict(rate_card_import_summary(report), **report)
+
+@job_runner.task('rebuild_rollups')
+def rebuild_rollups_job(job, plan_id=None):
+    """Rebuild the daily rollups and reporting cube one plan at a time"""
+    if plan_id is not None:
+        plan_ids = [plan_id]
+    else:
+        plan_ids = sorted(db.session.scalars(union(
+            select(MediaPlanPricing.dooh_plan_id), select(MediaPlanDailyTotal.dooh_plan_id)
+        )))
+    for done, plan_id in enumerate(plan_ids):
+        job.progress(done, len(plan_ids), f'plan {plan_id}')
+        with write_queue.transaction(db.session):
+            refresh_daily_totals(plan_id)
+            bump_plan_version(plan_id)
+    job.progress(len(plan_ids))
+    return {'plans': len(plan_ids)}
+
+# Screens repriced per write transaction, so interactive saves get the write queue in between
+REPRICE_CHUNK_SCREENS = 10
+
+@job_runner.task('reprice_plan')
+def reprice_plan_job(job, plan_id):
+    """Price a plan's saved cells again from the current rate cards; each chunk of screens commits, so a cancelled job keeps the chunks done"""
+    screen_ids = sorted(db.session.scalars(
+        select(MediaPlanPricing.screen_id).where(MediaPlanPricing.dooh_plan_id == plan_id).distinct()
+    ))
+    contacts = func.coalesce(select(rate_card_contacts(MediaPlanPricing.day_name)).where(
+        ScreenPricing.screen_id == MediaPlanPricing.screen_id, ScreenPricing.hour == MediaPlanPricing.hour
+    ).scalar_subquery(), 0.0)
+    repriced = 0
+    done = 0
+    for chunk in chunked(screen_ids, REPRICE_CHUNK_SCREENS):
+        job.progress(done, len(screen_ids), f'screens {chunk[0]}-{chunk[-1]}')
+        in_chunk = [MediaPlanPricing.dooh_plan_id == plan_id, MediaPlanPricing.screen_id.in_(chunk)]
+        screen_dates = [tuple(row) for row in db.session.execute(
+            select(MediaPlanPricing.screen_id, MediaPlanPricing.date).where(*in_chunk).distinct()
+        )]
+        with write_queue.transaction(db.session):
+            repriced += db.session.execute(
+                update(MediaPlanPricing).where(*in_chunk)
+                .values(contacts=contacts, calculated_price=rate_card_price(contacts, MediaPlanPricing.selected_value),
+                        updated_at=datetime.utcnow())
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            refresh_daily_totals(plan_id, screen_dates)
+            bump_plan_version(plan_id)
+        done += len(chunk)
+    job.progress(done)
+    return {'screens': len(screen_ids), 'repriced': repriced, 'total_price': plan_daily_totals(plan_id)['total_price']}
+
+def job_file_path(job_id, fmt):
+    return os.path.join(app.config['JOB_FOLDER'], f'job-{job_id}.{fmt}')
+
+def job_file_expires_at(job):
+    return job.finished_at + timedelta(seconds=app.config['JOB_FILE_MAX_AGE'])
+
+@job_runner.on_start
+def sweep_job_files():
+    """Delete exports and leftover uploads in JOB_FOLDER older than JOB_FILE_MAX_AGE; returns how many"""
+    folder = app.config['JOB_FOLDER']
+    if not os.path.isdir(folder):
+        return 0
+    cutoff = time.time() - app.config['JOB_FILE_MAX_AGE']
+    removed = 0
+    for entry in os.scandir(folder):
+        if not entry.name.startswith(('job-', 'upload-')) or not entry.is_file():
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            pass  # removed by another worker meanwhile
+    return removed
+
+@app.cli.command('sweep-job-files')
+def sweep_job_files_command():
+    """Delete job exports and leftover uploads older than JOB_FILE_MAX_AGE."""
+    click.echo(f'{sweep_job_files()} files removed')
+
+@job_runner.task('export')
+def export_job(job, plan_id, export, fmt):
+    """Write a plan export to a file that /api/jobs/<id>/download serves"""
+    plan = db.session.get(DOOHPlan, plan_id)
+    if plan is None:
+        raise ValueError(f'Plan {plan_id} no longer exists')
+    header, statement = PLAN_EXPORTS[export](plan_id)
+    os.makedirs(app.config['JOB_FOLDER'], exist_ok=True)
+    path = job_file_path(job.job_id, fmt)
+    rows = job.iterate(export_rows(statement), every=EXPORT_BATCH_SIZE, message='rows')
+    try:
+        with open(path, 'wb') as f:
+            for chunk in export_files.spreadsheet_chunks(fmt, header, rows, title=export):
+                f.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return {'filename': plan_export_filename(plan, export, fmt), 'format': fmt, 'rows': job.done,
+            'bytes': os.path.getsize(path)}
+
+def plan_job_params(params, required=True):
+    plan_id = params.get('plan_id')
+    if plan_id is None and not required:
+        return {}
+    try:
+        plan_id = int(plan_id)
+    except (TypeError, ValueError):
+        raise ValueError('plan_id must be a plan id')
+    if db.session.get(DOOHPlan, plan_id) is None:
+        raise ValueError(f'Plan {plan_id} not found')
+    return {'plan_id': plan_id}
+
+def export_job_params(params):
+    if params.get('export') not in PLAN_EXPORTS:
+        raise ValueError(f"export must be one of {', '.join(PLAN_EXPORTS)}")
+    export_files.check_format(params.get('fmt'))
+    return dict(plan_job_params(params), export=params['export'], fmt=params['fmt'])
+
+# Jobs that /api/jobs starts, with their parameter checks; imports start from their own endpoints
+JOB_SUBMISSIONS = {
+    'rebuild_rollups': lambda params: plan_job_params(params, required=False),
+    'reprice_plan': plan_job_params,
+    'export': export_job_params,
+}
+
+def job_json(job):
+    live = job_runner.live_progress(job.id)
+    done, total, message = live or (job.progress_done, job.progress_total, job.progress_message)
+    data = {
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'progress': {'done': done or 0, 'total': total, 'message': message},
+        'result': json.loads(job.result) if job.result else None,
+        'error': job.error,
+        'cancel_requested': bool(job.cancel_requested),
+        'created_at': job.created_at.isoformat() if job.created_at else None,
+        'started_at': job.started_at.isoformat() if job.started_at else None,
+        'finished_at': job.finished_at.isoformat() if job.finished_at else None,
+        'url': url_for('api_job', job_id=job.id),
+    }
+    if job.kind == 'export' and job.status == 'succeeded':
+        data['download_url'] = url_for('download_job_file', job_id=job.id)
+        data['expires_at'] = job_file_expires_at(job).isoformat()
+    return data
+
+def job_accepted(job):
+    """202 Accepted with the job and its status URL (200 when the job already finished inline)"""
+    response = jsonify({'success': True, 'job': job_json(job)})
+    response.status_code = 200 if job.status in FINISHED_STATES else 202
+    response.headers['Location'] = url_for('api_job', job_id=job.id)
+    return response
+
+def get_job_or_404(job_id):
+    job = db.session.get(BackgroundJob, job_id)
+    if job is None:
+        abort(404)
+    if job_runner.expire_orphan(job):
+        db.session.refresh(job)
+    return job
+
+@app.route('/api/jobs', methods=['POST'])
+def submit_job():
+    """Start a rollup rebuild, plan repricing or plan export in the background"""
+    data = request.get_json() or {}
+    check = JOB_SUBMISSIONS.get(data.get('kind'))
+    if check is None:
+        return jsonify({'success': False, 'message': f"kind must be one of {', '.join(JOB_SUBMISSIONS)}"}), 400
+    try:
+        params = check(data.get('params') or {})
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    try:
+        job = job_runner.submit(data['kind'], **params)
+    except UnknownJobKind as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return job_accepted(job)
+
+@app.route('/api/jobs')
+def api_jobs():
+    """The latest jobs, newest first, optionally of one kind or status"""
+    sweep_job_files()
+    query = BackgroundJob.query.order_by(BackgroundJob.id.desc())
+    if request.args.get('kind'):
+        query = query.filter_by(kind=request.args['kind'])
+    if request.args.get('status'):
+        query = query.filter_by(status=request.args['status'])
+    limit = max(1, min(request.args.get('limit', 50, type=int), 500))
+    return jsonify({'jobs': [job_json(job) for job in query.limit(limit)]})
+
+@app.route('/api/jobs/<int:job_id>')
+def api_job(job_id):
+    return jsonify(job_json(get_job_or_404(job_id)))
+
+@app.route('/api/jobs/<int:job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Ask a queued or running job to stop; 202 while it is still winding down"""
+    job = get_job_or_404(job_id)
+    status = job_runner.cancel(job)
+    return jsonify({'success': True, 'job': job_json(job)}), 200 if status in FINISHED_STATES else 202
+
+@app.route('/api/jobs/<int:job_id>/download')
+def download_job_file(job_id):
+    job = get_job_or_404(job_id)
+    if job.kind != 'export' or job.status != 'succeeded':
+        abort(404)
+    result = json.loads(job.result)
+    path = job_file_path(job.id, result['format'])
+    if job_file_expires_at(job) < datetime.utcnow() or not os.path.exists(path):
+        return jsonify({'error': 'This export has expired; start a new export job'}), 410
+    return send_file(os.path.abspath(path), mimetype=export_files.EXPORT_FORMATS[result['format']],
+                     as_attachment=True, download_name=result['filename'])
+
+@app.cli.command('import-rate-cards')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--replace', is_flag=True, help='Delete hours of the imported screens that are not in the file.')
+def import_rate_cards_command(path, replace):
+    """Import ScreenPricing rate cards for many screens from a CSV or XLSX file."""
+    with open(path, 'rb') as f:
+        try:
+            report = import_rate_cards(rate_card_files.read_rate_card_rows(f, path), replace=replace)
+        except rate_card_files.RateCardFileError as e:
+            db.session.rollback()
+            raise click.ClickException(str(e))
+
+    for error in report['errors']:
+        click.echo(f"line {error['line']}: {error['message']}", err=True)
+    for screen_id, result in sorted(report['screens'].items()):
+        click.echo(f"screen {screen_id}: {result['inserted']} inserted, {result['updated']} updated, "
+                   f"{result['unchanged']} unchanged, {result['deleted']} deleted, {result['rejected']} rejected")
+        for error in result['errors']:
+            click.echo(f"  line {error['line']}: {error['message']}", err=True)
+    totals = rate_card_import_summary(report)
+    click.echo(f"{len(report['screens'])} screens: {totals['inserted']} inserted, {totals['updated']} updated, "
+               f"{totals['unchanged']} unchanged, {totals['deleted']} deleted, {totals['rejected']} rejected rows")
+
+@app.cli.command('rebuild-rollups')
+@click.option('--plan-id', type=int, help='Only rebuild the rollups of this plan.')
+def rebuild_rollups_command(plan_id):
+    """Rebuild the daily media plan rollups and the reporting cube from the saved pricing rows."""
+    refresh_daily_totals(plan_id)
+    db.session.commit()
+    query = MediaPlanDailyTotal.query
+    if plan_id is not None:
+        query = query.filter_by(dooh_plan_id=plan_id)
+    facts = ReportDailyFact.query
+    if plan_id is not None:
+        facts = facts.filter_by(dooh_plan_id=plan_id)
+    click.echo(f'Rebuilt {query.count()} daily rollup rows and {facts.count()} reporting cube rows.')
+
+# Synthetic data for benchmarks: `flask bench seed`
+SEED_CITIES = [
+    ('Vilnius', 54.6872, 25.2797),
+    ('Kaunas', 54.8985, 23.9036),
+    ('Klaipėda', 55.7033, 21.1443),
+    ('Šiauliai', 55.9349, 23.3137),
+    ('Panevėžys', 55.7348, 24.3575),
+]
+
+def seed_synthetic_data(providers=10, screens=2000, plans=10, screens_per_plan=20, weeks=8, seed=1):
+    """Bulk-insert a synthetic dataset of production-like volume and return its row counts.
+
+    Plans get random weekly selections priced and saved through
+    write_media_plan_pricing(), so pricing rows, rollups and plan versions are
+    produced exactly as the editor would produce them.
+    """
+    rng = random.Random(seed)
+    stamp = datetime.utcnow().strftime('%Y%m%d%H%M%S')
+
+    provider_ids = list(db.session.scalars(insert(ScreenProvider).returning(ScreenProvider.id), [
+        {'name': f'Bench Provider {stamp}-{i}', 'email': f'provider{i}@example.com'} for i in range(providers)
+    ]))
+
+    screen_rows = []
+    for i in range(screens):
+        city, lat, lng = rng.choice(SEED_CITIES)
+        screen_rows.append({
+            'provider_id': rng.choice(provider_ids),
+            'name': f'Bench Screen {stamp}-{i}',
+            'screen_type': rng.choice(['horizontal', 'vertical']),
+            'content_type': rng.choice(['video', 'static']),
+            'width': rng.choice([3.0, 4.0, 6.0]),
+            'height': rng.choice([2.0, 3.0]),
+            'city': city,
+            'address': f'Gatvė {rng.randint(1, 200)}',
+            'gps_latitude': lat + rng.uniform(-0.08, 0.08),
+            'gps_longitude': lng + rng.uniform(-0.12, 0.12),
+        })
+    screen_ids = []
+    for chunk in chunked(screen_rows, 1000):
+        screen_ids += db.session.scalars(insert(Screen).returning(Screen.id), chunk)
+
+    # Rate cards: a daily audience curve peaking in the evening, busier on weekdays
+    pricing_rows = []
+    for screen_id in screen_ids:
+        audience = rng.uniform(0.5, 3.0)
+        for hour in range(24):
+            curve = 0.2 + max(0.0, 1 - abs(hour - 18) / 12)
+            row = {'screen_id': screen_id, 'hour': hour, 'price': round(audience * curve * 10, 2)}
+            for day_index, day_name in enumerate(pricing.DAY_NAMES):
+                weekday_factor = 1.0 if day_index < 5 else 0.8
+                row[f'contacts_{day_name}'] = round(audience * curve * weekday_factor, 3)
+            pricing_rows.append(row)
+    for chunk in chunked(pricing_rows, 5000):
+        db.session.execute(insert(ScreenPricing), chunk)
+
+    client_ids = list(db.session.scalars(insert(Client).returning(Client.id), [
+        {'name': f'Bench Client {stamp}-{i}', 'company': f'Bench {i}'} for i in range(max(1, plans // 2))
+    ]))
+    campaign_ids = list(db.session.scalars(insert(Campaign).returning(Campaign.id), [
+        {'client_id': rng.choice(client_ids), 'name': f'Bench Campaign {stamp}-{i}', 'budget': rng.randint(1, 50) * 1000.0}
+        for i in range(plans)
+    ]))
+    db.session.commit()
+
+    counts = {'providers': providers, 'screens': screens, 'screen_pricing': len(pricing_rows), 'plans': plans,
+              'bookings': 0, 'screen_slots': 0, 'media_plan_pricing': 0}
+    for i, campaign_id in enumerate(campaign_ids):
+        start = pricing.week_start(date(2025, 1, 6) + timedelta(days=rng.randint(0, 300)))
+        plan = DOOHPlan(campaign_id=campaign_id, name=f'Bench Plan {stamp}-{i}', start_date=start,
+                        end_date=start + timedelta(days=weeks * 7 - 1))
+        db.session.add(plan)
+        db.session.flush()
+
+        plan_screens = rng.sample(screen_ids, min(screens_per_plan, len(screen_ids)))
+        booking_ids = list(db.session.scalars(insert(ScreenBooking).returning(ScreenBooking.id), [
+            {'dooh_plan_id': plan.id, 'screen_id': screen_id} for screen_id in plan_screens
+        ]))
+        bookings = dict(zip(booking_ids, plan_screens))
+
+        slot_rows = []
+        for booking_id in booking_ids:
+            for day in range(weeks * 7):
+                for hour in pricing.PLAN_HOURS:
+                    if rng.random() < 0.5:
+                        slot_rows.append({'booking_id': booking_id, 'date': start + timedelta(days=day),
+                                          'hour': hour, 'slots_purchased': rng.randint(1, 4)})
+        for chunk in chunked(slot_rows, 5000):
+            db.session.execute(insert(ScreenSlot), chunk)
+
+        selections = {}
+        for booking_id in booking_ids:
+            for week_number in range(1, weeks + 1):
+                selections[f'{booking_id}_w{week_number}'] = {
+                    f'{hour}_{day_name}': rng.choice([30, 60])
+                    for hour in pricing.PLAN_HOURS for day_name in pricing.DAY_NAMES if rng.random() < 0.5
+                }
+        result = price_plan_selections(plan, selections, bookings)
+        write_media_plan_pricing(plan, bookings, selections, result)
+        db.session.commit()
+
+        counts['bookings'] += len(booking_ids)
+        counts['screen_slots'] += len(slot_rows)
+        counts['media_plan_pricing'] += result['total_slots']
+    return counts
+
+bench_cli = AppGroup('bench', help='Synthetic data for benchmarking.')
+
+@bench_cli.command('seed')
+@click.option('--providers', default=10, show_default=True)
+@click.option('--screens', default=2000, show_default=True)
+@click.option('--plans', default=10, show_default=True)
+@click.option('--screens-per-plan', default=20, show_default=True)
+@click.option('--weeks', default=8, show_default=True, help='Length of each plan.')
+@click.option('--seed', default=1, show_default=True, help='Random seed, for reproducible datasets.')
+def bench_seed_command(providers, screens, plans, screens_per_plan, weeks, seed):
+    """Add synthetic providers, screens, rate cards and long plans to the database."""
+    db.create_all()
+    counts = seed_synthetic_data(providers, screens, plans, screens_per_plan, weeks, seed)
+    click.echo('Seeded ' + ', '.join(f'{count} {name}' for name, count in counts.items()) + '.')
+
+app.cli.add_command(bench_cli)
+
+# Statement budgets of the main views, checked by `flask check-query-budgets`
+VIEW_QUERY_BUDGETS = [
+    ('/', 6),
+    ('/providers', 2),
+    ('/provider/{provider_id}', 2),
+    ('/screens', 3),
+    ('/screen/{screen_id}', 2),
+    ('/campaigns', 4),
+    ('/dooh-plans', 2),
+    ('/dooh-plan/{plan_id}', 2),
+    ('/dooh-plan/{plan_id}/screens', 4),
+    ('/dooh-plan/{plan_id}/media-plan', 4),
+    ('/dooh-plan/{plan_id}/media-plan/week/1', 4),
+    ('/api/screens/available/{plan_id}', 3),
+    ('/api/screens/availability?start=2025-01-06&end=2025-01-12&hours=6-23', 2),
+    ('/api/media-plan-pricing/{plan_id}', 3),
+    ('/api/reports?group_by=provider,month', 2),
+]
+
+@app.cli.command('check-query-budgets')
+def check_query_budgets_command():
+    """Request the main views against the current database and fail on views over their statement budget."""
+    ids = {
+        'plan_id': db.session.query(func.min(DOOHPlan.id)).scalar(),
+        'screen_id': db.session.query(func.min(Screen.id)).scalar(),
+        'provider_id': db.session.query(func.min(ScreenProvider.id)).scalar(),
+    }
+    dashboard_cache.invalidate()
+    api_response_cache.clear()
+    client = app.test_client()
+    failures = 0
+    for path, budget in VIEW_QUERY_BUDGETS:
+        try:
+            url = path.format(**{name: value for name, value in ids.items() if value is not None})
+        except KeyError:
+            click.echo(f'{path}: skipped, no rows to request')
+            continue
+        try:
+            with max_queries(query_engines, budget, url) as counter:
+                response = client.get(url)
+                response.get_data()  # streamed pages render while the body is read
+            click.echo(f'{url}: {counter.count}/{budget} statements ({response.status_code})')
+        except QueryBudgetExceeded as e:
+            failures += 1
+            click.echo(str(e), err=True)
+    if failures:
+        raise click.ClickException(f'{failures} views exceeded their statement budget')
+
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
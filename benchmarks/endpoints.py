@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Time the key endpoints through the Flask test client and store the results as JSON.
+
+Seeds a throwaway SQLite database with `flask bench seed` data (or uses
+--database), then requests each endpoint --repeat times and writes min,
+median and max wall time plus SQL statement counts to --output, named after
+the current commit by default. --compare prints the change against an
+earlier result file.
+
+    python benchmarks/endpoints.py --screens 2000 --weeks 12
+    python benchmarks/endpoints.py --compare benchmarks/results/<earlier>.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def build_cases(app_module, plan):
+    """(name, request callable) pairs for one seeded plan"""
+    import pricing
+
+    plan_id = plan.id
+    bookings = app_module.plan_booking_screens(plan_id)
+    booking_id, screen_id = next(iter(bookings.items()))
+    client = app_module.app.test_client()
+
+    schedule_form = {}
+    day = plan.start_date
+    while day <= plan.end_date:
+        for hour in pricing.PLAN_HOURS:
+            schedule_form[f'slot_{booking_id}_{day:%Y-%m-%d}_{hour}'] = str((day.day + hour) % 3)
+        day += timedelta(days=1)
+
+    week_pricing = [
+        {'hour': hour, 'day_name': day_name, 'selected_value': 30 if (hour + i) % 2 else 60}
+        for hour in pricing.PLAN_HOURS for i, day_name in enumerate(pricing.DAY_NAMES)
+    ]
+    batch_selections = {
+        f'{b_id}_w1': {f"{item['hour']}_{item['day_name']}": item['selected_value'] for item in week_pricing}
+        for b_id in bookings
+    }
+    brands = [{'name': f'Brand {i}', 'company': f'Company {i}', 'external_id': i, 'status': 'active',
+               'email': f'brand{i}@example.com'} for i in range(2000)]
+    kampanijos = [{'name': f'Kampanija {i}', 'external_id': f'bench_{i}'} for i in range(2000)]
+    api_headers = {'X-API-Key': 'ekranu-crm-api-key'}
+
+    def cold_pricing():
+        app_module.api_response_cache.clear()
+        return client.get(f'/api/media-plan-pricing/{plan_id}')
+
+    return [
+        ('dooh_plan_media', lambda: client.get(f'/dooh-plan/{plan_id}/media-plan')),
+        ('dooh_plan_screens', lambda: client.get(f'/dooh-plan/{plan_id}/screens')),
+        ('update_broadcast_schedule', lambda: client.post(f'/dooh-plan/{plan_id}/update-broadcast-schedule', data=schedule_form)),
+        ('get_media_plan_pricing', cold_pricing),
+        ('save_media_plan_pricing', lambda: client.post('/api/media-plan-pricing/save', json={
+            'dooh_plan_id': plan_id, 'screen_id': screen_id, 'week_number': 1, 'pricing_data': week_pricing})),
+        ('save_media_plan_pricing_batch', lambda: client.post(f'/api/media-plan-pricing/{plan_id}/save', json={
+            'selections': batch_selections})),
+        ('import_brands', lambda: client.post('/api/import-brands', headers=api_headers, json={'brands': brands})),
+        ('import_kampanijos', lambda: client.post('/api/import-kampanijos', headers=api_headers, json={'kampanijos': kampanijos})),
+    ]
+
+
+def run_case(app_module, request, repeat):
+    from query_budget import count_queries
+
+    timings = []
+    statements = []
+    statuses = set()
+    for _ in range(repeat):
+        with count_queries(app_module.query_engines) as counter:
+            started_at = time.perf_counter()
+            response = request()
+            response.get_data()
+            timings.append((time.perf_counter() - started_at) * 1000)
+        statements.append(counter.count)
+        statuses.add(response.status_code)
+    return {
+        'min_ms': round(min(timings), 2),
+        'median_ms': round(statistics.median(timings), 2),
+        'max_ms': round(max(timings), 2),
+        'statements': max(statements),
+        'status': sorted(statuses),
+    }
+
+
+def print_comparison(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline.get('commit')} ({baseline_path}):")
+    for name, result in results.items():
+        before = baseline['results'].get(name)
+        if before is None:
+            print(f'  {name:32} new')
+            continue
+        change = (result['median_ms'] - before['median_ms']) / before['median_ms'] * 100 if before['median_ms'] else 0.0
+        print(f"  {name:32} {before['median_ms']:10.1f} -> {result['median_ms']:10.1f} ms  ({change:+.1f}%)"
+              f"  statements {before['statements']} -> {result['statements']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', help='Existing database URI to benchmark instead of a fresh seeded one')
+    parser.add_argument('--screens', type=int, default=2000)
+    parser.add_argument('--plans', type=int, default=5)
+    parser.add_argument('--screens-per-plan', type=int, default=20)
+    parser.add_argument('--weeks', type=int, default=8)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='Result file (default: benchmarks/results/<date>-<commit>.json)')
+    parser.add_argument('--compare', help='Earlier result file to compare against')
+    args = parser.parse_args()
+
+    db_path = None
+    if args.database:
+        os.environ['SQLALCHEMY_DATABASE_URI'] = args.database
+    else:
+        db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        db_file.close()
+        db_path = db_file.name
+        os.environ['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    # Keep the per-request slow log quiet while benchmarking
+    os.environ.setdefault('SLOW_REQUEST_THRESHOLD_MS', '1e9')
+
+    import app as app_module
+
+    try:
+        with app_module.app.app_context():
+            if db_path:
+                app_module.db.create_all()
+                started_at = time.perf_counter()
+                counts = app_module.seed_synthetic_data(screens=args.screens, plans=args.plans,
+                                                        screens_per_plan=args.screens_per_plan, weeks=args.weeks)
+                print(f'Seeded {counts} in {time.perf_counter() - started_at:.1f}s')
+            plan = app_module.DOOHPlan.query.join(app_module.ScreenBooking).order_by(app_module.DOOHPlan.id).first()
+            if plan is None:
+                sys.exit('No plan with bookings to benchmark; seed the database with `flask bench seed` first.')
+            plan_info = {'id': plan.id, 'days': (plan.end_date - plan.start_date).days + 1}
+
+            results = {}
+            for name, request in build_cases(app_module, plan):
+                results[name] = run_case(app_module, request, args.repeat)
+                print(f"{name:32} median {results[name]['median_ms']:9.1f} ms  "
+                      f"min {results[name]['min_ms']:9.1f}  max {results[name]['max_ms']:9.1f}  "
+                      f"statements {results[name]['statements']:5}  status {results[name]['status']}")
+    finally:
+        if db_path:
+            os.unlink(db_path)
+
+    commit = git_commit()
+    output = args.output or os.path.join(ROOT, 'benchmarks', 'results', f'{datetime.now():%Y%m%d-%H%M%S}-{commit}.json')
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({
+            'commit': commit,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'parameters': {k: v for k, v in vars(args).items() if k not in ('output', 'compare')},
+            'plan': plan_info,
+            'results': results,
+        }, f, indent=2)
+    print(f'Results written to {output}')
+
+    if args.compare:
+        print_comparison(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
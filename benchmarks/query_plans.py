@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Show query plans and timings of the hot lookups with and without indexes.
+
+Seeds a throwaway SQLite database, drops the lookup indexes declared on the
+models, runs EXPLAIN QUERY PLAN and a batch of point lookups for each query,
+then recreates the indexes and repeats.
+
+    python benchmarks/query_plans.py --rows 200000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=200000, help='rows in screen_slot and media_plan_pricing')
+    parser.add_argument('--lookups', type=int, default=500)
+    args = parser.parse_args()
+
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    db_file.close()
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_file.name}'
+
+    from sqlalchemy import insert, text
+    from app import (app, db, Client, Kampanija, Campaign, DOOHPlan, ScreenProvider, Screen,
+                     ScreenBooking, ScreenSlot, MediaPlanPricing)
+
+    start = date(2025, 1, 6)
+    num_bookings = max(args.rows // (24 * 30), 1)
+    num_small = max(args.rows // 10, 1)
+    random.seed(1)
+
+    # (label, SQL, parameter factory) for every hot lookup in app.py
+    queries = [
+        ('ScreenSlot(booking_id, date, hour)',
+         'SELECT * FROM screen_slot WHERE booking_id = :b AND date = :d AND hour = :h',
+         lambda: {'b': random.randint(1, num_bookings), 'd': str(start + timedelta(days=random.randrange(30))),
+                  'h': random.randrange(24)}),
+        ('MediaPlanPricing(dooh_plan_id, screen_id, week_number)',
+         'SELECT * FROM media_plan_pricing WHERE dooh_plan_id = :p AND screen_id = :s AND week_number = :w',
+         lambda: {'p': random.randint(1, num_bookings // 10 + 1), 's': random.randint(1, 10), 'w': random.randint(1, 5)}),
+        ('ScreenBooking(dooh_plan_id, screen_id)',
+         'SELECT * FROM screen_booking WHERE dooh_plan_id = :p AND screen_id = :s',
+         lambda: {'p': random.randint(1, num_bookings // 10 + 1), 's': random.randint(1, 10)}),
+        ('Campaign(client_id, name)',
+         'SELECT * FROM campaign WHERE client_id = :c AND name = :n',
+         lambda: {'c': random.randint(1, num_small), 'n': f'Campaign {random.randint(1, num_small)}'}),
+        ('Kampanija.external_id',
+         'SELECT * FROM kampanija WHERE external_id = :e',
+         lambda: {'e': f'projects_campaign_{random.randint(1, num_small)}'}),
+        ('Client(company, name)',
+         'SELECT * FROM client WHERE company = :c AND name = :n',
+         lambda: {'c': f'Company {random.randint(1, num_small)}', 'n': f'Brand {random.randint(1, num_small)}'}),
+    ]
+
+    def run(label):
+        print(f'\n=== {label} ===')
+        for name, sql, params in queries:
+            plan = db.session.execute(text('EXPLAIN QUERY PLAN ' + sql), params()).fetchall()
+            started = time.perf_counter()
+            for _ in range(args.lookups):
+                db.session.execute(text(sql), params()).fetchall()
+            elapsed = (time.perf_counter() - started) / args.lookups * 1000
+            print(f'{name:<55} {elapsed:8.3f} ms/lookup  {" | ".join(row[-1] for row in plan)}')
+
+    try:
+        with app.app_context():
+            db.create_all()
+            db.session.execute(insert(Client), [
+                {'name': f'Brand {i}', 'company': f'Company {i}'} for i in range(1, num_small + 1)])
+            db.session.execute(insert(Campaign), [
+                {'client_id': i, 'name': f'Campaign {i}'} for i in range(1, num_small + 1)])
+            db.session.execute(insert(Kampanija), [
+                {'name': f'Kampanija {i}', 'external_id': f'projects_campaign_{i}'} for i in range(1, num_small + 1)])
+            db.session.execute(insert(ScreenProvider), [{'name': 'Benchmark'}])
+            db.session.execute(insert(Screen), [
+                {'provider_id': 1, 'name': f'Screen {i}', 'screen_type': 'horizontal', 'content_type': 'video',
+                 'width': 6, 'height': 3, 'city': 'Vilnius', 'address': f'Gatvė {i}'} for i in range(1, 11)])
+            db.session.execute(insert(DOOHPlan), [
+                {'campaign_id': 1, 'name': f'Plan {i}', 'start_date': start, 'end_date': start + timedelta(days=29)}
+                for i in range(1, num_bookings // 10 + 2)])
+            db.session.execute(insert(ScreenBooking), [
+                {'dooh_plan_id': i // 10 + 1, 'screen_id': i % 10 + 1} for i in range(num_bookings)])
+            db.session.execute(insert(ScreenSlot), [
+                {'booking_id': b, 'date': start + timedelta(days=d), 'hour': h, 'slots_purchased': 1}
+                for b in range(1, num_bookings + 1) for d in range(30) for h in range(24)])
+            db.session.execute(insert(MediaPlanPricing), [
+                {'dooh_plan_id': b // 10 + 1, 'screen_id': b % 10 + 1, 'week_number': d // 7 + 1, 'hour': h,
+                 'date': start + timedelta(days=d), 'day_name': 'mon', 'selected_value': 30,
+                 'calculated_price': 1.0, 'contacts': 1.0}
+                for b in range(num_bookings) for d in range(30) for h in range(24)])
+            db.session.commit()
+
+            indexes = [index for table in db.metadata.sorted_tables for index in table.indexes]
+            for index in indexes:
+                index.drop(db.engine)
+            db.session.execute(text('ANALYZE'))
+            run('without indexes')
+
+            for index in indexes:
+                index.create(db.engine)
+            db.session.execute(text('ANALYZE'))
+            run('with indexes')
+    finally:
+        os.unlink(db_file.name)
+
+
+if __name__ == '__main__':
+    main()
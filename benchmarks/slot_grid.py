@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""Benchmark rendering of the broadcast scheduling page for long plans.
+
+Seeds a throwaway SQLite database with one plan of --screens bookings over
+--days days, with slots purchased for hours 6-23, and times
+GET /dooh-plan/<id>/screens through the Flask test client.
+
+    python benchmarks/slot_grid.py --days 90 --screens 50
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--screens', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    db_file.close()
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_file.name}'
+
+    from sqlalchemy import insert
+    from app import app, db, ScreenProvider, Client, Campaign, DOOHPlan, Screen, ScreenBooking, ScreenSlot
+
+    try:
+        with app.app_context():
+            db.create_all()
+            provider = ScreenProvider(name='Benchmark')
+            client = Client(name='Benchmark')
+            db.session.add_all([provider, client])
+            db.session.flush()
+            campaign = Campaign(client_id=client.id, name='Benchmark')
+            db.session.add(campaign)
+            db.session.flush()
+            start = date(2025, 1, 6)
+            plan = DOOHPlan(campaign_id=campaign.id, name='Benchmark', start_date=start,
+                            end_date=start + timedelta(days=args.days - 1))
+            db.session.add(plan)
+            db.session.flush()
+
+            slots = []
+            for i in range(args.screens):
+                screen = Screen(provider_id=provider.id, name=f'Screen {i}', screen_type='horizontal',
+                                content_type='video', width=6, height=3, city='Vilnius', address=f'Gatvė {i}')
+                db.session.add(screen)
+                db.session.flush()
+                booking = ScreenBooking(dooh_plan_id=plan.id, screen_id=screen.id)
+                db.session.add(booking)
+                db.session.flush()
+                for day in range(args.days):
+                    for hour in range(6, 24):
+                        slots.append({'booking_id': booking.id, 'date': start + timedelta(days=day),
+                                      'hour': hour, 'slots_purchased': 2})
+            db.session.execute(insert(ScreenSlot), slots)
+            db.session.commit()
+            plan_id = plan.id
+
+        client = app.test_client()
+        timings = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            response = client.get(f'/dooh-plan/{plan_id}/screens')
+            timings.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.status_code
+
+        print(f'{args.screens} screens x {args.days} days, {len(slots)} slots, '
+              f'{len(response.data) / 1024 / 1024:.1f} MB HTML')
+        print(f'render: best {min(timings):.2f}s, mean {sum(timings) / len(timings):.2f}s')
+    finally:
+        os.unlink(db_file.name)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""Load-test concurrent pricing saves against SQLite with and without the tuning layer.
+
+Each mode runs in its own process against a freshly seeded database:
+``default`` (SQLITE_TUNING=0, SQLite's rollback journal, no write queue) and
+``tuned`` (WAL, busy_timeout, read-only connections and the write queue).
+--writers threads repeatedly save one booking week through the batch pricing
+endpoint while --readers threads poll the pricing JSON. The script prints
+saves per second, error rates and latency for each mode.
+
+    python benchmarks/sqlite_concurrency.py --writers 8 --readers 4 --duration 10
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MODES = {'default': '0', 'tuned': '1'}
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def run_mode(args):
+    """Seed a database, hammer it from threads and print one JSON result line"""
+    import app as app_module
+    import pricing
+    from sqlalchemy import text
+
+    with app_module.app.app_context():
+        app_module.db.create_all()
+        app_module.seed_synthetic_data(screens=args.screens, plans=args.plans,
+                                       screens_per_plan=args.screens_per_plan, weeks=args.weeks)
+        plans = {}
+        for plan in app_module.DOOHPlan.query.all():
+            plans[plan.id] = (list(app_module.plan_booking_screens(plan.id)),
+                              pricing.count_weeks(plan.start_date, plan.end_date))
+        journal_mode = app_module.db.session.execute(text('PRAGMA journal_mode')).scalar()
+
+    deadline = time.perf_counter() + args.duration
+    lock = threading.Lock()
+    results = {'write': [], 'read': []}  # (latency_ms, status, message)
+
+    def record(kind, started_at, response):
+        message = None
+        if response.status_code != 200:
+            message = (response.get_json(silent=True) or {}).get('message') or str(response.status_code)
+        with lock:
+            results[kind].append(((time.perf_counter() - started_at) * 1000, response.status_code, message))
+
+    def writer(seed):
+        rng = random.Random(seed)
+        client = app_module.app.test_client()
+        while time.perf_counter() < deadline:
+            plan_id = rng.choice(list(plans))
+            booking_ids, num_weeks = plans[plan_id]
+            key = f'{rng.choice(booking_ids)}_w{rng.randint(1, num_weeks)}'
+            selections = {key: {f'{hour}_{day}': rng.choice((0, 15, 30, 60))
+                                for hour in pricing.PLAN_HOURS for day in pricing.DAY_NAMES}}
+            started_at = time.perf_counter()
+            response = client.post(f'/api/media-plan-pricing/{plan_id}/save', json={'selections': selections})
+            record('write', started_at, response)
+
+    def reader(seed):
+        rng = random.Random(seed)
+        client = app_module.app.test_client()
+        while time.perf_counter() < deadline:
+            started_at = time.perf_counter()
+            response = client.get(f'/api/media-plan-pricing/{rng.choice(list(plans))}')
+            record('read', started_at, response)
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(1000 + i,)) for i in range(args.readers)]
+    started_at = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started_at
+
+    summary = {'journal_mode': journal_mode, 'elapsed_s': round(elapsed, 2)}
+    for kind, rows in results.items():
+        ok = [latency for latency, status, _ in rows if status == 200]
+        errors = {}
+        for _, status, message in rows:
+            if status != 200:
+                errors[message] = errors.get(message, 0) + 1
+        summary[kind] = {
+            'requests': len(rows),
+            'ok_per_s': round(len(ok) / elapsed, 1),
+            'error_rate': round((len(rows) - len(ok)) / len(rows), 4) if rows else 0.0,
+            'median_ms': round(statistics.median(ok), 1) if ok else 0.0,
+            'p95_ms': round(percentile(ok, 0.95), 1),
+            'errors': errors,
+        }
+    print(json.dumps(summary))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per mode')
+    parser.add_argument('--screens', type=int, default=500)
+    parser.add_argument('--plans', type=int, default=4)
+    parser.add_argument('--screens-per-plan', type=int, default=10)
+    parser.add_argument('--weeks', type=int, default=4)
+    parser.add_argument('--mode', choices=sorted(MODES), help='run a single mode in this process')
+    args = parser.parse_args()
+
+    if args.mode:
+        run_mode(args)
+        return
+
+    summaries = {}
+    for mode, tuning in MODES.items():
+        db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+        db_file.close()
+        env = dict(os.environ, SQLALCHEMY_DATABASE_URI=f'sqlite:///{db_file.name}', SQLITE_TUNING=tuning,
+                   SLOW_REQUEST_THRESHOLD_MS='1e9')
+        try:
+            output = subprocess.check_output([sys.executable, os.path.abspath(__file__), '--mode', mode] + sys.argv[1:],
+                                             env=env, text=True)
+        finally:
+            for suffix in ('', '-wal', '-shm', '-journal'):
+                if os.path.exists(db_file.name + suffix):
+                    os.unlink(db_file.name + suffix)
+        summaries[mode] = json.loads(output.strip().splitlines()[-1])
+
+    for mode, summary in summaries.items():
+        print(f"{mode} (journal_mode={summary['journal_mode']}, {args.writers} writers, {args.readers} readers, "
+              f"{summary['elapsed_s']}s)")
+        for kind in ('write', 'read'):
+            result = summary[kind]
+            print(f"  {kind:5}  {result['ok_per_s']:8.1f} ok/s  errors {result['error_rate']:7.2%}  "
+                  f"median {result['median_ms']:8.1f} ms  p95 {result['p95_ms']:8.1f} ms  ({result['requests']} requests)")
+            for message, count in sorted(result['errors'].items(), key=lambda item: -item[1]):
+                print(f'         {count:6} x {message}')
+
+
+if __name__ == '__main__':
+    main()
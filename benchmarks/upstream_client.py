@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""Check the caching and circuit breaker of UpstreamClient against a local stub CRM.
+
+Starts an http.server stub on a free port that counts requests per path and
+can be told to answer slowly or with 500s, then checks the four behaviours
+the CRM proxy endpoints rely on:
+
+- fresh: a second call within ``ttl`` is served from memory;
+- stale: a call after ``ttl`` returns the old payload at once and one
+  background request refreshes it (stale-while-revalidate);
+- coalesced: concurrent cold callers share a single upstream request;
+- breaker: after ``failure_threshold`` failures the upstream is not called
+  until ``reset_timeout`` has passed, and cached payloads are served meanwhile.
+
+The script prints one line per check and exits with status 1 if any failed.
+
+    python benchmarks/upstream_client.py --delay 0.3 --callers 20
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from upstream import UpstreamClient, UpstreamError
+
+
+class StubCRM(ThreadingHTTPServer):
+    """Answers GET /<anything> with {"path": ..., "version": n}, n counting that path's requests"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.hits = Counter()
+        self.delay = 0.0
+        self.failing = False
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_port}'
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        stub = self.server
+        with stub.lock:
+            stub.hits[self.path] += 1
+            version = stub.hits[self.path]
+        time.sleep(stub.delay)
+        if stub.failing:
+            self.send_error(500)
+            return
+        body = json.dumps({'path': self.path, 'version': version}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def timed(call):
+    started = time.perf_counter()
+    result = call()
+    return result, (time.perf_counter() - started) * 1000
+
+
+def check_fresh(stub, args):
+    client = UpstreamClient(stub.url, 'stub', ttl=60, stale_ttl=600)
+    first, cold_ms = timed(lambda: client.get_json('/fresh'))
+    second, warm_ms = timed(lambda: client.get_json('/fresh'))
+    ok = first == second and stub.hits['/fresh'] == 1
+    return ok, f'cold {cold_ms:.1f} ms, cached {warm_ms:.3f} ms, {stub.hits["/fresh"]} upstream request(s)'
+
+
+def check_stale(stub, args):
+    client = UpstreamClient(stub.url, 'stub', ttl=0.2, stale_ttl=600)
+    first = client.get_json('/stale')
+    time.sleep(0.3)
+    stale, stale_ms = timed(lambda: client.get_json('/stale'))
+    time.sleep(args.delay + 0.2)
+    refreshed = client.get_json('/stale')
+    ok = (stale == first and stale_ms < args.delay * 1000 / 2
+          and refreshed['version'] == 2 and stub.hits['/stale'] == 2)
+    return ok, (f'stale answer in {stale_ms:.3f} ms (upstream takes {args.delay * 1000:.0f} ms), '
+                f'version {first["version"]} -> {refreshed["version"]} after the background refresh')
+
+
+def check_coalesced(stub, args):
+    client = UpstreamClient(stub.url, 'stub', ttl=60, stale_ttl=600, pool_size=args.callers)
+    results = []
+    start = threading.Barrier(args.callers)
+
+    def call():
+        start.wait()
+        results.append(client.get_json('/coalesced'))
+
+    threads = [threading.Thread(target=call) for _ in range(args.callers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    ok = len(results) == args.callers and len({r['version'] for r in results}) == 1 and stub.hits['/coalesced'] == 1
+    return ok, f'{args.callers} concurrent callers, {stub.hits["/coalesced"]} upstream request(s), {elapsed_ms:.0f} ms'
+
+
+def check_breaker(stub, args):
+    threshold = 3
+    client = UpstreamClient(stub.url, 'stub', ttl=0.1, stale_ttl=0.1, failure_threshold=threshold, reset_timeout=0.5)
+    cached = client.get_json('/breaker/cached')
+    time.sleep(0.2)
+    stub.failing = True
+
+    errors = 0
+    for _ in range(threshold):
+        try:
+            client.get_json('/breaker/cold')
+        except UpstreamError:
+            errors += 1
+    opened = client.circuit_open()
+    hits_when_opened = sum(stub.hits.values())
+
+    try:
+        client.get_json('/breaker/cold')
+        rejected = False
+    except UpstreamError as e:
+        rejected = 'Circuit open' in str(e)
+    served_stale = client.get_json('/breaker/cached') == cached
+    time.sleep(0.1)  # let the background refresh of the cached path finish
+    calls_while_open = sum(stub.hits.values()) - hits_when_opened
+
+    time.sleep(0.5)
+    stub.failing = False
+    recovered = client.get_json('/breaker/cold')
+    closed = not client.circuit_open()
+
+    ok = (errors == threshold and opened and rejected and served_stale and calls_while_open == 0
+          and recovered['path'] == '/breaker/cold' and closed)
+    return ok, (f'{errors} failures opened it, {calls_while_open} upstream calls while open, '
+                f'cached payload served: {served_stale}, closed again after reset_timeout: {closed}')
+
+
+CHECKS = {
+    'fresh': check_fresh,
+    'stale': check_stale,
+    'coalesced': check_coalesced,
+    'breaker': check_breaker,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--delay', type=float, default=0.3, help='seconds the stub takes per request')
+    parser.add_argument('--callers', type=int, default=20, help='concurrent callers in the coalescing check')
+    parser.add_argument('--check', choices=sorted(CHECKS), action='append', help='run only these checks')
+    args = parser.parse_args()
+
+    failed = []
+    for name in args.check or CHECKS:
+        stub = StubCRM()
+        stub.delay = args.delay
+        threading.Thread(target=stub.serve_forever, daemon=True).start()
+        try:
+            ok, detail = CHECKS[name](stub, args)
+        finally:
+            stub.shutdown()
+            stub.server_close()
+        print(f"{'ok  ' if ok else 'FAIL'} {name:10} {detail}")
+        if not ok:
+            failed.append(name)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Streaming spreadsheet writers (CSV or XLSX) for plan exports.
+
+Both writers take a header and an iterable of rows and return an iterator of
+bytes chunks, so rows can come straight from a database cursor. CSV output
+starts with the first rows. XLSX needs the optional openpyxl package. Its
+write-only workbook spools rows to a temporary file and the finished file is
+then sent in chunks; memory use stays flat, but the download begins only
+after the last row.
+"""
+import csv
+import io
+import tempfile
+from datetime import date
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+CHUNK_SIZE = 64 * 1024
+
+
+class ExportFormatError(ValueError):
+    """The export format is unknown or cannot be written here"""
+
+
+def check_format(fmt):
+    if fmt not in EXPORT_FORMATS:
+        raise ExportFormatError(f"Unknown export format {fmt}; use {' or '.join(EXPORT_FORMATS)}")
+    if fmt == 'xlsx' and openpyxl is None:
+        raise ExportFormatError('Writing .xlsx files needs the openpyxl package (pip install openpyxl)')
+
+
+def _cell(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, float):
+        return round(value, 2)
+    return value
+
+
+def csv_chunks(header, rows):
+    """UTF-8 CSV with a byte order mark so spreadsheet programs detect the encoding"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(header)
+    # Send the header at once so the download starts before the first query returns
+    yield buffer.getvalue().encode('utf-8')
+    buffer.seek(0)
+    buffer.truncate()
+    for row in rows:
+        writer.writerow([_cell(value) for value in row])
+        if buffer.tell() >= CHUNK_SIZE:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def xlsx_chunks(header, rows, title='Export'):
+    check_format('xlsx')
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet(title[:31])
+    sheet.append(header)
+    for row in rows:
+        sheet.append([value if isinstance(value, date) else _cell(value) for value in row])
+    with tempfile.TemporaryFile() as spool:
+        workbook.save(spool)
+        spool.seek(0)
+        while True:
+            chunk = spool.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def spreadsheet_chunks(fmt, header, rows, title='Export'):
+    check_format(fmt)
+    if fmt == 'xlsx':
+        return xlsx_chunks(header, rows, title)
+    return csv_chunks(header, rows)
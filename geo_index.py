@@ -0,0 +1,122 @@
+"""In-memory spatial index of screen coordinates.
+
+Screens are bucketed into a uniform latitude/longitude grid. A radius or
+bounding-box query only visits the grid cells overlapping the search area,
+so its cost depends on how many screens are nearby, not on how many screens
+exist. Each entry keeps the fields the search APIs return, so answering a
+query needs no database round trip.
+"""
+import math
+import threading
+import time
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 111.32
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _matches(entry, filters):
+    return all(value is None or entry.get(field) == value for field, value in filters.items())
+
+
+class GridIndex:
+    """Uniform grid over (lat, lng) points; cell_size is in degrees"""
+
+    def __init__(self, cell_size=0.05):
+        self.cell_size = cell_size
+        self._entries = {}  # id -> entry dict with 'lat' and 'lng'
+        self._cells = {}  # (row, col) -> set of ids
+        self._lock = threading.RLock()
+        self.built_at = None  # time.monotonic() of the last full load, None when stale
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _cell(self, lat, lng):
+        return int(math.floor(lat / self.cell_size)), int(math.floor(lng / self.cell_size))
+
+    def replace_all(self, points):
+        """Swap in a full set of (key, lat, lng, fields) points"""
+        fresh = GridIndex(self.cell_size)
+        for key, lat, lng, fields in points:
+            fresh.upsert(key, lat, lng, **fields)
+        with self._lock:
+            self._entries, self._cells = fresh._entries, fresh._cells
+            self.built_at = time.monotonic()
+
+    def mark_stale(self):
+        self.built_at = None
+
+    def is_fresh(self, ttl):
+        return self.built_at is not None and time.monotonic() - self.built_at < ttl
+
+    def upsert(self, key, lat, lng, **fields):
+        """Add or move a point; points without coordinates are removed"""
+        with self._lock:
+            self.remove(key)
+            if lat is None or lng is None:
+                return
+            self._entries[key] = dict(fields, id=key, lat=lat, lng=lng)
+            self._cells.setdefault(self._cell(lat, lng), set()).add(key)
+
+    def remove(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return
+            cell = self._cell(entry['lat'], entry['lng'])
+            members = self._cells.get(cell)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._cells[cell]
+
+    def _candidates(self, min_lat, min_lng, max_lat, max_lng):
+        min_row, min_col = self._cell(min_lat, min_lng)
+        max_row, max_col = self._cell(max_lat, max_lng)
+        # Sparse areas: visiting the occupied cells is cheaper than every cell of a huge box
+        if (max_row - min_row + 1) * (max_col - min_col + 1) > len(self._cells):
+            for (row, col), members in self._cells.items():
+                if min_row <= row <= max_row and min_col <= col <= max_col:
+                    yield from members
+            return
+        for row in range(min_row, max_row + 1):
+            for col in range(min_col, max_col + 1):
+                members = self._cells.get((row, col))
+                if members:
+                    yield from members
+
+    def bbox(self, min_lat, min_lng, max_lat, max_lng, limit=None, **filters):
+        """Entries inside the box, ordered by id"""
+        with self._lock:
+            found = []
+            for key in self._candidates(min_lat, min_lng, max_lat, max_lng):
+                entry = self._entries[key]
+                if min_lat <= entry['lat'] <= max_lat and min_lng <= entry['lng'] <= max_lng and _matches(entry, filters):
+                    found.append(entry)
+        found.sort(key=lambda entry: entry['id'])
+        return found[:limit] if limit else found
+
+    def near(self, lat, lng, radius_km, limit=None, **filters):
+        """(distance_km, entry) pairs within radius_km of the point, nearest first"""
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        dlng = radius_km / (KM_PER_DEGREE_LAT * max(math.cos(math.radians(lat)), 1e-6))
+        with self._lock:
+            found = []
+            for key in self._candidates(lat - dlat, lng - dlng, lat + dlat, lng + dlng):
+                entry = self._entries[key]
+                if not _matches(entry, filters):
+                    continue
+                distance = haversine_km(lat, lng, entry['lat'], entry['lng'])
+                if distance <= radius_km:
+                    found.append((distance, entry))
+        found.sort(key=lambda pair: (pair[0], pair[1]['id']))
+        return found[:limit] if limit else found
@@ -0,0 +1,143 @@
+"""Per-request SQL and template timing.
+
+For every request this records the number of SQL statements, the time spent
+executing them, the slowest statements and the template render time. The
+totals are sent back as a Server-Timing header (shown in the browser's
+network panel) and requests slower than SLOW_REQUEST_THRESHOLD_MS are written
+as one JSON line each to the ``slow_requests`` logger.
+
+Streamed responses are rendered after the response headers are sent, so their
+Server-Timing header only covers the work done before the first byte; their
+slow-request line is written when the stream is closed and covers all of it.
+"""
+import json
+import logging
+import time
+
+from flask import before_render_template, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+
+slow_request_log = logging.getLogger('slow_requests')
+
+
+class RequestMetrics:
+    def __init__(self, slowest_kept):
+        self.started_at = time.perf_counter()
+        self.query_count = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.slowest = []  # (duration, statement), longest first
+        self.slowest_kept = slowest_kept
+        self._render_started_at = None
+
+    def record_query(self, statement, duration):
+        self.query_count += 1
+        self.db_time += duration
+        if len(self.slowest) < self.slowest_kept or duration > self.slowest[-1][0]:
+            self.slowest.append((duration, statement))
+            self.slowest.sort(key=lambda entry: entry[0], reverse=True)
+            del self.slowest[self.slowest_kept:]
+
+    def server_timing(self, total):
+        return ', '.join([
+            f'db;dur={self.db_time * 1000:.1f};desc="{self.query_count} queries"',
+            f'render;dur={self.render_time * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+
+def _current_metrics():
+    if has_request_context():
+        return g.get('request_metrics')
+    return None
+
+
+def instrument_engine(engine):
+    """Record the statements executed on engine in the current request's metrics"""
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _start_statement_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('statement_started_at', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _stop_statement_timer(conn, cursor, statement, parameters, context, executemany):
+        started_at = conn.info['statement_started_at'].pop()
+        metrics = _current_metrics()
+        if metrics is not None:
+            metrics.record_query(statement, time.perf_counter() - started_at)
+
+    @event.listens_for(engine, 'handle_error')
+    def _drop_statement_timer(exception_context):
+        timers = exception_context.connection.info.get('statement_started_at') if exception_context.connection else None
+        if timers:
+            timers.pop()
+
+
+def init_app(app, engine):
+    """Install the request hooks on app and the statement timers on engine"""
+    app.config.setdefault('SERVER_TIMING', True)
+    app.config.setdefault('SLOW_REQUEST_THRESHOLD_MS', 500.0)
+    app.config.setdefault('SLOW_REQUEST_LOG', None)
+    app.config.setdefault('SLOW_REQUEST_STATEMENTS', 5)
+
+    if app.config['SLOW_REQUEST_LOG']:
+        handler = logging.FileHandler(app.config['SLOW_REQUEST_LOG'])
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        slow_request_log.addHandler(handler)
+        slow_request_log.setLevel(logging.WARNING)
+
+    instrument_engine(engine)
+
+    def _start_render(sender, template, context, **extra):
+        metrics = _current_metrics()
+        if metrics is not None:
+            metrics._render_started_at = time.perf_counter()
+
+    def _stop_render(sender, template, context, **extra):
+        metrics = _current_metrics()
+        if metrics is not None and metrics._render_started_at is not None:
+            metrics.render_time += time.perf_counter() - metrics._render_started_at
+            metrics._render_started_at = None
+
+    before_render_template.connect(_start_render, app, weak=False)
+    template_rendered.connect(_stop_render, app, weak=False)
+
+    @app.before_request
+    def _start_request_metrics():
+        g.request_metrics = RequestMetrics(app.config['SLOW_REQUEST_STATEMENTS'])
+
+    def _log_slow_request(metrics, details):
+        total = time.perf_counter() - metrics.started_at
+        if total * 1000 >= app.config['SLOW_REQUEST_THRESHOLD_MS']:
+            slow_request_log.warning(json.dumps(dict(
+                details,
+                total_ms=round(total * 1000, 1),
+                db_ms=round(metrics.db_time * 1000, 1),
+                render_ms=round(metrics.render_time * 1000, 1),
+                queries=metrics.query_count,
+                slowest=[
+                    {'ms': round(duration * 1000, 1), 'sql': statement}
+                    for duration, statement in metrics.slowest
+                ],
+            )))
+
+    @app.after_request
+    def _report_request_metrics(response):
+        metrics = g.get('request_metrics')
+        if metrics is None:
+            return response
+        if app.config['SERVER_TIMING']:
+            response.headers['Server-Timing'] = metrics.server_timing(time.perf_counter() - metrics.started_at)
+        details = {
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+        }
+        if response.is_streamed:
+            # Keep collecting while the body is generated; log once it has been sent
+            details['streamed'] = True
+            response.call_on_close(lambda: _log_slow_request(metrics, details))
+        else:
+            g.pop('request_metrics', None)
+            _log_slow_request(metrics, details)
+        return response
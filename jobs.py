@@ -0,0 +1,268 @@
+"""In-process background jobs recorded in a table of the application database.
+
+JobRunner runs registered functions on a thread pool inside the web process,
+so heavy operations need no broker or separate worker. Each submitted job is
+a row that moves from queued to running and then to succeeded, failed or
+cancelled. The row also holds the JSON parameters, the JSON result or the
+error, and the final progress. Any worker can answer a status request from
+the table.
+
+Progress of a running job is kept in the memory of the process running it.
+Writing progress from another connection would wait on the job's own write
+transaction under SQLite's single-writer lock. Cancellation is cooperative:
+the job sees it the next time it reports progress and stops with
+JobCancelled. Its session is then rolled back. Work it committed earlier
+stays committed.
+
+With ``JOB_WORKERS=0`` submit() runs the job inline before returning, which
+is how tests and CLI commands use it.
+"""
+import json
+import os
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+JOB_STATES = ('queued', 'running', 'succeeded', 'failed', 'cancelled')
+FINISHED_STATES = ('succeeded', 'failed', 'cancelled')
+WORKER = f'{socket.gethostname()}:{os.getpid()}'
+
+
+class JobCancelled(Exception):
+    """Raised inside a job by JobContext.progress() once cancellation was requested"""
+
+
+class UnknownJobKind(ValueError):
+    """No job function is registered under this kind"""
+
+
+class JobContext:
+    """Handed to a job function as its first argument"""
+
+    def __init__(self, runner, job_id):
+        self.runner = runner
+        self.job_id = job_id
+        self.done = 0
+        self.total = None
+        self.message = None
+        self.cancel_requested = threading.Event()
+        self._checked_at = time.monotonic()
+
+    def progress(self, done, total=None, message=None):
+        """Record progress; raises JobCancelled when the job was cancelled"""
+        self.done = done
+        if total is not None:
+            self.total = total
+        if message is not None:
+            self.message = message
+        # A cancel sent to another worker only reaches the table; look there now and then
+        if not self.cancel_requested.is_set() and time.monotonic() - self._checked_at >= self.runner.cancel_check_interval:
+            self._checked_at = time.monotonic()
+            if self.runner.cancel_requested_in_table(self.job_id):
+                self.cancel_requested.set()
+        if self.cancel_requested.is_set():
+            raise JobCancelled(f'Cancelled after {done} of {self.total or "?"}')
+
+    def iterate(self, items, total=None, every=500, message=None):
+        """Yield items, reporting progress every `every` items"""
+        count = 0
+        self.progress(0, total, message)
+        for item in items:
+            yield item
+            count += 1
+            if count % every == 0:
+                self.progress(count)
+        self.progress(count)
+
+
+class JobRunner:
+    """Runs job functions registered with task() on a thread pool and records them in ``model``"""
+
+    def __init__(self, app, db, model, cancel_check_interval=1.0):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.cancel_check_interval = cancel_check_interval
+        self._tasks = {}
+        self._cleanups = {}
+        self._on_start = []
+        self._live = {}  # job_id -> JobContext of jobs queued or running in this process
+        self._futures = {}
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def task(self, kind, cleanup=None):
+        """Register a job function func(job, **params) that returns a JSON-serializable result.
+
+        ``cleanup(**params)`` runs once the job has ended, whether it ran or
+        was cancelled while still queued, e.g. to delete an uploaded file.
+        """
+        def register(func):
+            self._tasks[kind] = func
+            if cleanup is not None:
+                self._cleanups[kind] = cleanup
+            return func
+        return register
+
+    def on_start(self, func):
+        """Register func() to run in each process when its job threads start, e.g. to sweep old files"""
+        self._on_start.append(func)
+        return func
+
+    def _clean_up(self, kind, params):
+        cleanup = self._cleanups.get(kind)
+        if cleanup is not None:
+            try:
+                cleanup(**json.loads(params or '{}'))
+            except Exception:
+                self.app.logger.exception('Cleanup of a %s job failed', kind)
+
+    @property
+    def kinds(self):
+        return sorted(self._tasks)
+
+    def _pool(self):
+        # Started on first use, so forking servers create the threads in each worker
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.app.config['JOB_WORKERS'],
+                                                    thread_name_prefix='job')
+                for func in self._on_start:
+                    self._executor.submit(self._start_hook, func)
+            return self._executor
+
+    def _start_hook(self, func):
+        with self.app.app_context():
+            try:
+                func()
+            except Exception:
+                self.app.logger.exception('Job runner start hook %s failed', func.__name__)
+
+    def submit(self, kind, **params):
+        """Record a queued job and start it; returns the job row"""
+        if kind not in self._tasks:
+            raise UnknownJobKind(f"Unknown job kind {kind}; use one of {', '.join(self.kinds)}")
+        session = self.db.session
+        job = self.model(kind=kind, status='queued', params=json.dumps(params), worker=WORKER)
+        session.add(job)
+        session.commit()
+        job_id = job.id
+        self._live[job_id] = JobContext(self, job_id)
+        if self.app.config['JOB_WORKERS'] > 0:
+            self._futures[job_id] = self._pool().submit(self._run, job_id)
+        else:
+            self._run(job_id)
+            session.refresh(job)
+        return job
+
+    def cancel(self, job):
+        """Ask a job to stop. A job still waiting in this process's queue stops at once. Returns the new status."""
+        if job.status in FINISHED_STATES:
+            return job.status
+        job.cancel_requested = True
+        context = self._live.get(job.id)
+        if context is not None:
+            context.cancel_requested.set()
+        future = self._futures.get(job.id)
+        cancelled = job.status == 'queued' and future is not None and future.cancel()
+        if cancelled:
+            self._forget(job.id)
+            job.status = 'cancelled'
+            job.finished_at = datetime.utcnow()
+        self.db.session.commit()
+        if cancelled:
+            self._clean_up(job.kind, job.params)
+        return job.status
+
+    def live_progress(self, job_id):
+        """(done, total, message) of a job queued or running in this process, else None"""
+        context = self._live.get(job_id)
+        if context is None:
+            return None
+        return context.done, context.total, context.message
+
+    def expire_orphan(self, job):
+        """Mark an unfinished job whose process on this host has exited as failed; returns True if it was"""
+        if not self._is_orphaned(job):
+            return False
+        # Conditional, in case the job finished after it was read
+        expired = self.db.session.execute(
+            update(self.model).where(self.model.id == job.id, self.model.status.in_(('queued', 'running')))
+            .values(status='failed', error='Interrupted: the worker running it has stopped',
+                    finished_at=datetime.utcnow())
+        ).rowcount
+        self.db.session.commit()
+        if expired:
+            self._clean_up(job.kind, job.params)
+        return bool(expired)
+
+    def _is_orphaned(self, job):
+        if job.status in FINISHED_STATES or not job.worker:
+            return False
+        host, _, pid = job.worker.rpartition(':')
+        if host != socket.gethostname() or not pid.isdigit():
+            return False
+        if job.worker == WORKER:
+            return job.id not in self._live
+        try:
+            os.kill(int(pid), 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass
+        return False
+
+    def cancel_requested_in_table(self, job_id):
+        with self.db.engine.connect() as connection:
+            return bool(connection.scalar(select(self.model.cancel_requested).where(self.model.id == job_id)))
+
+    def _forget(self, job_id):
+        self._live.pop(job_id, None)
+        self._futures.pop(job_id, None)
+
+    def _run(self, job_id):
+        with self.app.app_context():
+            session = self.db.session
+            context = self._live[job_id]
+            ended = None  # (kind, params) once this run owns the job
+            try:
+                job = session.get(self.model, job_id)
+                if job is None or job.status != 'queued':
+                    return
+                ended = (job.kind, job.params)
+                if job.cancel_requested or context.cancel_requested.is_set():
+                    job.status = 'cancelled'
+                else:
+                    job.status = 'running'
+                    job.started_at = datetime.utcnow()
+                    job.worker = WORKER
+                    session.commit()
+                    try:
+                        result = self._tasks[job.kind](context, **json.loads(job.params or '{}'))
+                        session.commit()
+                    except JobCancelled as e:
+                        session.rollback()
+                        job.status = 'cancelled'
+                        job.error = str(e)
+                    except Exception as e:
+                        session.rollback()
+                        self.app.logger.exception('Job %s (%s) failed', job_id, job.kind)
+                        job.status = 'failed'
+                        job.error = str(e)
+                    else:
+                        job.status = 'succeeded'
+                        job.result = json.dumps(result)
+                job.progress_done = context.done
+                job.progress_total = context.total
+                job.progress_message = context.message
+                job.finished_at = datetime.utcnow()
+                session.commit()
+            finally:
+                self._forget(job_id)
+                session.remove()
+                if ended is not None:
+                    self._clean_up(*ended)
@@ -0,0 +1,88 @@
+"""Add indexes for scheduling and pricing lookups
+
+Revision ID: 3b9d2e7f41a6
+Revises: 6625c4fe8845
+Create Date: 2026-10-17 10:12:44.318205
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9d2e7f41a6'
+down_revision = '6625c4fe8845'
+branch_labels = None
+depends_on = None
+
+
+def delete_duplicates(table, columns):
+    """Keep only the newest row (highest id) of each key the unique index will cover"""
+    key = ', '.join(columns)
+    not_null = ' AND '.join(f'{column} IS NOT NULL' for column in columns)
+    op.execute(f'DELETE FROM {table} WHERE {not_null} AND id NOT IN '
+               f'(SELECT MAX(id) FROM {table} WHERE {not_null} GROUP BY {key})')
+
+
+def check_unique(table, columns):
+    """Abort before any index is created when rows that other rows depend on share a key"""
+    key = ', '.join(columns)
+    duplicates = op.get_bind().execute(sa.text(
+        f'SELECT COUNT(*) FROM (SELECT 1 FROM {table} '
+        f"WHERE {' AND '.join(f'{column} IS NOT NULL' for column in columns)} "
+        f'GROUP BY {key} HAVING COUNT(*) > 1)'
+    )).scalar()
+    if duplicates:
+        raise RuntimeError(
+            f'{duplicates} ({key}) values occur more than once in {table}; merge those rows by hand, then run '
+            f'the upgrade again. Find them with: SELECT {key}, COUNT(*) FROM {table} GROUP BY {key} HAVING COUNT(*) > 1'
+        )
+
+
+def upgrade():
+    # Bookings own schedule rows and imported kampanijos may be referenced, so those are not merged automatically
+    check_unique('screen_booking', ['dooh_plan_id', 'screen_id'])
+    check_unique('kampanija', ['external_id'])
+    # Repeated schedule and pricing cells were overwritten by every later save; the newest row is the one shown
+    delete_duplicates('screen_slot', ['booking_id', 'date', 'hour'])
+    delete_duplicates('media_plan_pricing', ['dooh_plan_id', 'screen_id', 'date', 'hour'])
+
+    with op.batch_alter_table('screen_slot', schema=None) as batch_op:
+        batch_op.create_index('ix_screen_slot_booking_date_hour', ['booking_id', 'date', 'hour'], unique=True)
+
+    with op.batch_alter_table('media_plan_pricing', schema=None) as batch_op:
+        batch_op.create_index('ix_media_plan_pricing_plan_screen_week', ['dooh_plan_id', 'screen_id', 'week_number'], unique=False)
+        batch_op.create_index('ix_media_plan_pricing_plan_screen_date_hour', ['dooh_plan_id', 'screen_id', 'date', 'hour'], unique=True)
+
+    with op.batch_alter_table('screen_booking', schema=None) as batch_op:
+        batch_op.create_index('ix_screen_booking_plan_screen', ['dooh_plan_id', 'screen_id'], unique=True)
+
+    with op.batch_alter_table('campaign', schema=None) as batch_op:
+        batch_op.create_index('ix_campaign_client_id_name', ['client_id', 'name'], unique=False)
+
+    with op.batch_alter_table('kampanija', schema=None) as batch_op:
+        batch_op.create_index('ix_kampanija_external_id', ['external_id'], unique=True)
+
+    with op.batch_alter_table('client', schema=None) as batch_op:
+        batch_op.create_index('ix_client_company_name', ['company', 'name'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('client', schema=None) as batch_op:
+        batch_op.drop_index('ix_client_company_name')
+
+    with op.batch_alter_table('kampanija', schema=None) as batch_op:
+        batch_op.drop_index('ix_kampanija_external_id')
+
+    with op.batch_alter_table('campaign', schema=None) as batch_op:
+        batch_op.drop_index('ix_campaign_client_id_name')
+
+    with op.batch_alter_table('screen_booking', schema=None) as batch_op:
+        batch_op.drop_index('ix_screen_booking_plan_screen')
+
+    with op.batch_alter_table('media_plan_pricing', schema=None) as batch_op:
+        batch_op.drop_index('ix_media_plan_pricing_plan_screen_date_hour')
+        batch_op.drop_index('ix_media_plan_pricing_plan_screen_week')
+
+    with op.batch_alter_table('screen_slot', schema=None) as batch_op:
+        batch_op.drop_index('ix_screen_slot_booking_date_hour')
@@ -0,0 +1,47 @@
+"""Add media_plan_daily_total rollup table
+
+Revision ID: a84c1f09d2e3
+Revises: 3b9d2e7f41a6
+Create Date: 2026-10-17 11:03:27.640912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a84c1f09d2e3'
+down_revision = '3b9d2e7f41a6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('media_plan_daily_total',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('dooh_plan_id', sa.Integer(), nullable=False),
+    sa.Column('screen_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('total_price', sa.Float(), nullable=True),
+    sa.Column('total_contacts', sa.Float(), nullable=True),
+    sa.Column('slot_count', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['dooh_plan_id'], ['dooh_plan.id'], ),
+    sa.ForeignKeyConstraint(['screen_id'], ['screen.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('media_plan_daily_total', schema=None) as batch_op:
+        batch_op.create_index('ix_media_plan_daily_total_plan_screen_date', ['dooh_plan_id', 'screen_id', 'date'], unique=True)
+
+    # Populate the rollups from the existing pricing rows
+    op.execute(
+        'INSERT INTO media_plan_daily_total (dooh_plan_id, screen_id, date, total_price, total_contacts, slot_count) '
+        'SELECT dooh_plan_id, screen_id, date, COALESCE(SUM(calculated_price), 0), COALESCE(SUM(contacts), 0), COUNT(id) '
+        'FROM media_plan_pricing GROUP BY dooh_plan_id, screen_id, date'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('media_plan_daily_total', schema=None) as batch_op:
+        batch_op.drop_index('ix_media_plan_daily_total_plan_screen_date')
+
+    op.drop_table('media_plan_daily_total')
@@ -0,0 +1,26 @@
+"""Add version counter to DOOHPlan
+
+Revision ID: c27e5a1b9f40
+Revises: a84c1f09d2e3
+Create Date: 2026-10-17 12:21:05.118734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c27e5a1b9f40'
+down_revision = 'a84c1f09d2e3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('dooh_plan', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('dooh_plan', schema=None) as batch_op:
+        batch_op.drop_column('version')
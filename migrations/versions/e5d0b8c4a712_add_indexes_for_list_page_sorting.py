@@ -0,0 +1,58 @@
+"""Add indexes for list page sorting and filtering
+
+Revision ID: e5d0b8c4a712
+Revises: c27e5a1b9f40
+Create Date: 2026-10-17 13:04:52.631207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e5d0b8c4a712'
+down_revision = 'c27e5a1b9f40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('screen', schema=None) as batch_op:
+        batch_op.create_index('ix_screen_name', ['name'], unique=False)
+        batch_op.create_index('ix_screen_city', ['city'], unique=False)
+        batch_op.create_index('ix_screen_provider_id', ['provider_id'], unique=False)
+
+    with op.batch_alter_table('screen_provider', schema=None) as batch_op:
+        batch_op.create_index('ix_screen_provider_name', ['name'], unique=False)
+
+    with op.batch_alter_table('dooh_plan', schema=None) as batch_op:
+        batch_op.create_index('ix_dooh_plan_name', ['name'], unique=False)
+        batch_op.create_index('ix_dooh_plan_start_date', ['start_date'], unique=False)
+        batch_op.create_index('ix_dooh_plan_campaign_id', ['campaign_id'], unique=False)
+
+    with op.batch_alter_table('campaign', schema=None) as batch_op:
+        batch_op.create_index('ix_campaign_name', ['name'], unique=False)
+
+    with op.batch_alter_table('client', schema=None) as batch_op:
+        batch_op.create_index('ix_client_name', ['name'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('client', schema=None) as batch_op:
+        batch_op.drop_index('ix_client_name')
+
+    with op.batch_alter_table('campaign', schema=None) as batch_op:
+        batch_op.drop_index('ix_campaign_name')
+
+    with op.batch_alter_table('dooh_plan', schema=None) as batch_op:
+        batch_op.drop_index('ix_dooh_plan_campaign_id')
+        batch_op.drop_index('ix_dooh_plan_start_date')
+        batch_op.drop_index('ix_dooh_plan_name')
+
+    with op.batch_alter_table('screen_provider', schema=None) as batch_op:
+        batch_op.drop_index('ix_screen_provider_name')
+
+    with op.batch_alter_table('screen', schema=None) as batch_op:
+        batch_op.drop_index('ix_screen_provider_id')
+        batch_op.drop_index('ix_screen_city')
+        batch_op.drop_index('ix_screen_name')
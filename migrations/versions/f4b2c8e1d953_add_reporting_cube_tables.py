@@ -0,0 +1,100 @@
+"""Add reporting cube tables
+
+Revision ID: f4b2c8e1d953
+Revises: e5d0b8c4a712
+Create Date: 2026-10-17 15:42:18.207315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4b2c8e1d953'
+down_revision = 'e5d0b8c4a712'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('report_daily_fact',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('dooh_plan_id', sa.Integer(), nullable=False),
+    sa.Column('screen_id', sa.Integer(), nullable=False),
+    sa.Column('date', sa.Date(), nullable=False),
+    sa.Column('campaign_id', sa.Integer(), nullable=False),
+    sa.Column('client_id', sa.Integer(), nullable=False),
+    sa.Column('provider_id', sa.Integer(), nullable=False),
+    sa.Column('city', sa.String(length=100), nullable=True),
+    sa.Column('week_start', sa.Date(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('revenue', sa.Float(), nullable=True),
+    sa.Column('contacts', sa.Float(), nullable=True),
+    sa.Column('slot_count', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['campaign_id'], ['campaign.id'], ),
+    sa.ForeignKeyConstraint(['client_id'], ['client.id'], ),
+    sa.ForeignKeyConstraint(['dooh_plan_id'], ['dooh_plan.id'], ),
+    sa.ForeignKeyConstraint(['provider_id'], ['screen_provider.id'], ),
+    sa.ForeignKeyConstraint(['screen_id'], ['screen.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('report_daily_fact', schema=None) as batch_op:
+        batch_op.create_index('ix_report_daily_fact_plan_screen_date', ['dooh_plan_id', 'screen_id', 'date'], unique=True)
+        batch_op.create_index('ix_report_daily_fact_date', ['date'], unique=False)
+
+    op.create_table('report_monthly_fact',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('dooh_plan_id', sa.Integer(), nullable=False),
+    sa.Column('screen_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('campaign_id', sa.Integer(), nullable=False),
+    sa.Column('client_id', sa.Integer(), nullable=False),
+    sa.Column('provider_id', sa.Integer(), nullable=False),
+    sa.Column('city', sa.String(length=100), nullable=True),
+    sa.Column('revenue', sa.Float(), nullable=True),
+    sa.Column('contacts', sa.Float(), nullable=True),
+    sa.Column('slot_count', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['campaign_id'], ['campaign.id'], ),
+    sa.ForeignKeyConstraint(['client_id'], ['client.id'], ),
+    sa.ForeignKeyConstraint(['dooh_plan_id'], ['dooh_plan.id'], ),
+    sa.ForeignKeyConstraint(['provider_id'], ['screen_provider.id'], ),
+    sa.ForeignKeyConstraint(['screen_id'], ['screen.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('report_monthly_fact', schema=None) as batch_op:
+        batch_op.create_index('ix_report_monthly_fact_plan_screen_month', ['dooh_plan_id', 'screen_id', 'month'], unique=True)
+        batch_op.create_index('ix_report_monthly_fact_month', ['month'], unique=False)
+
+    # Populate the cube from the existing daily rollups; weeks start on Monday (strftime %w is 0 on Sunday)
+    op.execute(
+        'INSERT INTO report_daily_fact (dooh_plan_id, screen_id, date, campaign_id, client_id, provider_id, city, '
+        'week_start, month, revenue, contacts, slot_count) '
+        "SELECT t.dooh_plan_id, t.screen_id, t.date, p.campaign_id, c.client_id, s.provider_id, s.city, "
+        "date(t.date, '-' || ((CAST(strftime('%w', t.date) AS INTEGER) + 6) % 7) || ' days'), "
+        "date(t.date, 'start of month'), COALESCE(t.total_price, 0), COALESCE(t.total_contacts, 0), COALESCE(t.slot_count, 0) "
+        'FROM media_plan_daily_total t '
+        'JOIN dooh_plan p ON p.id = t.dooh_plan_id '
+        'JOIN campaign c ON c.id = p.campaign_id '
+        'JOIN screen s ON s.id = t.screen_id'
+    )
+    op.execute(
+        'INSERT INTO report_monthly_fact (dooh_plan_id, screen_id, month, campaign_id, client_id, provider_id, city, '
+        'revenue, contacts, slot_count) '
+        'SELECT dooh_plan_id, screen_id, month, campaign_id, client_id, provider_id, city, '
+        'SUM(revenue), SUM(contacts), SUM(slot_count) '
+        'FROM report_daily_fact '
+        'GROUP BY dooh_plan_id, screen_id, month, campaign_id, client_id, provider_id, city'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('report_monthly_fact', schema=None) as batch_op:
+        batch_op.drop_index('ix_report_monthly_fact_month')
+        batch_op.drop_index('ix_report_monthly_fact_plan_screen_month')
+
+    op.drop_table('report_monthly_fact')
+    with op.batch_alter_table('report_daily_fact', schema=None) as batch_op:
+        batch_op.drop_index('ix_report_daily_fact_date')
+        batch_op.drop_index('ix_report_daily_fact_plan_screen_date')
+
+    op.drop_table('report_daily_fact')
@@ -0,0 +1,93 @@
+"""In-memory index of booked ad slots per screen, day and hour across all plans.
+
+Every screen with bookings keeps one array of 24 hourly counters per booked
+day, summed over all plans. Checking whether a screen has room for a range of
+days and hours reads only these counters. Availability searches and conflict
+checks on save therefore never scan ScreenSlot.
+"""
+import threading
+import time
+from array import array
+
+
+class SlotCapacityError(ValueError):
+    """A schedule change would book more slots than a screen hour can hold"""
+
+    def __init__(self, conflicts, capacity):
+        self.conflicts = conflicts  # [(screen_id, day, hour, booked, requested)]
+        self.capacity = capacity
+        screen_id, day, hour, booked, requested = conflicts[0]
+        more = f' and {len(conflicts) - 1} more' if len(conflicts) > 1 else ''
+        super().__init__(f'Screen {screen_id} has {max(capacity - booked, 0)} of {capacity} slots free '
+                         f'on {day:%Y-%m-%d} {hour:02d}:00, {requested} more requested{more}')
+
+    def to_json(self):
+        return [{'screen_id': screen_id, 'date': day.isoformat(), 'hour': hour, 'booked': booked,
+                 'requested': requested, 'free': max(self.capacity - booked, 0)}
+                for screen_id, day, hour, booked, requested in self.conflicts]
+
+
+class OccupancyIndex:
+    """Booked slot counters: screen_id -> {date: array of 24 hourly counts}"""
+
+    def __init__(self):
+        self._screens = {}
+        self._lock = threading.RLock()
+        self.built_at = None  # time.monotonic() of the last full load, None when stale
+
+    def replace_all(self, rows):
+        """Swap in counters from (screen_id, date, hour, slots) rows"""
+        screens = {}
+        for screen_id, day, hour, slots in rows:
+            if slots and 0 <= hour < 24:
+                days = screens.setdefault(screen_id, {})
+                counts = days.get(day)
+                if counts is None:
+                    counts = days[day] = array('l', [0]) * 24
+                counts[hour] += slots
+        with self._lock:
+            self._screens = screens
+            self.built_at = time.monotonic()
+
+    def mark_stale(self):
+        self.built_at = None
+
+    def is_fresh(self, ttl):
+        return self.built_at is not None and time.monotonic() - self.built_at < ttl
+
+    def add(self, screen_id, day, hour, delta):
+        with self._lock:
+            days = self._screens.setdefault(screen_id, {})
+            counts = days.get(day)
+            if counts is None:
+                counts = days[day] = array('l', [0]) * 24
+            counts[hour] = max(counts[hour] + delta, 0)
+            if not any(counts):
+                del days[day]
+                if not days:
+                    del self._screens[screen_id]
+
+    def booked(self, screen_id, day, hour):
+        counts = self._screens.get(screen_id, {}).get(day)
+        return counts[hour] if counts is not None else 0
+
+    def peak(self, screen_id, start, end, hours):
+        """Most slots booked in any of the hours on any day from start to end"""
+        days = self._screens.get(screen_id)
+        if not days:
+            return 0
+        peak = 0
+        for day, counts in list(days.items()):
+            if start <= day <= end:
+                peak = max(peak, max(counts[hour] for hour in hours))
+        return peak
+
+    def conflicts(self, deltas, capacity):
+        """(screen_id, day, hour, booked, requested) of every increase in deltas that exceeds capacity"""
+        found = []
+        for (screen_id, day, hour), delta in sorted(deltas.items()):
+            if delta > 0:
+                booked = self.booked(screen_id, day, hour)
+                if booked + delta > capacity:
+                    found.append((screen_id, day, hour, booked, delta))
+        return found
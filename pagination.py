@@ -0,0 +1,95 @@
+"""Keyset (cursor) pagination for the list pages and their JSON endpoints.
+
+A page is fetched as "the next per_page rows after the last row seen", using
+the row's sort values as the cursor instead of an OFFSET. With an index on the
+sort columns every page costs the same, however deep the client pages.
+
+The sort columns must end with a unique column (normally the primary key) so
+that rows with equal sort values are neither skipped nor repeated.
+"""
+import base64
+import json
+from datetime import date, datetime
+
+from sqlalchemy import literal, tuple_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    """The cursor was not produced by this sort order"""
+
+
+class Page:
+    def __init__(self, items, next_cursor, per_page):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.per_page = per_page
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def parse_per_page(value, default=DEFAULT_PAGE_SIZE):
+    """Clamp a per_page query argument to 1..MAX_PAGE_SIZE"""
+    try:
+        per_page = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(per_page, MAX_PAGE_SIZE))
+
+
+def encode_cursor(values):
+    raw = json.dumps([v.isoformat() if isinstance(v, (date, datetime)) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    """Turn a cursor back into bind values for the given sort columns"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        raise InvalidCursor(f'Invalid cursor: {cursor}')
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise InvalidCursor(f'Invalid cursor: {cursor}')
+    return [_restore(column, value) for column, value in zip(columns, values)]
+
+
+def _restore(column, value):
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if value is not None and python_type in (date, datetime):
+        try:
+            return python_type.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise InvalidCursor(f'Invalid cursor value: {value}')
+    return value
+
+
+def keyset_page(query, order_columns, cursor=None, per_page=DEFAULT_PAGE_SIZE, descending=False):
+    """Fetch the page of query that follows cursor.
+
+    ``order_columns`` are the sort columns/expressions, all sorted in the same
+    direction and ending with a unique column. Their values are selected next
+    to each row so the cursor can be built without touching the items.
+    """
+    if cursor:
+        values = decode_cursor(cursor, order_columns)
+        key = tuple_(*order_columns)
+        after = tuple_(*[literal(v, c.type) for c, v in zip(order_columns, values)])
+        query = query.filter(key < after if descending else key > after)
+
+    query = query.add_columns(*order_columns)
+    query = query.order_by(*[c.desc() if descending else c.asc() for c in order_columns])
+    rows = query.limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(rows[-1][1:])
+    return Page([row[0] for row in rows], next_cursor, per_page)
@@ -0,0 +1,231 @@
+"""Server-side pricing engine for DOOH media plans.
+
+Uses the same formula as the media plan editor:
+
+    SUM   = contacts * selected_value / 30 * 2
+    kaina = contacts * 1 * SUM
+
+where contacts are thousands of contacts from the screen's ScreenPricing
+rate card for the given hour and weekday. All cells of a plan are flattened
+into column lists and priced in one pass, then aggregated per week, booking,
+day and screen.
+"""
+import math
+from array import array
+from datetime import timedelta
+
+DAY_NAMES = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+PLAN_HOURS = range(6, 24)
+
+
+def week_start(day):
+    """Return the Monday of the week containing the given date"""
+    return day - timedelta(days=day.weekday())
+
+
+def count_weeks(start_date, end_date):
+    """Number of calendar weeks (Monday-Sunday) spanned by a plan"""
+    return (week_start(end_date) - week_start(start_date)).days // 7 + 1
+
+
+def week_day_date(start_date, end_date, week_number, day_name):
+    """Date of a plan week/day pair, or None when it falls outside the plan"""
+    day = week_start(start_date) + timedelta(days=(week_number - 1) * 7 + DAY_NAMES.index(day_name))
+    if start_date <= day <= end_date:
+        return day
+    return None
+
+
+def parse_booking_key(key):
+    """Split a '<booking_id>_w<week>' key into (booking_id, week_number)"""
+    booking_id, week_number = key.split('_w')
+    return int(booking_id), int(week_number)
+
+
+class RateCard:
+    """One screen's ScreenPricing rows packed into flat float arrays.
+
+    ``contacts`` holds 24 x 7 values at ``hour * 7 + weekday`` and ``prices``
+    one value per hour. Missing values are stored as NaN and ``hours`` is a
+    bitmask of the hours that have a row at all.
+    """
+    __slots__ = ('contacts', 'prices', 'hours')
+
+    def __init__(self):
+        self.contacts = array('d', [math.nan]) * (24 * 7)
+        self.prices = array('d', [math.nan]) * 24
+        self.hours = 0
+
+    def set_hour(self, hour, price, day_contacts):
+        self.hours |= 1 << hour
+        self.prices[hour] = math.nan if price is None else price
+        for d, value in enumerate(day_contacts):
+            self.contacts[hour * 7 + d] = math.nan if value is None else value
+
+    def contacts_at(self, hour, day_index):
+        """Contacts used for pricing; missing values count as 0"""
+        value = self.contacts[hour * 7 + day_index]
+        return 0.0 if math.isnan(value) else value
+
+    def has_hour(self, hour):
+        return bool(self.hours >> hour & 1)
+
+    def row(self, hour):
+        """The hour as a ScreenPricing-shaped dict (None for missing values), or None without a row"""
+        if not self.has_hour(hour):
+            return None
+        values = {'hour': hour, 'price': _value(self.prices[hour])}
+        for d, day_name in enumerate(DAY_NAMES):
+            values[f'contacts_{day_name}'] = _value(self.contacts[hour * 7 + d])
+        return values
+
+    def rows(self):
+        return [self.row(hour) for hour in range(24) if self.has_hour(hour)]
+
+
+def _value(packed):
+    return None if math.isnan(packed) else packed
+
+
+EMPTY_RATE_CARD = RateCard()
+
+
+def build_rate_cards(pricing_rows):
+    """Pack ScreenPricing rows (or rows with the same columns) into {screen_id: RateCard}"""
+    cards = {}
+    for row in pricing_rows:
+        card = cards.get(row.screen_id)
+        if card is None:
+            card = cards[row.screen_id] = RateCard()
+        card.set_hour(row.hour, row.price, [getattr(row, f'contacts_{day}') for day in DAY_NAMES])
+    return cards
+
+
+def compute_prices(contacts, selected_values):
+    """Apply the price formula element-wise over two equally sized columns"""
+    return [
+        c * 1 * (c * v / 30 * 2) if v > 0 and c > 0 else 0.0
+        for c, v in zip(contacts, selected_values)
+    ]
+
+
+def _cpt(total_price, total_slots):
+    return total_price / total_slots if total_slots else 0.0
+
+
+def empty_week():
+    """Totals structure for a booking week with nothing selected"""
+    return {
+        'cells': {},
+        'day_totals': dict.fromkeys(DAY_NAMES, 0.0),
+        'day_slots': dict.fromkeys(DAY_NAMES, 0),
+        'total_price': 0.0,
+        'total_slots': 0,
+        'cpt': 0.0,
+    }
+
+
+def price_plan(plan, bookings, rate_cards, selections):
+    """Price every selected cell of a plan in one batch.
+
+    ``bookings`` maps booking_id -> screen_id, ``rate_cards`` comes from
+    build_rate_cards() and ``selections`` has the same shape as the editor's
+    saved_pricing: {'<booking_id>_w<week>': {'<hour>_<day>': selected_value}}.
+    Cells outside the plan dates are ignored. Raises ValueError on malformed
+    keys or values and on weeks outside the plan.
+    """
+    if not isinstance(selections, dict):
+        raise ValueError('selections must be an object of booking weeks')
+    plan_weeks = count_weeks(plan.start_date, plan.end_date)
+    week_dates = {}
+
+    # Flatten all selected cells into columns
+    keys, booking_ids, screen_ids, cell_keys, day_idx, dates, values, contacts = ([] for _ in range(8))
+    for key, cells in selections.items():
+        try:
+            booking_id, week_number = parse_booking_key(key)
+        except (AttributeError, ValueError):
+            raise ValueError(f'Invalid booking key: {key}')
+        if booking_id not in bookings:
+            raise ValueError(f'Booking {booking_id} is not part of this plan')
+        if not 1 <= week_number <= plan_weeks:
+            raise ValueError(f'Week {week_number} is outside the plan (weeks 1-{plan_weeks})')
+        if not isinstance(cells, dict):
+            raise ValueError(f'Cells for {key} must be an object')
+        screen_id = bookings[booking_id]
+        card = rate_cards.get(screen_id, EMPTY_RATE_CARD)
+
+        # Date strings of this week's days (None outside the plan), shared by all bookings
+        dates_of_week = week_dates.get(week_number)
+        if dates_of_week is None:
+            dates_of_week = week_dates[week_number] = []
+            for day_name in DAY_NAMES:
+                day = week_day_date(plan.start_date, plan.end_date, week_number, day_name)
+                dates_of_week.append(day.strftime('%Y-%m-%d') if day else None)
+
+        for cell_key, selected_value in cells.items():
+            try:
+                hour, day_name = cell_key.split('_')
+                hour = int(hour)
+                d = DAY_NAMES.index(day_name)
+                selected_value = int(selected_value or 0)
+            except (AttributeError, TypeError, ValueError):
+                raise ValueError(f'Invalid cell {cell_key} for {key}')
+            if not 0 <= hour < 24 or selected_value <= 0 or dates_of_week[d] is None:
+                continue
+
+            keys.append(key)
+            booking_ids.append(booking_id)
+            screen_ids.append(screen_id)
+            cell_keys.append(cell_key)
+            day_idx.append(d)
+            dates.append(dates_of_week[d])
+            values.append(selected_value)
+            contacts.append(card.contacts_at(hour, d))
+
+    prices = compute_prices(contacts, values)
+
+    # Aggregate per booking-week, booking, day and screen
+    weeks = {}
+    screens = {}
+    daily_totals = {}
+    daily_screen_totals = {}
+    for i, price in enumerate(prices):
+        week = weeks.get(keys[i])
+        if week is None:
+            week = weeks[keys[i]] = empty_week()
+        day_name = DAY_NAMES[day_idx[i]]
+        week['cells'][cell_keys[i]] = {
+            'selected_value': values[i],
+            'calculated_price': price,
+            'contacts': contacts[i],
+            'date': dates[i],
+        }
+        week['day_totals'][day_name] += price
+        week['day_slots'][day_name] += 1
+        week['total_price'] += price
+        week['total_slots'] += 1
+
+        screen = screens.get(booking_ids[i])
+        if screen is None:
+            screen = screens[booking_ids[i]] = {'screen_id': screen_ids[i], 'total_price': 0.0, 'total_slots': 0}
+        screen['total_price'] += price
+        screen['total_slots'] += 1
+
+        daily_totals[dates[i]] = daily_totals.get(dates[i], 0.0) + price
+        per_screen = daily_screen_totals.setdefault(screen_ids[i], {})
+        per_screen[dates[i]] = per_screen.get(dates[i], 0.0) + price
+
+    for totals in list(weeks.values()) + list(screens.values()):
+        totals['cpt'] = _cpt(totals['total_price'], totals['total_slots'])
+
+    total_price = sum(prices)
+    return {
+        'weeks': weeks,
+        'screens': screens,
+        'daily_totals': daily_totals,
+        'daily_screen_totals': daily_screen_totals,
+        'total_price': total_price,
+        'total_slots': len(prices),
+        'cpt': _cpt(total_price, len(prices)),
+    }
@@ -0,0 +1,54 @@
+"""SQL statement counting, used to keep views free of N+1 queries.
+
+    with max_queries(db.engine, 10):
+        client.get('/dooh-plans')
+
+raises QueryBudgetExceeded (an AssertionError) listing the statements when
+the block issues more than the given number of statements.
+"""
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A block issued more SQL statements than its budget allows"""
+
+
+class QueryCounter:
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+def _engines(engine):
+    return list(engine) if isinstance(engine, (list, tuple)) else [engine]
+
+
+@contextmanager
+def count_queries(engine):
+    """Record every statement executed on engine (or a list of engines) inside the block"""
+    counter = QueryCounter()
+    for each in _engines(engine):
+        event.listen(each, 'before_cursor_execute', counter._record)
+    try:
+        yield counter
+    finally:
+        for each in _engines(engine):
+            event.remove(each, 'before_cursor_execute', counter._record)
+
+
+@contextmanager
+def max_queries(engine, limit, label='block'):
+    """Fail when the block executes more than limit statements on engine (or a list of engines)"""
+    with count_queries(engine) as counter:
+        yield counter
+    if counter.count > limit:
+        listing = '\n'.join(f'  {i + 1}. {statement}' for i, statement in enumerate(counter.statements))
+        raise QueryBudgetExceeded(f'{label} issued {counter.count} SQL statements (budget {limit}):\n{listing}')
@@ -0,0 +1,157 @@
+"""Streaming reader for rate-card spreadsheets (CSV or XLSX).
+
+A file has one row per screen and hour with the columns
+
+    screen_id, hour, price, contacts_mon, ..., contacts_sun
+
+(``mon`` ... ``sun`` are accepted for the contacts columns). Header names are
+case-insensitive, CSV files may use ``,``, ``;`` or tab as the delimiter and
+numbers may use a decimal comma. Rows are parsed one at a time, so files of
+any size are read in constant memory. Reading XLSX files needs the optional
+openpyxl package.
+"""
+import codecs
+import csv
+import math
+
+from pricing import DAY_NAMES
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+CONTACT_COLUMNS = tuple(f'contacts_{day}' for day in DAY_NAMES)
+VALUE_COLUMNS = ('price',) + CONTACT_COLUMNS
+HEADER_ALIASES = dict(zip(DAY_NAMES, CONTACT_COLUMNS))
+
+
+class RateCardFileError(ValueError):
+    """The file cannot be read as a rate card"""
+
+
+def _number(value, column):
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        number = float(value)
+    else:
+        value = str(value).strip().replace(',', '.')
+        if not value:
+            return None
+        try:
+            number = float(value)
+        except ValueError:
+            raise ValueError(f'{column} is not a number: {value}')
+    if not math.isfinite(number):
+        raise ValueError(f'{column} is not a number: {value}')
+    return number
+
+
+def _integer(value, column):
+    number = _number(value, column)
+    if number is None:
+        raise ValueError(f'{column} is required')
+    if number != int(number):
+        raise ValueError(f'{column} is not a whole number: {value}')
+    return int(number)
+
+
+def parse_row(row):
+    """(screen_id, ScreenPricing column values) of one {column: cell} row; raises ValueError"""
+    screen_id = _integer(row.get('screen_id'), 'screen_id')
+    hour = _integer(row.get('hour'), 'hour')
+    if not 0 <= hour < 24:
+        raise ValueError(f'hour must be between 0 and 23: {hour}')
+    record = {'screen_id': screen_id, 'hour': hour}
+    for column in VALUE_COLUMNS:
+        record[column] = _number(row.get(column), column)
+    return screen_id, record
+
+
+def _header(cells):
+    columns = []
+    for cell in cells:
+        name = str(cell or '').strip().lower()
+        columns.append(HEADER_ALIASES.get(name, name))
+    missing = {'screen_id', 'hour'} - set(columns)
+    if missing:
+        raise RateCardFileError(f"Missing column(s): {', '.join(sorted(missing))}")
+    return columns
+
+
+def _csv_rows(stream):
+    text = codecs.getreader('utf-8-sig')(stream)
+    try:
+        sample = text.read(4096)
+    except UnicodeDecodeError as e:
+        raise RateCardFileError(f'The CSV file is not UTF-8 text: {e}')
+    try:
+        dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+
+    def lines():
+        pending = sample
+        chunk = sample
+        while chunk:
+            *complete, pending = pending.split('\n')
+            for line in complete:
+                yield line + '\n'
+            chunk = text.read(65536)
+            pending += chunk
+        if pending:
+            yield pending
+
+    reader = csv.reader(lines(), dialect)
+    try:
+        for cells in reader:
+            yield reader.line_num, cells
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise RateCardFileError(f'Cannot read the CSV file near line {reader.line_num + 1}: {e}')
+
+
+def _xlsx_rows(stream):
+    if openpyxl is None:
+        raise RateCardFileError('Reading .xlsx files needs the openpyxl package (pip install openpyxl)')
+    try:
+        workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+    except Exception as e:
+        raise RateCardFileError(f'Cannot open the workbook: {e}')
+    return enumerate(workbook.worksheets[0].iter_rows(values_only=True), start=1)
+
+
+def read_rate_card_rows(stream, filename):
+    """Yield (line, screen_id, record, error) for every data row of a binary stream.
+
+    ``record`` is a dict of ScreenPricing column values, or None with ``error``
+    describing why the row was rejected (``screen_id`` is then None when it
+    could not be read either). Raises RateCardFileError for unreadable files.
+    """
+    if filename.lower().endswith('.xlsx'):
+        rows = _xlsx_rows(stream)
+    elif filename.lower().endswith(('.csv', '.txt')):
+        rows = _csv_rows(stream)
+    else:
+        raise RateCardFileError('Rate cards must be .csv or .xlsx files')
+
+    columns = None
+    for line, cells in rows:
+        if not any(cell not in (None, '') for cell in cells):
+            continue
+        if columns is None:
+            columns = _header(cells)
+            continue
+        row = dict(zip(columns, cells))
+        try:
+            screen_id, record = parse_row(row)
+        except ValueError as e:
+            try:
+                screen_id = _integer(row.get('screen_id'), 'screen_id')
+            except ValueError:
+                screen_id = None
+            yield line, screen_id, None, str(e)
+            continue
+        yield line, screen_id, record, None
+    if columns is None:
+        raise RateCardFileError('The file has no header row')
@@ -0,0 +1,166 @@
+"""Process-local caching helpers for the JSON APIs and pages.
+
+A VersionRegistry keeps a process-local copy of version counters (such as
+DOOHPlan.version) so conditional requests can be answered without a database
+round trip, and a VersionedResponseCache keeps the last payload built for each
+key together with the version it was built from. A TTLCache holds values that
+have no version and are simply rebuilt after a while or when invalidated, and
+a BatchCache does the same for per-key values loaded many keys at a time.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class VersionRegistry:
+    """Process-local copy of version counters loaded on demand.
+
+    Entries are trusted for ``ttl`` seconds, after which ``loader(key)`` is
+    called again, so writes made by other worker processes are picked up
+    within that window. Writes made by this process call invalidate().
+    """
+
+    def __init__(self, loader, ttl=5.0):
+        self.loader = loader
+        self.ttl = ttl
+        self._versions = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._versions.get(key)
+            generation = self._generation
+        if entry is not None and now - entry[1] < self.ttl:
+            return entry[0]
+
+        version = self.loader(key)
+        with self._lock:
+            # Don't keep a version read before a write that was invalidated meanwhile
+            if generation == self._generation:
+                self._versions[key] = (version, now)
+        return version
+
+    def invalidate(self, *keys):
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                self._versions.pop(key, None)
+
+
+class VersionedResponseCache:
+    """LRU cache of response payloads that are only valid for one version"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, version, payload):
+        with self._lock:
+            self._entries[key] = (version, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class TTLCache:
+    """Values built on demand and kept for ``ttl`` seconds or until invalidated"""
+
+    def __init__(self, ttl=60.0):
+        self.ttl = ttl
+        self._entries = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            generation = self._generation
+        if entry is not None and now - entry[1] < self.ttl:
+            return entry[0]
+
+        value = build()
+        with self._lock:
+            # Don't keep a value built from data that was invalidated meanwhile
+            if generation == self._generation:
+                self._entries[key] = (value, now)
+        return value
+
+    def invalidate(self, *keys):
+        """Drop the given keys, or everything when called without keys"""
+        with self._lock:
+            self._generation += 1
+            if not keys:
+                self._entries.clear()
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+class BatchCache:
+    """Per-key values loaded on demand, many keys per loader call.
+
+    ``loader(keys)`` returns {key: value} for the keys it found; the others
+    are cached as ``default``. Entries are trusted for ``ttl`` seconds and
+    writes made by this process call invalidate().
+    """
+
+    def __init__(self, loader, ttl=300.0, default=None):
+        self.loader = loader
+        self.ttl = ttl
+        self.default = default
+        self._entries = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def get_many(self, keys):
+        """{key: value} for every key, with one loader call for all the misses"""
+        now = time.monotonic()
+        found = {}
+        missing = []
+        with self._lock:
+            generation = self._generation
+            for key in set(keys):
+                entry = self._entries.get(key)
+                if entry is not None and now - entry[1] < self.ttl:
+                    found[key] = entry[0]
+                else:
+                    missing.append(key)
+        if not missing:
+            return found
+
+        loaded = self.loader(missing)
+        with self._lock:
+            # Don't keep values loaded from data that was invalidated meanwhile
+            keep = generation == self._generation
+            for key in missing:
+                value = found[key] = loaded.get(key, self.default)
+                if keep:
+                    self._entries[key] = (value, now)
+        return found
+
+    def get(self, key):
+        return self.get_many([key])[key]
+
+    def invalidate(self, *keys):
+        """Drop the given keys, or everything when called without keys"""
+        with self._lock:
+            self._generation += 1
+            if not keys:
+                self._entries.clear()
+            for key in keys:
+                self._entries.pop(key, None)
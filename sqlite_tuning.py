@@ -0,0 +1,110 @@
+"""SQLite settings for several threads and workers sharing one database file.
+
+configure_engine() applies pragmas to every new connection:
+
+* ``journal_mode=WAL``: readers keep reading while a write is in progress and
+  a commit appends to the write-ahead log instead of rewriting pages.
+* ``busy_timeout``: a connection that finds the database locked waits up to
+  this long for the lock instead of failing with "database is locked".
+* ``synchronous=NORMAL``: in WAL mode commits no longer wait for an fsync. A
+  power loss can drop the last commits but never corrupts the file.
+* ``cache_size`` and ``mmap_size``: a larger page cache per connection and
+  reads through memory-mapped I/O.
+
+SQLite still allows only one writer at a time. WriteQueue runs the write
+transactions of the heavy save paths one at a time per process. Each
+transaction starts with BEGIN IMMEDIATE, so the lock is taken up front and
+the commit never hits a lock conflict. Threads queue on a Python lock rather
+than retrying the database lock. Other processes are held off by
+busy_timeout.
+"""
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event
+
+
+class WriteQueueTimeout(Exception):
+    """Waited too long for the write queue"""
+
+
+def is_sqlite_file(engine):
+    return engine.dialect.name == 'sqlite' and engine.url.database not in (None, '', ':memory:')
+
+
+def connection_pragmas(busy_timeout_ms=5000, synchronous='NORMAL', cache_size_kib=32768, mmap_size=268435456,
+                       query_only=False):
+    pragmas = [
+        f'PRAGMA busy_timeout = {int(busy_timeout_ms)}',
+        f'PRAGMA synchronous = {synchronous}',
+        # Negative sizes are in KiB rather than pages
+        f'PRAGMA cache_size = {-int(cache_size_kib)}',
+        f'PRAGMA mmap_size = {int(mmap_size)}',
+        'PRAGMA temp_store = MEMORY',
+    ]
+    if query_only:
+        pragmas.append('PRAGMA query_only = ON')
+    else:
+        # Persistent in the database file; read-only connections cannot change it
+        pragmas.insert(0, 'PRAGMA journal_mode = WAL')
+    return pragmas
+
+
+def configure_engine(engine, **settings):
+    """Apply the connection pragmas (see connection_pragmas) to every new connection of engine"""
+    pragmas = connection_pragmas(**settings)
+
+    @event.listens_for(engine, 'connect')
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+    return engine
+
+
+def read_only_engine(engine, **settings):
+    """A second engine on the same file whose connections refuse writes (PRAGMA query_only)"""
+    return configure_engine(create_engine(engine.url), query_only=True, **settings)
+
+
+class WriteQueue:
+    """Run write transactions one at a time within this process; disabled, it only commits"""
+
+    def __init__(self, timeout=None, enabled=True):
+        self.timeout = timeout
+        self.enabled = enabled
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def transaction(self, session):
+        """Run the block's writes in one transaction and commit it, or roll back on error.
+
+        Do the reads and calculations before entering the block. The lock is
+        held until the commit, and other writers wait for it.
+        """
+        if not self.enabled:
+            try:
+                yield
+                session.commit()
+            except BaseException:
+                session.rollback()
+                raise
+            return
+        if not self._lock.acquire(timeout=-1 if self.timeout is None else self.timeout):
+            raise WriteQueueTimeout(f'The database is busy, no write slot within {self.timeout:g}s')
+        try:
+            connection = session.connection()
+            if connection.dialect.name == 'sqlite' and not connection.connection.dbapi_connection.in_transaction:
+                connection.exec_driver_sql('BEGIN IMMEDIATE')
+            try:
+                yield
+                session.commit()
+            except BaseException:
+                session.rollback()
+                raise
+        finally:
+            self._lock.release()
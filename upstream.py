@@ -0,0 +1,161 @@
+"""Shared HTTP client for the Projects CRM and Agency CRM APIs.
+
+Each UpstreamClient keeps one pooled keep-alive requests.Session and caches
+JSON responses per path:
+
+- fresh responses (younger than ``ttl``) are served from memory;
+- stale responses (younger than ``stale_ttl``) are served immediately while a
+  background thread refreshes them (stale-while-revalidate);
+- concurrent callers missing the cache share a single in-flight request;
+- after ``failure_threshold`` consecutive failures the circuit opens for
+  ``reset_timeout`` seconds and the last good payload is served without
+  calling the upstream at all.
+"""
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class UpstreamError(Exception):
+    """The upstream could not be reached or answered with an error status"""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class _InflightCall:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class UpstreamClient:
+    def __init__(self, base_url, api_key, timeout=10, ttl=60, stale_ttl=600,
+                 failure_threshold=3, reset_timeout=30, pool_size=10):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        self.session = requests.Session()
+        self.session.headers['X-API-Key'] = api_key
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._lock = threading.Lock()
+        self._cache = {}  # path -> (payload, fetched_at)
+        self._inflight = {}  # path -> _InflightCall
+        self._refreshing = set()
+        self._failures = 0
+        self._opened_at = None
+
+    def get_json(self, path):
+        """Return the JSON payload for path, from cache when possible.
+
+        Raises UpstreamError when the upstream fails and there is no earlier
+        good payload to fall back on.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(path)
+        if entry is not None:
+            payload, fetched_at = entry
+            age = now - fetched_at
+            if age < self.ttl:
+                return payload
+            if age < self.stale_ttl or self.circuit_open():
+                self._refresh_in_background(path)
+                return payload
+
+        try:
+            return self._fetch_coalesced(path)
+        except UpstreamError:
+            if entry is not None:
+                return entry[0]
+            raise
+
+    def circuit_open(self):
+        with self._lock:
+            return self._opened_at is not None and time.monotonic() - self._opened_at < self.reset_timeout
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+            self._failures = 0
+            self._opened_at = None
+
+    def _refresh_in_background(self, path):
+        with self._lock:
+            if path in self._refreshing:
+                return
+            self._refreshing.add(path)
+
+        def refresh():
+            try:
+                self._fetch_coalesced(path)
+            except UpstreamError:
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(path)
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def _fetch_coalesced(self, path):
+        with self._lock:
+            call = self._inflight.get(path)
+            leader = call is None
+            if leader:
+                call = self._inflight[path] = _InflightCall()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._fetch(path)
+            return call.result
+        except UpstreamError as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[path]
+            call.done.set()
+
+    def _fetch(self, path):
+        if self.circuit_open():
+            raise UpstreamError(f'Circuit open for {self.base_url}')
+
+        try:
+            response = self.session.get(f'{self.base_url}{path}', timeout=self.timeout)
+            if response.status_code != 200:
+                raise UpstreamError(f'{self.base_url}{path} returned {response.status_code}', response.status_code)
+            payload = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            self._record_failure()
+            raise UpstreamError(str(e))
+        except UpstreamError:
+            self._record_failure()
+            raise
+
+        with self._lock:
+            self._cache[path] = (payload, time.monotonic())
+            self._failures = 0
+            self._opened_at = None
+        return payload
+
+    def _record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()